@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 import os
+import sys
 import dj_database_url
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -37,18 +38,23 @@ INSTALLED_APPS = [
     'django.contrib.contenttypes',
     'django.contrib.sessions',
     'django.contrib.messages',
+    # Before staticfiles, so runserver serves static files like production
+    'whitenoise.runserver_nostatic',
     'django.contrib.staticfiles',
     'complaints',
 ]
 
 MIDDLEWARE = [
+    'complaints.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'complaints.middleware.ReadYourWritesMiddleware',
 ]
 
 ROOT_URLCONF = 'complaint_management.urls'
@@ -97,8 +103,59 @@ DATABASES = {
 #     'default': dj_database_url.config(default=os.environ.get("DATABASE_URL"))
 # }
 
+# Read replicas
+# Comma-separated database URLs, e.g. DATABASE_REPLICA_URLS=postgres://...,postgres://...
+# Dashboards, lists and exports read from a replica unless the user wrote
+# within REPLICA_LAG_SECONDS (see complaints/routers.py). Tests read the
+# replicas through the primary.
+for index, url in enumerate(filter(None, os.environ.get('DATABASE_REPLICA_URLS', '').split(',')), start=1):
+    DATABASES[f'replica{index}'] = dict(dj_database_url.parse(url.strip()), TEST={'MIRROR': 'default'})
+
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+DATABASE_ROUTERS = ['complaints.routers.ReplicaRouter']
+
+# Upper bound on replica lag: users stay on the primary this long after a
+# write, and pages computed from a replica are cached no longer than this
+REPLICA_LAG_SECONDS = 10
+# How long an unreachable replica is skipped before it is tried again
+REPLICA_RETRY_SECONDS = 30
+
+
+# Cache
+# Local memory by default (per process, fine for development and tests). Set
+# REDIS_URL to share cached pages and version stamps across gunicorn workers.
+
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'complaint-management',
+            # Room for a few pages of row fragments (caching.render_rows)
+            'OPTIONS': {'MAX_ENTRIES': 20000},
+        }
+    }
 
 AUTH_USER_MODEL = 'complaints.User'
+
+# Sessions are read from the cache and written through to the database, and
+# session users resolve through the cached principal (complaints/principal.py)
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
+AUTHENTICATION_BACKENDS = [
+    'complaints.principal.PrincipalBackend',
+    # Sessions started before PrincipalBackend name this one; Django signs
+    # out sessions whose backend is not listed here
+    'django.contrib.auth.backends.ModelBackend',
+]
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -136,8 +193,79 @@ STATICFILES_DIRS = [
 # https://docs.djangoproject.com/en/5.2/howto/static-files/
 
 STATIC_URL = 'static/'
+STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
+
+# collectstatic (run by the Procfiles before the server starts) writes content-hashed
+# copies of every asset plus .gz and .br variants; WhiteNoise serves the
+# hashed names with a one-year immutable Cache-Control and picks the variant
+# the client accepts. Development and test runs have no manifest and serve
+# the source files under their own names.
+TESTING = sys.argv[1:2] == ['test']
+MANIFEST_STATICFILES_STORAGE = {
+    'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage',
+}
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': MANIFEST_STATICFILES_STORAGE,
+}
+if DEBUG or TESTING:
+    STORAGES['staticfiles'] = {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    }
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Complaint list pagination (keyset on created_at, id)
+COMPLAINTS_PAGE_SIZE = 25
+COMPLAINTS_MAX_PAGE_SIZE = 200
+# Remarks shown on a complaint's detail page before "Load older"
+REMARKS_PAGE_SIZE = 20
+
+# Serve the read-heavy views from complaints/async_views.py. asgi.py turns
+# this on; under WSGI the sync views avoid a per-request event loop.
+ASYNC_VIEWS = os.environ.get('DJANGO_ASYNC_VIEWS', '') == '1'
+
+# Seconds a cached dashboard or list page is kept (writes invalidate earlier)
+COMPLAINTS_CACHE_TIMEOUT = 300
+
+# Live complaint feed (complaints/feed.py, ASGI only): how often each process
+# polls the event log, how far back each poll re-reads for events that
+# committed late, and how long one SSE connection stays open before the
+# browser reconnects
+FEED_POLL_SECONDS = 1
+FEED_LOOKBACK_SECONDS = 10
+FEED_MAX_SECONDS = 300
+
+# update_rollups leaves complaint events younger than this for its next run,
+# so transactions still in flight never commit behind its watermark
+ROLLUP_SETTLE_SECONDS = 300
+
+# archive_complaints moves complaints Closed and unchanged for this long out
+# of the active table (complaints/archive.py)
+ARCHIVE_AFTER_DAYS = int(os.environ.get('ARCHIVE_AFTER_DAYS', 180))
+
+# Request metrics, served at /metrics (complaints/metrics.py). Requests over
+# either budget are logged with their queries; None disables a budget.
+METRICS_QUERY_BUDGET = 50
+METRICS_LATENCY_BUDGET_MS = 1000
+# When set, /metrics requires "Authorization: Bearer <token>". Without one it
+# is served only with DEBUG on or with METRICS_INTERNAL=1, for deployments
+# where /metrics is reachable from the internal network alone.
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+METRICS_INTERNAL = os.environ.get('METRICS_INTERNAL', '') == '1'
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'complaints': {'handlers': ['console'], 'level': 'INFO'},
+    },
+}
@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import User, Employee, Customer, Product, Complaint, ComplaintRemark
+from .models import User, Employee, Customer, Product, Complaint, ComplaintRemark, ComplaintEvent, ArchivedComplaint
 
 @admin.register(User)
 class CustomUserAdmin(UserAdmin):
@@ -67,3 +67,30 @@ class ComplaintRemarkAdmin(admin.ModelAdmin):
     list_filter = ('timestamp', 'employee')
     search_fields = ('complaint__customer__name', 'employee__user__username')
     readonly_fields = ('timestamp',)
+
+@admin.register(ComplaintEvent)
+class ComplaintEventAdmin(admin.ModelAdmin):
+    list_display = ('complaint', 'kind', 'old_value', 'new_value', 'actor', 'occurred_at')
+    list_filter = ('kind', 'occurred_at')
+    search_fields = ('complaint__id',)
+    # The log is append-only
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+@admin.register(ArchivedComplaint)
+class ArchivedComplaintAdmin(admin.ModelAdmin):
+    list_display = ('id', 'customer', 'product', 'complaint_level', 'assigned_to', 'created_at', 'archived_at')
+    list_filter = ('complaint_level', 'archived_at')
+    search_fields = ('id', 'customer__name', 'product__name')
+    # Written only by complaints.archive
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,281 @@
+import math
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import caching
+from .autocomplete import employee_label
+from .models import ArchivedComplaint, Complaint, ComplaintEvent, ComplaintRollup, Employee, Product, RollupWatermark
+
+# -------------------------------
+# SLA rollups
+# -------------------------------
+# The analytics page never scans complaints. "manage.py update_rollups"
+# folds new ComplaintEvents into ComplaintRollup rows keyed by
+# (day, product, level, employee):
+#
+#   time to assign  first assignment (unassigned -> employee), measured from
+#                   created_at, counted for the new assignee
+#   time to close   every change to Closed, measured from created_at,
+#                   counted for the employee assigned at the time of the run
+#
+# The watermark is the (occurred_at, id) of the last event folded in. Events
+# younger than ROLLUP_SETTLE_SECONDS are left for the next run, so a
+# transaction still in flight cannot commit an event behind the watermark.
+
+ANALYTICS = 'analytics'  # cache namespace, bumped after every run
+WATERMARK = 'complaint_sla'
+BATCH_SIZE = 5000
+
+# -------------------------------
+# Duration sketches
+# -------------------------------
+# Log-scale histograms: bucket b holds durations in [ratio**b, ratio**(b+1))
+# seconds, so a percentile read from them is within ~9% of the exact value.
+# They are sparse dicts ({"bucket": count}, JSON keys are strings) and merge
+# by adding counts, which is what lets daily rows be summed over any range.
+
+BUCKET_RATIO = 2 ** 0.25
+_LOG_RATIO = math.log(BUCKET_RATIO)
+
+
+def bucket_for(seconds):
+    return 0 if seconds < 1 else int(math.log(seconds) / _LOG_RATIO)
+
+
+def merge_histograms(into, histogram):
+    """Add ``histogram``'s counts to the Counter ``into``."""
+    for bucket, count in histogram.items():
+        into[int(bucket)] += count
+    return into
+
+
+def percentile(histogram, fraction):
+    """Approximate ``fraction`` percentile in seconds (the bucket's midpoint), or None if empty."""
+    total = sum(histogram.values())
+    if not total:
+        return None
+    rank = fraction * total
+    seen = 0
+    for bucket in sorted(histogram):
+        seen += histogram[bucket]
+        if seen >= rank:
+            return BUCKET_RATIO ** (bucket + 0.5)
+    return BUCKET_RATIO ** (max(histogram) + 0.5)
+
+
+def format_duration(seconds):
+    if seconds is None:
+        return '-'
+    minutes = int(seconds // 60)
+    if minutes < 60:
+        return f'{minutes}m'
+    hours, minutes = divmod(minutes, 60)
+    if hours < 48:
+        return f'{hours}h {minutes:02d}m'
+    days, hours = divmod(hours, 24)
+    return f'{days}d {hours}h'
+
+
+# -------------------------------
+# Folding events into rollups
+# -------------------------------
+
+class Delta:
+    __slots__ = ('assigned', 'assign_seconds', 'assign_histogram', 'closed', 'close_seconds', 'close_histogram')
+
+    def __init__(self):
+        self.assigned = self.closed = 0
+        self.assign_seconds = self.close_seconds = 0
+        self.assign_histogram = Counter()
+        self.close_histogram = Counter()
+
+
+def _sla_events(watermark, cutoff):
+    events = ComplaintEvent.objects.filter(
+        Q(kind=ComplaintEvent.ASSIGNED, old_value__isnull=True, new_value__isnull=False)
+        | Q(kind=ComplaintEvent.STATUS, new_value='Closed'),
+        occurred_at__lt=cutoff,
+    )
+    if watermark.occurred_at is not None:
+        events = events.filter(
+            Q(occurred_at__gt=watermark.occurred_at) | Q(occurred_at=watermark.occurred_at, id__gt=watermark.event_id)
+        )
+    return events.order_by('occurred_at', 'id').values_list('id', 'complaint_id', 'kind', 'new_value', 'occurred_at')
+
+
+def _complaints(ids):
+    fields = ('id', 'created_at', 'product_id', 'complaint_level', 'assigned_to_id')
+    found = {pk: row for pk, *row in Complaint.objects.filter(pk__in=ids).values_list(*fields)}
+    missing = set(ids) - set(found)
+    if missing:
+        # Rebuilds reach back to complaints archived since
+        found.update(
+            (pk, row) for pk, *row in ArchivedComplaint.objects.filter(pk__in=missing).values_list(*fields)
+        )
+    return found
+
+
+def _deltas(events):
+    complaints = _complaints({event[1] for event in events})
+    deltas = {}
+    for _, complaint_id, kind, new_value, occurred_at in events:
+        if complaint_id not in complaints:
+            continue  # deleted since; nothing left to attribute it to
+        created_at, product_id, level, assigned_to_id = complaints[complaint_id]
+        seconds = max(0, int((occurred_at - created_at).total_seconds()))
+        employee_id = int(new_value) if kind == ComplaintEvent.ASSIGNED else assigned_to_id
+        key = (timezone.localdate(occurred_at), product_id, level, employee_id)
+        delta = deltas.setdefault(key, Delta())
+        if kind == ComplaintEvent.ASSIGNED:
+            delta.assigned += 1
+            delta.assign_seconds += seconds
+            delta.assign_histogram[bucket_for(seconds)] += 1
+        else:
+            delta.closed += 1
+            delta.close_seconds += seconds
+            delta.close_histogram[bucket_for(seconds)] += 1
+    return deltas
+
+
+def _apply(deltas):
+    days = {key[0] for key in deltas}
+    existing = {
+        (row.day, row.product_id, row.complaint_level, row.employee_id): row
+        for row in ComplaintRollup.objects.filter(
+            day__in=days, product_id__in={key[1] for key in deltas},
+        )
+    }
+    changed, created = [], []
+    for key, delta in deltas.items():
+        row = existing.get(key)
+        if row is None:
+            row = ComplaintRollup(day=key[0], product_id=key[1], complaint_level=key[2], employee_id=key[3])
+            created.append(row)
+        else:
+            changed.append(row)
+        row.assigned_count += delta.assigned
+        row.assign_seconds += delta.assign_seconds
+        row.assign_histogram = dict(merge_histograms(Counter(), row.assign_histogram) + delta.assign_histogram)
+        row.closed_count += delta.closed
+        row.close_seconds += delta.close_seconds
+        row.close_histogram = dict(merge_histograms(Counter(), row.close_histogram) + delta.close_histogram)
+    ComplaintRollup.objects.bulk_create(created)
+    ComplaintRollup.objects.bulk_update(changed, [
+        'assigned_count', 'assign_seconds', 'assign_histogram', 'closed_count', 'close_seconds', 'close_histogram',
+    ])
+
+
+def update_rollups(batch_size=BATCH_SIZE, settle_seconds=None, progress=None):
+    """Fold events since the watermark into the rollups; returns how many were folded in."""
+    if settle_seconds is None:
+        settle_seconds = settings.ROLLUP_SETTLE_SECONDS
+    cutoff = timezone.now() - timedelta(seconds=settle_seconds)
+    RollupWatermark.objects.get_or_create(name=WATERMARK)
+    folded = 0
+    while True:
+        with transaction.atomic():
+            # The locked watermark row also keeps two runs from double counting
+            watermark = RollupWatermark.objects.select_for_update().get(name=WATERMARK)
+            events = list(_sla_events(watermark, cutoff)[:batch_size])
+            if not events:
+                break
+            _apply(_deltas(events))
+            watermark.event_id, watermark.occurred_at = events[-1][0], events[-1][-1]
+            watermark.save(update_fields=['event_id', 'occurred_at'])
+        folded += len(events)
+        if progress:
+            progress(folded)
+    if folded:
+        caching.bump(ANALYTICS)
+    return folded
+
+
+def reset_rollups():
+    """Drop every rollup and the watermark, so the next run starts from the first event."""
+    with transaction.atomic():
+        ComplaintRollup.objects.all().delete()
+        RollupWatermark.objects.filter(name=WATERMARK).delete()
+    caching.bump(ANALYTICS)
+
+
+# -------------------------------
+# Reading rollups
+# -------------------------------
+
+GROUPS = {
+    # name: rollup field the report is grouped by
+    'day': 'day',
+    'product': 'product_id',
+    'level': 'complaint_level',
+    'employee': 'employee_id',
+}
+
+
+def _summary(count, seconds, histogram):
+    return {
+        'count': count,
+        'mean': seconds / count if count else None,
+        'p50': percentile(histogram, 0.50),
+        'p90': percentile(histogram, 0.90),
+    }
+
+
+def _empty_total():
+    return [0, 0, Counter(), 0, 0, Counter()]
+
+
+def _add(total, values):
+    total[0] += values[0]
+    total[1] += values[1]
+    merge_histograms(total[2], values[2])
+    total[3] += values[3]
+    total[4] += values[4]
+    merge_histograms(total[5], values[5])
+
+
+def _summarise(total):
+    return _summary(*total[:3]), _summary(*total[3:])
+
+
+def report(start, end, group):
+    """
+    ``([(group value, assign summary, close summary), ...], overall)`` over
+    days ``start``..``end`` inclusive, read only from the rollups.
+    """
+    field = GROUPS[group]
+    groups, overall = {}, _empty_total()
+    rows = ComplaintRollup.objects.filter(day__gte=start, day__lte=end).values_list(
+        field, 'assigned_count', 'assign_seconds', 'assign_histogram',
+        'closed_count', 'close_seconds', 'close_histogram',
+    )
+    for key, *values in rows.iterator(chunk_size=2000):
+        _add(groups.setdefault(key, _empty_total()), values)
+        _add(overall, values)
+    grouped = [(key, *_summarise(total)) for key, total in groups.items()]
+    # Unassigned (None) sorts last
+    grouped.sort(key=lambda row: (row[0] is None, row[0] or 0) if group == 'employee' else row[0])
+    return grouped, _summarise(overall)
+
+
+def labels(group, keys):
+    """Display text for the group values of a report."""
+    if group == 'product':
+        return dict(Product.objects.filter(pk__in=keys).values_list('id', 'name'))
+    if group == 'employee':
+        names = {
+            pk: employee_label(*row)
+            for pk, *row in Employee.objects.filter(pk__in=[key for key in keys if key is not None])
+            .values_list('id', 'user__first_name', 'user__last_name', 'user__username', 'designation')
+        }
+        names[None] = 'Unassigned'
+        return names
+    return {key: str(key) for key in keys}
+
+
+def last_update():
+    return RollupWatermark.objects.filter(name=WATERMARK).values_list('occurred_at', flat=True).first()
@@ -0,0 +1,97 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from . import bulk
+from .models import ArchivedComplaint, ArchivedRemark, Complaint, ComplaintRemark
+
+# -------------------------------
+# Archiving closed complaints
+# -------------------------------
+# Complaints that have been Closed and untouched for ARCHIVE_AFTER_DAYS move,
+# with their remarks, to ArchivedComplaint / ArchivedRemark, so the lists,
+# queues, search and dashboards only ever work on the active set. Each batch
+# is one transaction: copy, delete, then the bulk bookkeeping (counters,
+# search documents, cache stamps) that the delete signals would have done.
+# The archived counter keeps dashboard totals covering both tables.
+
+COMPLAINT_FIELDS = (
+    'id', 'customer_id', 'product_id', 'complaint_level', 'description', 'location_lat', 'location_lng',
+    'status', 'assigned_to_id', 'created_by_id', 'created_at', 'updated_at',
+)
+REMARK_FIELDS = ('id', 'complaint_id', 'employee_id', 'remark', 'timestamp')
+BATCH_SIZE = 1000
+
+
+def cutoff(days=None):
+    return timezone.now() - timedelta(days=settings.ARCHIVE_AFTER_DAYS if days is None else days)
+
+
+def candidates(before):
+    """Closed complaints last changed before ``before``, oldest first (complaint_closed_updated_idx)."""
+    return Complaint.objects.filter(status='Closed', updated_at__lt=before).order_by('updated_at', 'id')
+
+
+def _delete(table, column, ids):
+    placeholders = ', '.join(['%s'] * len(ids))
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {table} WHERE {column} IN ({placeholders})', ids)
+
+
+def archive_batch(before, batch_size=BATCH_SIZE):
+    """Move up to ``batch_size`` candidates to the archive; returns how many moved."""
+    now = timezone.now()
+    with transaction.atomic():
+        rows = candidates(before)
+        if connection.features.has_select_for_update_skip_locked:
+            # Rows someone is changing right now are left for the next batch
+            rows = rows.select_for_update(skip_locked=True)
+        rows = list(rows.values(*COMPLAINT_FIELDS)[:batch_size])
+        if not rows:
+            return 0
+        ids = [row['id'] for row in rows]
+        ArchivedComplaint.objects.bulk_create(ArchivedComplaint(archived_at=now, **row) for row in rows)
+        ArchivedRemark.objects.bulk_create(
+            ArchivedRemark(**remark)
+            for remark in ComplaintRemark.objects.filter(complaint_id__in=ids).values(*REMARK_FIELDS).iterator()
+        )
+        # Plain DELETEs: the ORM's delete() would load every row to send signals
+        _delete(ComplaintRemark._meta.db_table, 'complaint_id', ids)
+        _delete(Complaint._meta.db_table, 'id', ids)
+        bulk.complaints_archived([(row['status'], row['assigned_to_id']) for row in rows], ids)
+    return len(rows)
+
+
+def archive(days=None, batch_size=BATCH_SIZE, limit=None, progress=None):
+    """Archive every candidate older than ``days`` (default ARCHIVE_AFTER_DAYS); returns the total moved."""
+    before = cutoff(days)
+    moved = 0
+    while limit is None or moved < limit:
+        size = batch_size if limit is None else min(batch_size, limit - moved)
+        count = archive_batch(before, size)
+        if not count:
+            break
+        moved += count
+        if progress:
+            progress(moved)
+    return moved
+
+
+# -------------------------------
+# Reading the archive
+# -------------------------------
+
+def archived_complaint(pk):
+    return (ArchivedComplaint.objects.select_related('customer', 'product', 'assigned_to__user')
+            .filter(pk=pk).first())
+
+
+async def aarchived_complaint(pk):
+    return await (ArchivedComplaint.objects.select_related('customer', 'product', 'assigned_to__user')
+                  .filter(pk=pk).afirst())
+
+
+def archived_timeline(complaint_id):
+    return ArchivedRemark.objects.filter(complaint_id=complaint_id).select_related('employee__user')
@@ -0,0 +1,344 @@
+from django.shortcuts import render, redirect, aget_object_or_404
+from django.conf import settings
+from django.contrib.auth.decorators import login_required, user_passes_test
+from django.contrib import messages
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from .models import Employee, Customer, Product, Complaint, ArchivedComplaint
+from .forms import ComplaintRemarkForm
+from .pagination import akeyset_paginate, aoffset_paginate, get_page_size
+from .views import (
+    FILTER_PICKERS, UNASSIGNED_ROW, assigned_queryset, complaint_list_queryset, distance_key,
+    is_admin, is_admin_or_employee, is_employee, remark_timeline, remarks_response, unassigned_queryset,
+)
+from .routers import replica_reads
+from .conditional import acomplaint_validator, conditional, page_validator
+from . import archive, autocomplete, caching, counters, feed, geo, principal
+
+# -------------------------------
+# Async read views
+# -------------------------------
+# Twins of the read-heavy views in views.py, served when ASYNC_VIEWS is on
+# (the ASGI profile). Every query goes through the async ORM, so a slow
+# database round trip parks a coroutine instead of pinning a worker thread.
+# Templates are rendered synchronously, so everything they touch is loaded
+# up front: related rows with select_related and the user via auser().
+
+async def current_user(request):
+    user = await request.auser()
+    # The auth context processor reads request.user; resolve it here so
+    # rendering never has to query from inside the event loop
+    request.user = user
+    return user
+
+async def current_employee(request):
+    user = await current_user(request)
+    return await principal.aemployee_of(user)
+
+async def as_list(queryset):
+    return [obj async for obj in queryset]
+
+# -------------------------------
+# Admin Views
+# -------------------------------
+
+@login_required
+@user_passes_test(is_admin)
+@replica_reads
+async def admin_dashboard(request):
+    await current_user(request)
+    counts = await caching.acached(
+        'admin_dashboard',
+        (caching.COMPLAINTS, caching.EMPLOYEES, caching.CUSTOMERS, caching.PRODUCTS),
+        lambda: counters.aget_counts(
+            counters.TOTAL_EMPLOYEES,
+            counters.TOTAL_CUSTOMERS,
+            counters.TOTAL_PRODUCTS,
+            counters.TOTAL_COMPLAINTS,
+            counters.status_key('Pending'),
+            counters.status_key('Closed'),
+            counters.ARCHIVED,
+        ),
+    )
+
+    context = {
+        'total_employees': counts[counters.TOTAL_EMPLOYEES],
+        'total_customers': counts[counters.TOTAL_CUSTOMERS],
+        'total_products': counts[counters.TOTAL_PRODUCTS],
+        # Archived complaints are all closed
+        'total_complaints': counts[counters.TOTAL_COMPLAINTS] + counts[counters.ARCHIVED],
+        'pending_complaints': counts[counters.status_key('Pending')],
+        'closed_complaints': counts[counters.status_key('Closed')] + counts[counters.ARCHIVED],
+    }
+    return render(request, 'admin_section/dashboard.html', context)
+
+@login_required
+@user_passes_test(is_admin)
+@replica_reads
+async def employee_list(request):
+    await current_user(request)
+    employees = await as_list(Employee.objects.select_related('user'))
+    return render(request, 'admin_section/employee_list.html', {'employees': employees})
+
+@login_required
+@user_passes_test(is_admin)
+@replica_reads
+async def customer_list(request):
+    await current_user(request)
+    customers = await as_list(Customer.objects.all())
+    return render(request, 'admin_section/customer_list.html', {'customers': customers})
+
+@login_required
+@user_passes_test(is_admin)
+@replica_reads
+async def product_list(request):
+    await current_user(request)
+    products = await as_list(Product.objects.all())
+    return render(request, 'admin_section/product_list.html', {'products': products})
+
+async def complaint_list_page(request):
+    async def load_page():
+        complaints = complaint_list_queryset(request.GET)
+        if request.GET.get('search'):
+            return await aoffset_paginate(request, complaints)
+        return await akeyset_paginate(request, complaints)
+
+    return await caching.acached(
+        'complaint_list',
+        (caching.COMPLAINTS, caching.EMPLOYEES, caching.CUSTOMERS, caching.PRODUCTS),
+        load_page,
+        params=request.GET.dict(),
+    )
+
+@login_required
+@user_passes_test(is_admin)
+@replica_reads
+@conditional(page_validator(complaint_list_page))
+async def complaint_list(request):
+    await current_user(request)
+    page = await complaint_list_page(request)
+
+    selected = {
+        param: await autocomplete.alabel(kind, request.GET[param])
+        for param, kind in FILTER_PICKERS.items() if request.GET.get(param)
+    }
+
+    return render(request, 'admin_section/complaint_list.html', {
+        'complaints': page,
+        'page': page,
+        'rows': await caching.arender_rows('partials/complaint_row_admin.html', page),
+        'selected': selected,
+    })
+
+@login_required
+@user_passes_test(is_admin)
+@replica_reads
+@conditional(acomplaint_validator)
+async def complaint_detail(request, pk):
+    await current_user(request)
+    complaint = await Complaint.objects.select_related('customer', 'product', 'assigned_to__user').filter(pk=pk).afirst()
+    if complaint is None:
+        complaint = await archive.aarchived_complaint(pk)
+        if complaint is None:
+            raise Http404('No complaint matches the given query.')
+        timeline, archived = archive.archived_timeline(pk), True
+    else:
+        timeline, archived = remark_timeline(pk), False
+    remarks = await akeyset_paginate(request, timeline, field='timestamp', default_size=settings.REMARKS_PAGE_SIZE)
+    return render(request, 'admin_section/complaint_detail.html', {
+        'complaint': complaint, 'remarks': remarks, 'archived': archived,
+    })
+
+# -------------------------------
+# Employee Views
+# -------------------------------
+
+@login_required
+@user_passes_test(is_employee)
+@replica_reads
+async def employee_dashboard(request):
+    employee = await current_employee(request)
+    if employee is not None:
+        counts = await caching.acached(
+            f'employee_dashboard:{employee.pk}',
+            (caching.COMPLAINTS,),
+            lambda: counters.aget_counts(counters.assigned_key(employee.pk), counters.UNASSIGNED),
+        )
+        context = {
+            'assigned_complaints': counts[counters.assigned_key(employee.pk)],
+            'unassigned_complaints': counts[counters.UNASSIGNED],
+        }
+    else:
+        context = {
+            'assigned_complaints': 0,
+            'unassigned_complaints': 0,
+        }
+
+    return render(request, 'employees/dashboard.html', context)
+
+async def assigned_complaints_page(request):
+    employee = await current_employee(request)
+    if employee is None:
+        return None
+    complaints = assigned_queryset(employee, request.GET)
+    paginate = aoffset_paginate if request.GET.get('search') else akeyset_paginate
+    return await caching.acached(
+        f'assigned_complaints:{employee.pk}',
+        (caching.COMPLAINTS, caching.CUSTOMERS, caching.PRODUCTS),
+        lambda: paginate(request, complaints),
+        params=request.GET.dict(),
+    )
+
+@login_required
+@user_passes_test(is_employee)
+@replica_reads
+@conditional(page_validator(assigned_complaints_page))
+async def assigned_complaints(request):
+    page = await assigned_complaints_page(request)
+    rows = await caching.arender_rows('partials/complaint_row_assigned.html', page or [])
+    return render(request, 'employees/assigned_complaints.html', {'complaints': page, 'page': page, 'rows': rows})
+
+async def unassigned_complaints_page(request):
+    if geo.parse_point(request.GET.get('lat'), request.GET.get('lng')):
+        return None  # "Near me" pages depend on the position and are not cached
+    return await caching.acached(
+        'unassigned_complaints',
+        (caching.COMPLAINTS, caching.CUSTOMERS, caching.PRODUCTS),
+        lambda: akeyset_paginate(request, unassigned_queryset()),
+        params=request.GET.dict(),
+    )
+
+@login_required
+@user_passes_test(is_employee)
+@replica_reads
+@conditional(page_validator(unassigned_complaints_page))
+async def unassigned_complaints(request):
+    await current_user(request)
+
+    point = geo.parse_point(request.GET.get('lat'), request.GET.get('lng'))
+    if point:
+        nearby = await geo.anearest(unassigned_queryset(), *point, limit=get_page_size(request))
+        return render(request, 'employees/unassigned_complaints.html', {
+            'complaints': nearby,
+            'rows': await caching.arender_rows(UNASSIGNED_ROW, nearby, {'near': point}, vary=distance_key),
+            'near': point,
+        })
+
+    page = await unassigned_complaints_page(request)
+    rows = await caching.arender_rows(UNASSIGNED_ROW, page)
+    return render(request, 'employees/unassigned_complaints.html', {'complaints': page, 'page': page, 'rows': rows})
+
+@login_required
+@user_passes_test(is_employee)
+@conditional(acomplaint_validator)
+async def complaint_detail_employee(request, pk):
+    employee = await current_employee(request)
+    complaint = await aget_object_or_404(
+        Complaint.objects.select_related('customer', 'product', 'assigned_to__user'), pk=pk
+    )
+
+    if request.method == 'POST':
+        form = ComplaintRemarkForm(request.POST)
+        if form.is_valid():
+            remark = form.save(commit=False)
+            remark.complaint = complaint
+            remark.employee = employee
+            await remark.asave()
+            messages.success(request, 'Remark added successfully')
+            return redirect('complaint_detail_employee', pk=pk)
+    else:
+        form = ComplaintRemarkForm()
+
+    remarks = await akeyset_paginate(request, remark_timeline(pk), field='timestamp',
+                                     default_size=settings.REMARKS_PAGE_SIZE)
+    return render(request, 'employees/complaint_detail.html', {
+        'complaint': complaint,
+        'remarks': remarks,
+        'form': form
+    })
+
+@login_required
+@user_passes_test(is_admin_or_employee)
+@replica_reads
+async def complaint_remarks(request, pk):
+    user = await current_user(request)
+    if await Complaint.objects.filter(pk=pk).aexists():
+        timeline = remark_timeline(pk)
+    elif is_admin(user) and await ArchivedComplaint.objects.filter(pk=pk).aexists():
+        timeline = archive.archived_timeline(pk)
+    else:
+        raise Http404('No complaint matches the given query.')
+    page = await akeyset_paginate(request, timeline, field='timestamp', default_size=settings.REMARKS_PAGE_SIZE)
+    return remarks_response(request, page)
+
+# -------------------------------
+# Live Feed
+# -------------------------------
+
+@login_required
+@user_passes_test(is_admin_or_employee)
+async def complaint_feed(request):
+    """Server-Sent Events of complaint changes for this user's lists (complaints/feed.py)."""
+    user = await current_user(request)
+    admin = is_admin(user)
+    employee = None if admin else await principal.aemployee_of(user)
+    last_event_id = request.headers.get('Last-Event-ID')
+    if last_event_id:
+        # A reconnect: replay what was missed, or have the page reload
+        since, strict = feed.parse_since(last_event_id), True
+    else:
+        # A page opening the feed: best effort from when it was rendered
+        since, strict = feed.parse_since(request.GET.get('since'), seconds=True), False
+    try:
+        seconds = min(max(float(request.GET.get('wait', settings.FEED_MAX_SECONDS)), 0), settings.FEED_MAX_SECONDS)
+    except ValueError:
+        seconds = settings.FEED_MAX_SECONDS
+
+    subscriber = feed.Subscriber(admin, employee.pk if employee else None)
+    response = StreamingHttpResponse(feed.stream(subscriber, since, strict, seconds), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # nginx: pass events through as they are written
+    return response
+
+# -------------------------------
+# API Views for AJAX
+# -------------------------------
+
+@login_required
+@user_passes_test(is_admin)
+@replica_reads
+async def autocomplete_lookup(request, kind):
+    await current_user(request)
+    if kind not in autocomplete.SOURCES:
+        raise Http404
+    results = await autocomplete.alookup(kind, request.GET.get('q', ''), autocomplete.clean_limit(request.GET.get('limit')))
+    return JsonResponse({'results': results})
+
+@login_required
+@user_passes_test(is_employee)
+@replica_reads
+async def nearby_complaints(request):
+    point = geo.parse_point(request.GET.get('lat'), request.GET.get('lng'))
+    if not point:
+        return JsonResponse({'status': 'error', 'message': 'Valid lat and lng are required'}, status=400)
+    try:
+        limit = int(request.GET.get('limit', 10))
+    except ValueError:
+        limit = 10
+
+    nearby = await geo.anearest(unassigned_queryset(), *point, limit=limit)
+    return JsonResponse({
+        'status': 'success',
+        'complaints': [
+            {
+                'id': complaint.pk,
+                'customer': complaint.customer.name,
+                'product': complaint.product.name,
+                'complaint_level': complaint.complaint_level,
+                'lat': complaint.location_lat,
+                'lng': complaint.location_lng,
+                'distance_km': complaint.distance_km,
+                'created_at': complaint.created_at.isoformat(),
+            }
+            for complaint in nearby
+        ],
+    })
@@ -0,0 +1,131 @@
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.db.models.functions import Length
+
+from . import caching
+from .models import Customer, Employee, Product
+
+# -------------------------------
+# Typeahead lookups
+# -------------------------------
+# Pickers on the complaint list, complaint form and assign page ask for
+# matches as the user types instead of rendering every customer, product
+# and employee into a <select>. Matching is a case-insensitive prefix
+# (istartswith), served by the prefix indexes from migration 0006:
+# UPPER(col) text_pattern_ops on PostgreSQL, col COLLATE NOCASE on SQLite.
+
+DEFAULT_RESULTS = 10
+MAX_RESULTS = 20
+
+
+def employee_label(first_name, last_name, username, designation):
+    name = f'{first_name} {last_name}'.strip() or username
+    return f'{name} ({designation})' if designation else name
+
+
+def _by_name(model, term):
+    # Shortest names first: an exact match always leads, then the closest completions
+    return (model.objects.filter(name__istartswith=term)
+            .order_by(Length('name'), 'name', 'id')
+            .values_list('id', 'name'))
+
+
+def _employees(term):
+    return (
+        Employee.objects.filter(
+            Q(user__first_name__istartswith=term)
+            | Q(user__last_name__istartswith=term)
+            | Q(user__username__istartswith=term)
+        )
+        .annotate(first_name_match=Case(
+            When(user__first_name__istartswith=term, then=Value(0)),
+            default=Value(1),
+            output_field=IntegerField(),
+        ))
+        .order_by('first_name_match', 'user__first_name', 'user__last_name', 'id')
+        .values_list('id', 'user__first_name', 'user__last_name', 'user__username', 'designation')
+    )
+
+
+def _employee_row(row):
+    return row[0], employee_label(*row[1:])
+
+
+SOURCES = {
+    # kind: (matching rows for a term, (id, label) from a row, cache namespace)
+    'customers': (lambda term: _by_name(Customer, term), tuple, caching.CUSTOMERS),
+    'products': (lambda term: _by_name(Product, term), tuple, caching.PRODUCTS),
+    'employees': (_employees, _employee_row, caching.EMPLOYEES),
+}
+
+
+def clean_limit(value):
+    try:
+        return max(1, min(int(value), MAX_RESULTS))
+    except (TypeError, ValueError):
+        return DEFAULT_RESULTS
+
+
+def _results(rows, to_pair):
+    return [{'id': pk, 'text': text} for pk, text in map(to_pair, rows)]
+
+
+def lookup(kind, term, limit=DEFAULT_RESULTS):
+    """Up to ``limit`` ``{'id', 'text'}`` matches for ``term``; ``kind`` must be in SOURCES."""
+    query, to_pair, namespace = SOURCES[kind]
+    term = term.strip()
+    if not term:
+        return []
+    return caching.cached(
+        f'autocomplete:{kind}', (namespace,),
+        lambda: _results(query(term)[:limit], to_pair),
+        params={'q': term.lower(), 'limit': limit},
+    )
+
+
+async def alookup(kind, term, limit=DEFAULT_RESULTS):
+    """Async version of lookup()."""
+    query, to_pair, namespace = SOURCES[kind]
+    term = term.strip()
+    if not term:
+        return []
+
+    async def compute():
+        return _results([row async for row in query(term)[:limit]], to_pair)
+
+    return await caching.acached(
+        f'autocomplete:{kind}', (namespace,), compute,
+        params={'q': term.lower(), 'limit': limit},
+    )
+
+
+# -------------------------------
+# Labels for selected values
+# -------------------------------
+
+def _label_query(kind, pk):
+    if kind == 'employees':
+        return (Employee.objects.filter(pk=pk)
+                .values_list('id', 'user__first_name', 'user__last_name', 'user__username', 'designation'))
+    model = Customer if kind == 'customers' else Product
+    return model.objects.filter(pk=pk).values_list('id', 'name')
+
+
+def _clean_pk(pk):
+    try:
+        return int(pk)
+    except (TypeError, ValueError):
+        return None
+
+
+def label(kind, pk):
+    """Display text for the selected ``pk`` of a picker, or '' if there is none."""
+    pk = _clean_pk(pk)
+    row = _label_query(kind, pk).first() if pk is not None else None
+    return SOURCES[kind][1](row)[1] if row else ''
+
+
+async def alabel(kind, pk):
+    """Async version of label()."""
+    pk = _clean_pk(pk)
+    row = await _label_query(kind, pk).afirst() if pk is not None else None
+    return SOURCES[kind][1](row)[1] if row else ''
@@ -0,0 +1,103 @@
+import csv
+import io
+from collections import Counter
+
+from django.db import connection
+
+from . import caching, counters, search
+
+# -------------------------------
+# Bookkeeping for bulk writes
+# -------------------------------
+# bulk_create(), bulk_update(), queryset.update() and COPY do not send the
+# save/delete signals that keep counters, search documents and cache version
+# stamps current (see complaints/signals.py). Bulk code paths call these
+# helpers inside their own transaction instead, once per batch.
+
+
+def complaints_created(states, complaint_ids=None, after_id=None):
+    """
+    Account for newly inserted complaints.
+
+    ``states`` is an iterable of (status, assigned_to_id) tuples, one per row.
+    Pass the new ids, or ``after_id`` when the ids are unknown (COPY).
+    """
+    deltas = Counter()
+    for state in states:
+        for key in counters.complaint_keys(*state):
+            deltas[key] += 1
+    counters.adjust(deltas)
+    if complaint_ids is not None:
+        search.reindex(complaint_ids=complaint_ids)
+    elif after_id is not None:
+        search.reindex(after_id=after_id)
+    caching.bump(caching.COMPLAINTS)
+
+
+def complaints_changed(transitions):
+    """Account for (old_state, new_state) pairs of updated complaints."""
+    deltas = Counter()
+    for old_state, new_state in transitions:
+        if old_state == new_state:
+            continue
+        for key in counters.complaint_keys(*old_state):
+            deltas[key] -= 1
+        for key in counters.complaint_keys(*new_state):
+            deltas[key] += 1
+    counters.adjust(deltas)
+    caching.bump(caching.COMPLAINTS)
+
+
+def complaints_archived(states, complaint_ids):
+    """Account for complaints moved to the archive; ``states`` as for complaints_created()."""
+    deltas = Counter()
+    for state in states:
+        for key in counters.complaint_keys(*state):
+            deltas[key] -= 1
+    deltas[counters.ARCHIVED] += len(complaint_ids)
+    counters.adjust(deltas)
+    search.remove(complaint_ids)
+    caching.bump(caching.COMPLAINTS)
+
+
+def can_copy():
+    """True when the connection can stream rows with COPY (PostgreSQL through psycopg2)."""
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        return hasattr(cursor.cursor, 'copy_expert')
+
+
+def insert_rows(model, columns, rows):
+    """
+    INSERT ``rows`` (sequences of values) into ``model``'s table with one
+    executemany(). Skips bulk_create()'s per-value field preparation, which
+    dominates at millions of rows; only datetimes need adapting.
+    """
+    adapters = [
+        connection.ops.adapt_datetimefield_value
+        if model._meta.get_field(column).get_internal_type() == 'DateTimeField' else None
+        for column in columns
+    ]
+    params = [
+        [adapt(value) if adapt else value for adapt, value in zip(adapters, row)]
+        for row in rows
+    ]
+    placeholders = ', '.join(['%s'] * len(columns))
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'INSERT INTO {model._meta.db_table} ({", ".join(columns)}) VALUES ({placeholders})', params
+        )
+
+
+def copy_rows(model, columns, rows):
+    """COPY ``rows`` (sequences of values, None for NULL) into ``model``'s table."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow(['' if value is None else value for value in row])
+    buffer.seek(0)
+    with connection.cursor() as cursor:
+        cursor.cursor.copy_expert(
+            f'COPY {model._meta.db_table} ({", ".join(columns)}) FROM STDIN WITH (FORMAT csv)', buffer
+        )
@@ -0,0 +1,187 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.template.loader import get_template
+from django.utils.safestring import mark_safe
+
+from . import routers
+
+# -------------------------------
+# Versioned read-through cache
+# -------------------------------
+# Cached values are keyed by the current version stamp of every model
+# namespace they were computed from. A write bumps the stamp, so old entries
+# simply stop being looked up and expire on their own; nothing is ever
+# deleted by pattern, which keeps this safe on any shared cache backend.
+
+COMPLAINTS = 'complaints'
+EMPLOYEES = 'employees'
+CUSTOMERS = 'customers'
+PRODUCTS = 'products'
+
+VERSION_TIMEOUT = None  # version stamps never expire on their own
+
+
+def _version_key(namespace):
+    return f'cms:version:{namespace}'
+
+
+def _fresh_version():
+    # Milliseconds since the epoch: if a stamp is evicted, the replacement is
+    # still greater than any value handed out before, so no old entry matches.
+    return int(time.time() * 1000)
+
+
+def get_versions(*namespaces):
+    keys = {_version_key(ns): ns for ns in namespaces}
+    found = cache.get_many(list(keys))
+    versions = {}
+    for key, namespace in keys.items():
+        version = found.get(key)
+        if version is None:
+            cache.add(key, _fresh_version(), VERSION_TIMEOUT)
+            version = cache.get(key)
+        versions[namespace] = version
+    return versions
+
+
+async def aget_versions(*namespaces):
+    """Async version of get_versions()."""
+    keys = {_version_key(ns): ns for ns in namespaces}
+    found = await cache.aget_many(list(keys))
+    versions = {}
+    for key, namespace in keys.items():
+        version = found.get(key)
+        if version is None:
+            await cache.aadd(key, _fresh_version(), VERSION_TIMEOUT)
+            version = await cache.aget(key)
+        versions[namespace] = version
+    return versions
+
+
+def _bump_now(namespaces):
+    for namespace in namespaces:
+        key = _version_key(namespace)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, _fresh_version(), VERSION_TIMEOUT)
+
+
+def bump(*namespaces):
+    """Invalidate everything computed from ``namespaces`` once the current transaction commits."""
+    transaction.on_commit(lambda: _bump_now(namespaces))
+
+
+def make_key(name, versions, params=None):
+    stamp = '.'.join(f'{ns}{versions[ns]}' for ns in sorted(versions))
+    digest = ''
+    if params:
+        raw = '&'.join(f'{k}={v}' for k, v in sorted(params.items()) if v not in (None, ''))
+        digest = hashlib.md5(raw.encode()).hexdigest()
+    return f'cms:{name}:{stamp}:{digest}'
+
+
+def _timeout(timeout):
+    if timeout is None:
+        timeout = getattr(settings, 'COMPLAINTS_CACHE_TIMEOUT', 300)
+    if routers.reading_from_replica():
+        # A lagging replica may predate the current version stamp; keep
+        # what we computed from it only as long as the lag can last
+        timeout = min(timeout, routers.lag_seconds())
+    return timeout
+
+
+def cached(name, namespaces, compute, params=None, timeout=None):
+    """
+    Return ``compute()`` through the cache.
+
+    ``params`` (e.g. the filter values of a list page) become part of the
+    key. The version stamps are read before computing, so a write that
+    commits while we compute leaves our result under the superseded key.
+    """
+    versions = get_versions(*namespaces)
+    key = make_key(name, versions, params)
+    value = cache.get(key)
+    if value is None:
+        value = compute()
+        cache.set(key, value, _timeout(timeout))
+    return value
+
+
+async def acached(name, namespaces, compute, params=None, timeout=None):
+    """Async version of cached(); ``compute`` is a coroutine function."""
+    versions = await aget_versions(*namespaces)
+    key = make_key(name, versions, params)
+    value = await cache.aget(key)
+    if value is None:
+        value = await compute()
+        await cache.aset(key, value, _timeout(timeout))
+    return value
+
+
+# -------------------------------
+# Row fragments
+# -------------------------------
+# List pages are assembled from one cached fragment per complaint row. A
+# fragment is keyed by the complaint's id and updated_at and by the version
+# stamps of the customers, products and employees whose names rows show,
+# so a page only renders the rows that changed since it was last built.
+# All of a page's fragments are fetched with a single get_many().
+
+ROW_NAMESPACES = (CUSTOMERS, PRODUCTS, EMPLOYEES)
+# Part of every fragment key; bump it when the row templates change
+ROW_MARKUP_VERSION = 2
+
+
+def _row_keys(template_name, complaints, versions, vary):
+    stamp = '.'.join(f'{ns}{versions[ns]}' for ns in sorted(versions))
+    return [
+        f'cms:row{ROW_MARKUP_VERSION}:{template_name}:{complaint.pk}:{complaint.updated_at.timestamp()}:{stamp}'
+        + (f':{vary(complaint)}' if vary else '')
+        for complaint in complaints
+    ]
+
+
+def _render_rows(template_name, complaints, keys, found, context):
+    template = get_template(template_name)
+    rows, rendered = [], {}
+    for complaint, key in zip(complaints, keys):
+        html = found.get(key)
+        if html is None:
+            html = rendered[key] = template.render({**(context or {}), 'complaint': complaint})
+        rows.append(mark_safe(html))
+    return rows, rendered
+
+
+def _row_timeout():
+    return _timeout(getattr(settings, 'ROW_FRAGMENT_TIMEOUT', 24 * 60 * 60))
+
+
+def render_rows(template_name, complaints, context=None, vary=None):
+    """
+    Render ``template_name`` once per complaint (as ``complaint``), reusing
+    cached fragments of unchanged rows.
+
+    ``context`` is shared by every row. When it changes the markup per
+    request, ``vary(complaint)`` must return a key suffix covering it.
+    """
+    complaints = list(complaints)
+    keys = _row_keys(template_name, complaints, get_versions(*ROW_NAMESPACES), vary)
+    rows, rendered = _render_rows(template_name, complaints, keys, cache.get_many(keys), context)
+    if rendered:
+        cache.set_many(rendered, _row_timeout())
+    return rows
+
+
+async def arender_rows(template_name, complaints, context=None, vary=None):
+    """Async version of render_rows()."""
+    complaints = list(complaints)
+    keys = _row_keys(template_name, complaints, await aget_versions(*ROW_NAMESPACES), vary)
+    rows, rendered = _render_rows(template_name, complaints, keys, await cache.aget_many(keys), context)
+    if rendered:
+        await cache.aset_many(rendered, _row_timeout())
+    return rows
@@ -0,0 +1,72 @@
+from django.db import connection, transaction
+from django.utils import timezone
+
+from . import bulk, events
+from .models import Complaint
+
+# -------------------------------
+# Claiming unassigned complaints
+# -------------------------------
+# A claim is a conditional UPDATE ... WHERE assigned_to IS NULL that touches
+# only the assigned_to column, so two employees can never both win the same
+# complaint and a claim can never overwrite a concurrent status change.
+# "Claim next N" picks its rows with SELECT ... FOR UPDATE SKIP LOCKED on
+# PostgreSQL so concurrent claimers walk past each other's rows instead of
+# queueing behind them.
+
+MAX_CLAIM_BATCH = 50
+
+
+def _record_claims(employee, claimed):
+    """``claimed`` is a list of (id, status) pairs that were just assigned."""
+    changes = [(pk, (status, None), (status, employee.pk)) for pk, status in claimed]
+    bulk.complaints_changed((old, new) for _, old, new in changes)
+    events.record_changes(changes, actor=employee.user_id)
+
+
+def claim(complaint_id, employee):
+    """Assign one complaint to ``employee`` if it is still unassigned; returns True on success."""
+    with transaction.atomic():
+        updated = (Complaint.objects.filter(pk=complaint_id, assigned_to__isnull=True)
+                   .update(assigned_to=employee, updated_at=timezone.now()))
+        if not updated:
+            return False
+        # Our UPDATE holds the row lock until commit, so this status is the one we claimed
+        status = Complaint.objects.filter(pk=complaint_id).values_list('status', flat=True).get()
+        _record_claims(employee, [(complaint_id, status)])
+    return True
+
+
+def next_unassigned(count):
+    """Ids of the ``count`` oldest unassigned complaints, locked with SKIP LOCKED where supported."""
+    candidates = Complaint.objects.filter(assigned_to__isnull=True).order_by('created_at', 'id')
+    if connection.features.has_select_for_update_skip_locked:
+        candidates = candidates.select_for_update(skip_locked=True)
+    return candidates.values_list('id', flat=True)[:count]
+
+
+def claim_next(employee, count=1):
+    """Claim up to ``count`` of the oldest unassigned complaints; returns the claimed ids."""
+    count = max(1, min(count, MAX_CLAIM_BATCH))
+    with transaction.atomic():
+        skip_locked = connection.features.has_select_for_update_skip_locked
+        ids = list(next_unassigned(count))
+        if not ids:
+            return []
+
+        if skip_locked:
+            # The rows are locked by us; the IS NULL guard still keeps a claim
+            # made earlier in this same transaction from being overwritten
+            Complaint.objects.filter(pk__in=ids, assigned_to__isnull=True).update(
+                assigned_to=employee, updated_at=timezone.now())
+        else:
+            # Another claimer may have won some rows since our SELECT; the
+            # IS NULL guard turns those into no-ops
+            ids = [
+                pk for pk in ids
+                if Complaint.objects.filter(pk=pk, assigned_to__isnull=True).update(
+                    assigned_to=employee, updated_at=timezone.now())
+            ]
+        claimed = list(Complaint.objects.filter(pk__in=ids, assigned_to=employee).values_list('id', 'status'))
+        _record_claims(employee, claimed)
+    return [pk for pk, _ in claimed]
@@ -0,0 +1,164 @@
+import hashlib
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.contrib import messages
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+from . import caching
+from .models import Complaint
+
+# -------------------------------
+# Conditional GET
+# -------------------------------
+# Pages that employees keep open and refresh answer 304 Not Modified,
+# without running the view, while nothing they show has changed. A
+# validator returns (parts, last_modified) for the page, or None to always
+# render it. The ETag hashes the parts together with the user and their
+# CSRF cookie, since both end up in the HTML. Responses are marked private
+# and no-cache so browsers revalidate on every load instead of inventing
+# a freshness lifetime from Last-Modified.
+#
+# Django's condition() decorator calls its functions synchronously, which
+# async views cannot do with the ORM; this one awaits an async validator
+# for them, so the page loaders run on the event loop like the views do.
+
+
+def make_etag(request, parts):
+    user = getattr(request, 'user', None)
+    raw = '|'.join(str(part) for part in (
+        getattr(user, 'pk', None), request.COOKIES.get(settings.CSRF_COOKIE_NAME, ''), *parts,
+    ))
+    return quote_etag(hashlib.md5(raw.encode()).hexdigest())
+
+
+def _should_validate(request):
+    if request.method not in ('GET', 'HEAD'):
+        return False
+    # Queued messages are shown once, by rendering the page. The session is
+    # already loaded by login_required, so this does no I/O on async paths.
+    return not len(messages.get_messages(request))
+
+
+def _etag(request, result):
+    if result is None:
+        return None, None
+    parts, last_modified = result
+    return make_etag(request, parts), last_modified
+
+
+def _validate(validator, request, args, kwargs):
+    if not _should_validate(request):
+        return None, None
+    return _etag(request, validator(request, *args, **kwargs))
+
+
+async def _avalidate(validator, request, args, kwargs):
+    if not _should_validate(request):
+        return None, None
+    return _etag(request, await validator(request, *args, **kwargs))
+
+
+def _not_modified(request, etag, last_modified):
+    if etag is None:
+        return None
+    return get_conditional_response(
+        request, etag=etag, last_modified=int(last_modified.timestamp()) if last_modified else None,
+    )
+
+
+def _finish(response, etag, last_modified):
+    if etag is not None and response.status_code in (200, 304):
+        response.headers.setdefault('ETag', etag)
+        if last_modified:
+            response.headers.setdefault('Last-Modified', http_date(last_modified.timestamp()))
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def conditional(validator):
+    """
+    Answer GETs with 304 Not Modified when ``validator(request, *args, **kwargs)``
+    says nothing changed. Async views take an async validator.
+    """
+    def decorator(view):
+        if iscoroutinefunction(view):
+            if not iscoroutinefunction(validator):
+                raise TypeError(f'{view.__name__} is async and needs an async validator')
+
+            @wraps(view)
+            async def wrapper(request, *args, **kwargs):
+                etag, last_modified = await _avalidate(validator, request, args, kwargs)
+                response = _not_modified(request, etag, last_modified)
+                if response is None:
+                    response = await view(request, *args, **kwargs)
+                return _finish(response, etag, last_modified)
+            return wrapper
+
+        if iscoroutinefunction(validator):
+            raise TypeError(f'{view.__name__} is sync and needs a sync validator')
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            etag, last_modified = _validate(validator, request, args, kwargs)
+            response = _not_modified(request, etag, last_modified)
+            if response is None:
+                response = view(request, *args, **kwargs)
+            return _finish(response, etag, last_modified)
+        return wrapper
+    return decorator
+
+
+# -------------------------------
+# Validators
+# -------------------------------
+
+def _complaint_parts(pk, updated_at, versions):
+    return (pk, updated_at.timestamp(), sorted(versions.items())), updated_at
+
+
+def complaint_validator(request, pk):
+    """A complaint page: its updated_at (remarks touch it too) and the names it shows."""
+    updated_at = Complaint.objects.filter(pk=pk).values_list('updated_at', flat=True).first()
+    if updated_at is None:
+        return None
+    return _complaint_parts(pk, updated_at, caching.get_versions(*caching.ROW_NAMESPACES))
+
+
+async def acomplaint_validator(request, pk):
+    """Async version of complaint_validator()."""
+    updated_at = await Complaint.objects.filter(pk=pk).values_list('updated_at', flat=True).afirst()
+    if updated_at is None:
+        return None
+    return _complaint_parts(pk, updated_at, await caching.aget_versions(*caching.ROW_NAMESPACES))
+
+
+def _page_parts(page, versions):
+    rows = [(complaint.pk, complaint.updated_at.timestamp()) for complaint in page]
+    return (rows, page.next_cursor, sorted(versions.items())), None
+
+
+def page_validator(load_page):
+    """
+    A list page: the (id, updated_at) of the rows ``load_page(request)``
+    returns, its next cursor and the names its rows show. The page comes
+    from the same cache entry the view then renders, so this costs no
+    queries while the page is cached. An async ``load_page`` makes an async
+    validator.
+    """
+    if iscoroutinefunction(load_page):
+        async def avalidator(request, *args, **kwargs):
+            page = await load_page(request)
+            if page is None:
+                return None
+            return _page_parts(page, await caching.aget_versions(*caching.ROW_NAMESPACES))
+        return avalidator
+
+    def validator(request, *args, **kwargs):
+        page = load_page(request)
+        if page is None:
+            return None
+        return _page_parts(page, caching.get_versions(*caching.ROW_NAMESPACES))
+    return validator
@@ -0,0 +1,137 @@
+from django.apps import apps as global_apps
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Count, F
+
+# -------------------------------
+# Dashboard counters
+# -------------------------------
+# Every number shown on the admin and employee dashboards lives in one row of
+# DashboardCounter and is adjusted in the same transaction as the write that
+# changes it. Dashboards then read a handful of rows by primary key instead of
+# running COUNT(*) over whole tables.
+
+TOTAL_EMPLOYEES = 'employees'
+TOTAL_CUSTOMERS = 'customers'
+TOTAL_PRODUCTS = 'products'
+TOTAL_COMPLAINTS = 'complaints'
+UNASSIGNED = 'complaints:unassigned'
+# Complaints moved to the archive (complaints.archive); the other complaint
+# counters describe the active table only
+ARCHIVED = 'complaints:archived'
+
+
+def status_key(status):
+    return f'complaints:status:{status}'
+
+
+def assigned_key(employee_id):
+    return f'complaints:assigned:{employee_id}'
+
+
+def complaint_keys(status, assigned_to_id):
+    """Counter keys a single complaint in the given state contributes to."""
+    keys = [TOTAL_COMPLAINTS, status_key(status)]
+    keys.append(assigned_key(assigned_to_id) if assigned_to_id else UNASSIGNED)
+    return keys
+
+
+def _counter_model():
+    return global_apps.get_model('complaints', 'DashboardCounter')
+
+
+def adjust(deltas):
+    """Apply ``{key: delta}`` atomically, creating missing counters."""
+    DashboardCounter = _counter_model()
+    with transaction.atomic():
+        # Lock rows in key order: opposite transitions (Pending -> Closed and
+        # back, assign and unassign) touch the same rows and would otherwise
+        # take their locks in reverse order and deadlock
+        for key in sorted(deltas):
+            delta = deltas[key]
+            if not delta:
+                continue  # no lock for a counter that does not change
+            updated = DashboardCounter.objects.filter(key=key).update(value=F('value') + delta)
+            if updated:
+                continue
+            try:
+                with transaction.atomic():
+                    DashboardCounter.objects.create(key=key, value=delta)
+            except IntegrityError:
+                # Another transaction created the row first
+                DashboardCounter.objects.filter(key=key).update(value=F('value') + delta)
+
+
+def complaint_state_changed(old_state, new_state):
+    """
+    Adjust counters for a complaint moving from ``old_state`` to ``new_state``.
+
+    States are ``(status, assigned_to_id)`` tuples, or None for a complaint
+    that did not exist before / no longer exists.
+    """
+    deltas = {}
+    if old_state is not None:
+        for key in complaint_keys(*old_state):
+            deltas[key] = deltas.get(key, 0) - 1
+    if new_state is not None:
+        for key in complaint_keys(*new_state):
+            deltas[key] = deltas.get(key, 0) + 1
+    adjust(deltas)
+
+
+def get_counts(*keys):
+    """Read several counters in one query; missing counters read as zero."""
+    DashboardCounter = _counter_model()
+    values = dict(DashboardCounter.objects.filter(key__in=keys).values_list('key', 'value'))
+    return {key: values.get(key, 0) for key in keys}
+
+
+async def aget_counts(*keys):
+    """Async version of get_counts()."""
+    DashboardCounter = _counter_model()
+    values = {key: value async for key, value in DashboardCounter.objects.filter(key__in=keys).values_list('key', 'value')}
+    return {key: values.get(key, 0) for key in keys}
+
+
+def compute_counts(apps=global_apps):
+    """Recompute every counter from the source tables with grouped aggregates."""
+    Employee = apps.get_model('complaints', 'Employee')
+    Customer = apps.get_model('complaints', 'Customer')
+    Product = apps.get_model('complaints', 'Product')
+    Complaint = apps.get_model('complaints', 'Complaint')
+
+    counts = {
+        TOTAL_EMPLOYEES: Employee.objects.count(),
+        TOTAL_CUSTOMERS: Customer.objects.count(),
+        TOTAL_PRODUCTS: Product.objects.count(),
+        TOTAL_COMPLAINTS: 0,
+        UNASSIGNED: 0,
+    }
+    for row in Complaint.objects.values('status').annotate(n=Count('id')).order_by():
+        counts[status_key(row['status'])] = row['n']
+        counts[TOTAL_COMPLAINTS] += row['n']
+    for row in Complaint.objects.values('assigned_to').annotate(n=Count('id')).order_by():
+        if row['assigned_to'] is None:
+            counts[UNASSIGNED] = row['n']
+        else:
+            counts[assigned_key(row['assigned_to'])] = row['n']
+    try:
+        counts[ARCHIVED] = apps.get_model('complaints', 'ArchivedComplaint').objects.count()
+    except LookupError:
+        pass  # migrations older than the archive
+    return counts
+
+
+def rebuild(apps=global_apps):
+    """Replace all counters with freshly computed values; returns the new counts."""
+    DashboardCounter = apps.get_model('complaints', 'DashboardCounter')
+    with transaction.atomic():
+        if connection.vendor == 'postgresql':
+            # Hold off concurrent counter updates until the new values commit
+            with connection.cursor() as cursor:
+                cursor.execute(f'LOCK TABLE {DashboardCounter._meta.db_table} IN EXCLUSIVE MODE')
+        counts = compute_counts(apps)
+        DashboardCounter.objects.all().delete()
+        DashboardCounter.objects.bulk_create(
+            DashboardCounter(key=key, value=value) for key, value in counts.items()
+        )
+    return counts
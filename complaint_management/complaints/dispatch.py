@@ -0,0 +1,260 @@
+import heapq
+import math
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import Avg, BigIntegerField, Case, Count, Value, When
+from django.utils import timezone
+
+from . import bulk, events, geo
+from .models import Employee, Complaint
+
+# -------------------------------
+# Automatic dispatch
+# -------------------------------
+# Unassigned complaints are handed out most urgent level first, oldest first.
+# Each one goes to the employee with the lowest score, where
+#
+#     score = load_weight * open_complaints / max_open
+#           + distance_weight * level_factor * min(distance_km / distance_scale, 3)
+#
+# The employee's position is the centroid of the complaints they were given
+# recently. Workloads and positions come from two grouped queries; candidate
+# employees for a located complaint come from a coarse grid around it, so
+# scoring stays O(candidates) per complaint rather than O(employees).
+
+LEVEL_ORDER = ('Level 3', 'Level 2', 'Level 1')
+LEVEL_FACTOR = {'Level 3': 2.0, 'Level 2': 1.5, 'Level 1': 1.0}
+EMPLOYEE_GRID_DEGREES = 0.5
+MAX_GRID_RINGS = 20  # ~10 degrees; past that every located employee is a candidate
+
+
+@dataclass
+class DispatchConfig:
+    max_open: int = 20
+    load_weight: float = 1.0
+    distance_weight: float = 1.0
+    distance_scale_km: float = 25.0
+    recent_days: int = 30
+    candidates: int = 8
+    batch_size: int = 1000
+
+
+@dataclass
+class Worker:
+    employee_id: int
+    open_count: int = 0
+    lat: float = None
+    lng: float = None
+
+    @property
+    def located(self):
+        return self.lat is not None
+
+
+@dataclass
+class Result:
+    assigned: int = 0
+    skipped: int = 0
+    scored: int = 0
+    elapsed: float = 0.0
+    per_employee: dict = field(default_factory=dict)
+    distance_total: float = 0.0
+    distance_count: int = 0
+
+
+def load_workers(config):
+    """Workload and recent position of every employee, in two grouped queries."""
+    workers = {pk: Worker(pk) for pk in Employee.objects.values_list('id', flat=True)}
+
+    open_counts = (
+        Complaint.objects.filter(assigned_to__isnull=False).exclude(status='Closed')
+        .values('assigned_to').annotate(n=Count('id')).order_by()
+    )
+    for row in open_counts:
+        if row['assigned_to'] in workers:
+            workers[row['assigned_to']].open_count = row['n']
+
+    since = timezone.now() - timedelta(days=config.recent_days)
+    positions = (
+        Complaint.objects.filter(assigned_to__isnull=False, created_at__gte=since,
+                                 location_lat__isnull=False, location_lng__isnull=False)
+        .values('assigned_to').annotate(lat=Avg('location_lat'), lng=Avg('location_lng')).order_by()
+    )
+    for row in positions:
+        if row['assigned_to'] in workers:
+            workers[row['assigned_to']].lat = row['lat']
+            workers[row['assigned_to']].lng = row['lng']
+    return workers
+
+
+class Dispatcher:
+    def __init__(self, config=None):
+        self.config = config or DispatchConfig()
+        self.workers = load_workers(self.config)
+        self.located = [w for w in self.workers.values() if w.located]
+        self.grid = {}
+        for worker in self.located:
+            self.grid.setdefault(self._grid_cell(worker.lat, worker.lng), []).append(worker)
+        # Least-loaded heap, used for complaints without a location and for
+        # employees without a recent position
+        self.by_load = [(w.open_count, w.employee_id) for w in self.workers.values()]
+        heapq.heapify(self.by_load)
+
+    @staticmethod
+    def _grid_cell(lat, lng):
+        return (math.floor(lat / EMPLOYEE_GRID_DEGREES), math.floor(lng / EMPLOYEE_GRID_DEGREES))
+
+    def _least_loaded(self, count):
+        picked = []
+        while self.by_load and len(picked) < count:
+            load, pk = heapq.heappop(self.by_load)
+            worker = self.workers[pk]
+            if load != worker.open_count:
+                continue  # stale heap entry
+            picked.append(worker)
+        for worker in picked:
+            heapq.heappush(self.by_load, (worker.open_count, worker.employee_id))
+        return [w for w in picked if w.open_count < self.config.max_open]
+
+    @staticmethod
+    def _ring(row, col, ring):
+        if ring == 0:
+            yield row, col
+            return
+        for c in range(col - ring, col + ring + 1):
+            yield row - ring, c
+            yield row + ring, c
+        for r in range(row - ring + 1, row + ring):
+            yield r, col - ring
+            yield r, col + ring
+
+    def _nearby(self, lat, lng):
+        """Located employees with spare capacity from grid rings around (lat, lng), nearest first."""
+        found = []
+        row, col = self._grid_cell(lat, lng)
+        for ring in range(MAX_GRID_RINGS + 1):
+            for cell in self._ring(row, col, ring):
+                found.extend(w for w in self.grid.get(cell, ()) if w.open_count < self.config.max_open)
+            # One ring past the first hit catches closer employees across a cell edge
+            if len(found) >= self.config.candidates and ring > 0:
+                return found
+        return [w for w in self.located if w.open_count < self.config.max_open]
+
+    def score(self, worker, distance_km, level):
+        config = self.config
+        load = config.load_weight * worker.open_count / config.max_open
+        if distance_km is None:
+            # Unknown distance counts as "moderately far"
+            distance_km = config.distance_scale_km
+        distance = min(distance_km / config.distance_scale_km, 3.0)
+        return load + config.distance_weight * LEVEL_FACTOR.get(level, 1.0) * distance
+
+    def choose(self, complaint):
+        """Pick the best employee for one complaint; returns (worker, distance_km) or (None, None)."""
+        lat, lng = complaint['location_lat'], complaint['location_lng']
+        candidates = self._least_loaded(self.config.candidates)
+        if lat is not None and lng is not None and self.located:
+            candidates = self._nearby(lat, lng) + candidates
+
+        best, best_score, best_distance = None, None, None
+        for worker in candidates:
+            distance = None
+            if worker.located and lat is not None and lng is not None:
+                distance = geo.haversine_km(lat, lng, worker.lat, worker.lng)
+            score = self.score(worker, distance, complaint['complaint_level'])
+            if best_score is None or score < best_score:
+                best, best_score, best_distance = worker, score, distance
+        return best, best_distance
+
+    def plan_batch(self, complaints, result):
+        plan = {}
+        for complaint in complaints:
+            result.scored += 1
+            worker, distance = self.choose(complaint)
+            if worker is None:
+                result.skipped += 1
+                continue
+            plan.setdefault(worker.employee_id, []).append(complaint['id'])
+            worker.open_count += 1
+            heapq.heappush(self.by_load, (worker.open_count, worker.employee_id))
+            if distance is not None:
+                result.distance_total += distance
+                result.distance_count += 1
+        return plan
+
+    def commit_batch(self, plan):
+        """
+        Write one batch of assignments with a single UPDATE and read the
+        outcome back with a single SELECT; returns the (complaint id,
+        employee id) pairs that were actually assigned.
+        """
+        planned = {pk: employee_id for employee_id, ids in plan.items() for pk in ids}
+        if not planned:
+            return []
+        assignee = Case(
+            *(When(pk__in=ids, then=Value(employee_id)) for employee_id, ids in plan.items()),
+            output_field=BigIntegerField(),
+        )
+        with transaction.atomic():
+            # Guarded so complaints claimed by hand in the meantime are left alone
+            Complaint.objects.filter(pk__in=planned, assigned_to__isnull=True).update(
+                assigned_to_id=assignee, updated_at=timezone.now())
+            changes = [
+                (pk, (status, None), (status, assigned_to_id))
+                for pk, status, assigned_to_id in
+                Complaint.objects.filter(pk__in=planned).values_list('id', 'status', 'assigned_to_id')
+                if assigned_to_id == planned[pk]
+            ]
+            bulk.complaints_changed((old, new) for _, old, new in changes)
+            events.record_changes(changes)
+        return [(pk, new[1]) for pk, _, new in changes]
+
+    def release(self, plan, committed):
+        """Give back the capacity plan_batch() reserved for rows that were claimed by hand meanwhile."""
+        skipped = Counter(employee_id for employee_id, ids in plan.items() for _ in ids)
+        skipped.subtract(employee_id for _, employee_id in committed)
+        for employee_id, count in skipped.items():
+            if count:
+                worker = self.workers[employee_id]
+                worker.open_count -= count
+                heapq.heappush(self.by_load, (worker.open_count, worker.employee_id))
+
+    def run(self, dry_run=False, limit=None, progress=None):
+        started = timezone.now()
+        result = Result()
+        fields = ('id', 'complaint_level', 'location_lat', 'location_lng')
+        skip_locked = connection.features.has_select_for_update_skip_locked and not dry_run
+
+        for level in LEVEL_ORDER:
+            last_id = 0
+            while limit is None or result.scored < limit:
+                size = self.config.batch_size if limit is None else min(self.config.batch_size, limit - result.scored)
+                with transaction.atomic():
+                    batch = Complaint.objects.filter(
+                        complaint_level=level, assigned_to__isnull=True, id__gt=last_id,
+                    ).order_by('id')
+                    if skip_locked:
+                        # Leave rows that a concurrent claimer is holding
+                        batch = batch.select_for_update(skip_locked=True)
+                    batch = list(batch.values(*fields)[:size])
+                    if not batch:
+                        break
+                    last_id = batch[-1]['id']
+                    plan = self.plan_batch(batch, result)
+                    if dry_run:
+                        committed = [(pk, employee_id) for employee_id, ids in plan.items() for pk in ids]
+                    else:
+                        committed = self.commit_batch(plan)
+                        self.release(plan, committed)
+
+                result.assigned += len(committed)
+                for _, employee_id in committed:
+                    result.per_employee[employee_id] = result.per_employee.get(employee_id, 0) + 1
+                if progress:
+                    progress(result)
+
+        result.elapsed = (timezone.now() - started).total_seconds()
+        return result
@@ -0,0 +1,185 @@
+from datetime import datetime, timezone as dt_timezone
+
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import ComplaintEvent
+
+# -------------------------------
+# Complaint event log
+# -------------------------------
+# Every place that changes a complaint's status or assignee records what
+# changed in ComplaintEvent inside its own transaction, so the log and the
+# row can never disagree. States are the (status, assigned_to_id) pairs the
+# dashboard counters use (Complaint.counter_state()); an old state of None
+# means the complaint was just created. New remarks are logged too, from a
+# ComplaintRemark post_save signal.
+#
+# Readers only touch the event table: "everything about complaint X" is
+# served by (complaint_id, occurred_at, id), "everything in window Y" by
+# (occurred_at, id) and, on PostgreSQL, by pruning monthly partitions.
+
+TABLE = ComplaintEvent._meta.db_table
+DEFAULT_PARTITION = f'{TABLE}_default'
+PARTITION_MONTHS_AHEAD = 3
+
+
+def _value(value):
+    return None if value is None else str(value)
+
+
+def _events(complaint_id, old_state, new_state, actor_id, at):
+    status, assignee = new_state
+    if old_state is None:
+        yield ComplaintEvent(complaint_id=complaint_id, kind=ComplaintEvent.CREATED,
+                             new_value=status, actor_id=actor_id, occurred_at=at)
+        old_status, old_assignee = status, None
+    else:
+        old_status, old_assignee = old_state
+    if old_status != status:
+        yield ComplaintEvent(complaint_id=complaint_id, kind=ComplaintEvent.STATUS,
+                             old_value=old_status, new_value=status, actor_id=actor_id, occurred_at=at)
+    if old_assignee != assignee:
+        yield ComplaintEvent(complaint_id=complaint_id, kind=ComplaintEvent.ASSIGNED,
+                             old_value=_value(old_assignee), new_value=_value(assignee),
+                             actor_id=actor_id, occurred_at=at)
+
+
+def record_changes(changes, actor=None):
+    """
+    Log ``changes``, an iterable of (complaint_id, old_state, new_state), in
+    one INSERT. ``actor`` is the user who made them (None for the system).
+    Call inside the transaction that makes the changes.
+    """
+    at = timezone.now()
+    actor_id = getattr(actor, 'pk', actor)
+    rows = [
+        event
+        for complaint_id, old_state, new_state in changes
+        for event in _events(complaint_id, old_state, new_state, actor_id, at)
+    ]
+    if rows:
+        ComplaintEvent.objects.bulk_create(rows)
+    return len(rows)
+
+
+def record_change(complaint_id, old_state, new_state, actor=None):
+    """Log a single change; see record_changes()."""
+    return record_changes([(complaint_id, old_state, new_state)], actor)
+
+
+def record_remark(complaint_id, remark_id, actor=None):
+    """Log remark ``remark_id`` being added to a complaint."""
+    ComplaintEvent.objects.create(
+        complaint_id=complaint_id, kind=ComplaintEvent.REMARK, new_value=str(remark_id),
+        actor_id=getattr(actor, 'pk', actor),
+    )
+
+
+# -------------------------------
+# Readers
+# -------------------------------
+
+def for_complaint(complaint_id, since=None):
+    """A complaint's events, oldest first. ``since`` lets PostgreSQL skip older partitions."""
+    events = ComplaintEvent.objects.filter(complaint_id=complaint_id)
+    if since is not None:
+        events = events.filter(occurred_at__gte=since)
+    return events.order_by('occurred_at', 'id')
+
+
+def for_complaints(complaint_ids):
+    """``{complaint_id: [events, oldest first]}`` for many complaints in one query."""
+    history = {pk: [] for pk in complaint_ids}
+    events = ComplaintEvent.objects.filter(complaint_id__in=list(history)).order_by('complaint_id', 'occurred_at', 'id')
+    for event in events:
+        history[event.complaint_id].append(event)
+    return history
+
+
+def in_window(start, end, kinds=None):
+    """Events with ``start <= occurred_at < end``, in time order."""
+    events = ComplaintEvent.objects.filter(occurred_at__gte=start, occurred_at__lt=end)
+    if kinds:
+        events = events.filter(kind__in=kinds)
+    return events.order_by('occurred_at', 'id')
+
+
+def iter_window(start, end, kinds=None, batch_size=5000):
+    """
+    Stream a window as (id, complaint_id, kind, old_value, new_value,
+    actor_id, occurred_at) tuples in keyset-paginated batches, so exports
+    and rollups over millions of events run in constant memory.
+    """
+    fields = ('id', 'complaint_id', 'kind', 'old_value', 'new_value', 'actor_id', 'occurred_at')
+    events = in_window(start, end, kinds).values_list(*fields)
+    batch = list(events[:batch_size])
+    while batch:
+        yield from batch
+        last_id, last_at = batch[-1][0], batch[-1][-1]
+        after = Q(occurred_at__gt=last_at) | Q(occurred_at=last_at, id__gt=last_id)
+        batch = list(events.filter(after)[:batch_size])
+
+
+# -------------------------------
+# Monthly partitions (PostgreSQL)
+# -------------------------------
+# Migration 0008 creates the table partitioned by RANGE (occurred_at) with a
+# DEFAULT partition, so an insert never fails for want of a partition.
+# ensure_partitions() adds the monthly partitions ahead of time (run
+# "manage.py event_partitions" from cron); rows that already landed in the
+# default partition for a new month are moved into it.
+
+def month_start(moment):
+    return datetime(moment.year, moment.month, 1, tzinfo=dt_timezone.utc)
+
+
+def next_month(start):
+    return datetime(start.year + start.month // 12, start.month % 12 + 1, 1, tzinfo=dt_timezone.utc)
+
+
+def partition_name(start):
+    return f'{TABLE}_y{start.year}m{start.month:02d}'
+
+
+def partitions(using=None):
+    """Names of the event table's partitions, or [] when it is not partitioned."""
+    using = using or connection
+    if using.vendor != 'postgresql':
+        return []
+    with using.cursor() as cursor:
+        cursor.execute(
+            'SELECT child.relname FROM pg_inherits '
+            'JOIN pg_class parent ON parent.oid = pg_inherits.inhparent '
+            'JOIN pg_class child ON child.oid = pg_inherits.inhrelid '
+            'WHERE parent.relname = %s ORDER BY child.relname',
+            [TABLE],
+        )
+        return [name for (name,) in cursor.fetchall()]
+
+
+def ensure_partitions(months_ahead=PARTITION_MONTHS_AHEAD, start=None, using=None):
+    """Create monthly partitions from ``start``'s month through ``months_ahead`` more; returns the new names."""
+    using = using or connection
+    if using.vendor != 'postgresql':
+        return []
+    existing = set(partitions(using))
+    created = []
+    low = month_start(start or timezone.now())
+    for _ in range(months_ahead + 1):
+        high = next_month(low)
+        name = partition_name(low)
+        if name not in existing:
+            bounds = f"FROM ('{low.isoformat()}') TO ('{high.isoformat()}')"
+            with transaction.atomic(using=using.alias), using.cursor() as cursor:
+                # Attaching scans the default partition for rows in the new range,
+                # so those are moved out first
+                cursor.execute(f'CREATE TABLE {name} (LIKE {TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)')
+                where = 'occurred_at >= %s AND occurred_at < %s'
+                cursor.execute(f'INSERT INTO {name} SELECT * FROM {DEFAULT_PARTITION} WHERE {where}', [low, high])
+                cursor.execute(f'DELETE FROM {DEFAULT_PARTITION} WHERE {where}', [low, high])
+                cursor.execute(f'ALTER TABLE {TABLE} ATTACH PARTITION {name} FOR VALUES {bounds}')
+            created.append(name)
+        low = high
+    return created
@@ -0,0 +1,280 @@
+import asyncio
+import json
+import logging
+from collections import deque
+from datetime import datetime, timedelta, timezone as dt_timezone
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+from . import caching, events
+from .models import Complaint, ComplaintEvent
+
+logger = logging.getLogger(__name__)
+
+# -------------------------------
+# Live complaint feed
+# -------------------------------
+# The list pages keep a Server-Sent Events connection open
+# (async_views.complaint_feed, ASGI profile only). Every process with open
+# connections runs one pump task: once per FEED_POLL_SECONDS it reads the
+# complaint event log (events.py) for rows it has not delivered yet, loads
+# those complaints once and renders their list rows through the fragment
+# cache, then offers each event to every connection's bounded queue. The
+# database is read once per tick per process however many pages are open;
+# an idle connection is a parked coroutine and an empty queue, holding no
+# database connection.
+#
+# Events can commit out of occurred_at order, so every poll re-reads the
+# last FEED_LOOKBACK_SECONDS and skips the event ids already delivered.
+# A reconnecting browser sends the Last-Event-ID it saw; what it missed is
+# replayed from the pump's backlog, or from the log if the pump was not
+# running yet. A connection that cannot catch up is told to reload.
+
+TYPES = {
+    ComplaintEvent.CREATED: 'created',
+    ComplaintEvent.STATUS: 'status',
+    ComplaintEvent.ASSIGNED: 'assigned',
+    ComplaintEvent.REMARK: 'remark',
+}
+# List a row belongs to: template it is rendered with
+ROW_TEMPLATES = {
+    'admin': 'partials/complaint_row_admin.html',
+    'assigned': 'partials/complaint_row_assigned.html',
+    'unassigned': 'partials/complaint_row_unassigned.html',
+}
+QUEUE_SIZE = 100  # messages a slow connection may fall behind before it is reset
+BACKLOG_SIZE = 2000  # recent events kept for reconnecting browsers
+CATCH_UP_LIMIT = 500  # missed events replayed from the log before a reset is cheaper
+HEARTBEAT_SECONDS = 20
+RETRY_MS = 3000
+RESET = 'event: reset\ndata: {}\n\n'
+
+
+def _employee(value):
+    return None if value is None else int(value)
+
+
+def _millis(moment):
+    return int(moment.timestamp() * 1000)
+
+
+def parse_since(value, seconds=False):
+    """The time in a Last-Event-ID ("<event id>:<ms>") or a ``since`` parameter (epoch seconds)."""
+    try:
+        stamp = int(value.rsplit(':', 1)[-1]) / (1 if seconds else 1000)
+        return datetime.fromtimestamp(stamp, dt_timezone.utc)
+    except (AttributeError, ValueError, OverflowError, OSError):
+        return None
+
+
+class FeedEvent:
+    """A logged event with its complaint's current state and list rows."""
+    __slots__ = ('id', 'complaint_id', 'type', 'previous', 'occurred_at', 'status', 'assigned_to', 'rows', 'messages')
+
+    def __init__(self, row, complaint, rows):
+        event_id, self.complaint_id, kind, old_value, new_value, _, self.occurred_at = row
+        self.id = event_id
+        self.type = TYPES.get(kind, 'changed')
+        self.previous = _employee(old_value) if kind == ComplaintEvent.ASSIGNED else None
+        self.status = complaint.status
+        self.assigned_to = complaint.assigned_to_id
+        self.rows = rows
+        self.messages = {}
+
+    def message(self, target):
+        """The SSE message for a subscriber whose list ``target`` this complaint now belongs to ('' for none)."""
+        message = self.messages.get(target)
+        if message is None:
+            data = {
+                'type': self.type,
+                'complaint': self.complaint_id,
+                'status': self.status,
+                'assigned_to': self.assigned_to,
+                'list': target or None,
+                'row': self.rows.get(target),
+            }
+            message = self.messages[target] = (
+                f'id: {self.id}:{_millis(self.occurred_at)}\nevent: complaint\n'
+                f'data: {json.dumps(data, separators=(",", ":"))}\n\n'
+            )
+        return message
+
+
+class Subscriber:
+    """One open connection: admins see every event, employees those touching their queue or the unassigned list."""
+
+    def __init__(self, admin, employee_id):
+        self.admin = admin
+        self.employee_id = employee_id
+        self.queue = asyncio.Queue(QUEUE_SIZE)
+
+    def target(self, event):
+        """The list ``event``'s complaint belongs to for this subscriber, '' if it just left theirs, None if not theirs."""
+        if self.admin:
+            return 'admin'
+        if event.assigned_to is None:
+            return 'unassigned'
+        if event.assigned_to == self.employee_id:
+            return 'assigned'
+        if event.type == 'assigned' and event.previous in (None, self.employee_id):
+            return ''
+        return None
+
+    def offer(self, event):
+        target = self.target(event)
+        if target is None:
+            return
+        try:
+            self.queue.put_nowait(event.message(target))
+        except asyncio.QueueFull:
+            # Too far behind to catch up event by event: the page reloads instead
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESET)
+
+
+def _load(start, seen, limit=None):
+    """
+    FeedEvents logged since ``start`` whose ids are not in ``seen``, in log
+    order, or None when there are more than ``limit`` of them; that is found
+    out from limit + 1 log rows, before any complaint is loaded or rendered.
+    Runs in a worker thread, outside any request.
+    """
+    try:
+        end = timezone.now() + timedelta(days=1)
+        if limit is None:
+            window = events.iter_window(start, end)
+        else:
+            window = events.iter_window(start, end, batch_size=limit + 1)
+        rows = list(islice((row for row in window if row[0] not in seen), None if limit is None else limit + 1))
+        if limit is not None and len(rows) > limit:
+            return None
+        if not rows:
+            return []
+        complaints = list(
+            Complaint.objects.filter(pk__in={row[1] for row in rows}).select_related('customer', 'product', 'assigned_to__user')
+        )
+        markup = {
+            target: dict(zip((complaint.pk for complaint in complaints), caching.render_rows(template, complaints)))
+            for target, template in ROW_TEMPLATES.items()
+        }
+        by_id = {complaint.pk: complaint for complaint in complaints}
+        return [
+            # Complaints deleted or archived since have no rows to show
+            FeedEvent(row, by_id[row[1]], {target: markup[target][row[1]] for target in markup})
+            for row in rows if row[1] in by_id
+        ]
+    finally:
+        close_old_connections()
+
+
+aload = sync_to_async(_load)
+
+
+class Broker:
+    """Per-process fan-out from the event log to the open connections."""
+
+    def __init__(self):
+        self.subscribers = set()
+        self.backlog = deque(maxlen=BACKLOG_SIZE)
+        self.seen = {}  # event id -> occurred_at, inside the look-back window
+        self.covered_since = None  # events from here on are in seen/backlog
+        self.task = None
+
+    def subscribe(self, subscriber):
+        self.subscribers.add(subscriber)
+        loop = asyncio.get_running_loop()
+        if self.task is None or self.task.done() or self.task.get_loop() is not loop:
+            self.task = loop.create_task(self.pump())
+
+    def unsubscribe(self, subscriber):
+        self.subscribers.discard(subscriber)
+
+    async def replay(self, subscriber, since, strict):
+        """
+        Messages for what ``subscriber`` missed since ``since``. None means
+        it cannot be replayed and, when ``strict``, the page must reload.
+        """
+        start = since - timedelta(seconds=settings.FEED_LOOKBACK_SECONDS)
+        covered = (
+            self.covered_since is not None and start >= self.covered_since
+            and (len(self.backlog) < BACKLOG_SIZE or self.backlog[0].occurred_at <= start)
+        )
+        if covered:
+            missed = [event for event in self.backlog if event.occurred_at >= start]
+        elif timezone.now() - since > timedelta(seconds=settings.FEED_MAX_SECONDS * 2):
+            return None if strict else []
+        else:
+            missed = await aload(start, set(), CATCH_UP_LIMIT)
+            if missed is None:
+                return None if strict else []
+        messages = []
+        for event in missed:
+            target = subscriber.target(event)
+            if target is not None:
+                messages.append(event.message(target))
+        return messages
+
+    async def pump(self):
+        lookback = timedelta(seconds=settings.FEED_LOOKBACK_SECONDS)
+        polled_at = timezone.now()
+        # Anything older than this may have been missed while the pump was stopped
+        self.covered_since = polled_at - lookback
+        self.backlog.clear()
+        self.seen.clear()
+        while self.subscribers:
+            start, polled_at = polled_at - lookback, timezone.now()
+            try:
+                new = await aload(start, set(self.seen))
+            except Exception:
+                logger.exception('Complaint feed poll failed')
+                new = []
+            for event in new:
+                self.seen[event.id] = event.occurred_at
+                self.backlog.append(event)
+                for subscriber in list(self.subscribers):
+                    subscriber.offer(event)
+            self.seen = {pk: at for pk, at in self.seen.items() if at >= start}
+            await asyncio.sleep(settings.FEED_POLL_SECONDS)
+        self.covered_since = None
+
+
+broker = Broker()
+
+
+async def stream(subscriber, since, strict, seconds):
+    """
+    The SSE body for one connection: missed events, then live ones for
+    ``seconds`` (the browser reconnects with Last-Event-ID afterwards).
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + seconds
+    if seconds > 0:
+        broker.subscribe(subscriber)
+    try:
+        yield f'retry: {RETRY_MS}\n\n'
+        replay = await broker.replay(subscriber, since, strict) if since else []
+        if replay is None:
+            yield RESET
+            return
+        for message in replay:
+            yield message
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return
+            try:
+                message = await asyncio.wait_for(subscriber.queue.get(), min(HEARTBEAT_SECONDS, remaining))
+            except asyncio.TimeoutError:
+                if loop.time() < deadline:
+                    yield ': ping\n\n'  # keeps proxies from closing an idle connection
+                continue
+            yield message
+            if message is RESET:
+                return
+    finally:
+        broker.unsubscribe(subscriber)
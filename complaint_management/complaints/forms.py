@@ -2,7 +2,28 @@ from django import forms
 from django.contrib.auth.forms import UserCreationForm
 from django.core.exceptions import ValidationError
 from django.core.validators import RegexValidator
+from django.template.loader import render_to_string
 from .models import User, Employee, Customer, Product, Complaint, ComplaintRemark
+from . import autocomplete
+
+class AutocompleteWidget(forms.Widget):
+    """A typeahead picker (partials/autocomplete_input.html); the choices are never rendered."""
+    def __init__(self, kind, placeholder='', attrs=None):
+        self.kind = kind
+        self.placeholder = placeholder
+        super().__init__(attrs)
+
+    def render(self, name, value, attrs=None, renderer=None):
+        attrs = self.build_attrs(self.attrs, attrs)
+        return render_to_string('partials/autocomplete_input.html', {
+            'kind': self.kind,
+            'name': name,
+            'value': value,
+            'label': autocomplete.label(self.kind, value) if value else '',
+            'input_id': attrs.get('id'),
+            'placeholder': self.placeholder,
+            'required': self.is_required,
+        })
 
 class LoginForm(forms.Form):
     username = forms.CharField(
@@ -150,8 +171,8 @@ class ComplaintForm(forms.ModelForm):
         model = Complaint
         fields = ['customer', 'product', 'complaint_level', 'description', 'location_lat', 'location_lng']
         widgets = {
-            'customer': forms.Select(attrs={'class': 'form-control'}),
-            'product': forms.Select(attrs={'class': 'form-control'}),
+            'customer': AutocompleteWidget('customers', placeholder='Type a customer name...'),
+            'product': AutocompleteWidget('products', placeholder='Type a product name...'),
             'complaint_level': forms.Select(attrs={'class': 'form-control'}),
             'description': forms.Textarea(attrs={'class': 'form-control', 'rows': 4}),
         }
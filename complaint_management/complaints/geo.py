@@ -0,0 +1,160 @@
+import math
+from functools import reduce
+from operator import or_
+
+from django.db.models import Q
+
+# -------------------------------
+# Grid cells and nearest-complaint lookup
+# -------------------------------
+# The globe is cut into fixed CELL_DEGREES x CELL_DEGREES cells and every
+# complaint with a location stores the integer id of its cell (indexed).
+# A "near me" lookup turns a search radius into the cell ranges that cover
+# its bounding box, fetches only those rows through the index,
+# prefilters on the exact bounding box and ranks the survivors by haversine
+# distance. The radius doubles until enough complaints are found.
+
+CELL_DEGREES = 0.05  # ~5.5 km north-south
+LNG_CELLS = int(round(360 / CELL_DEGREES))
+EARTH_RADIUS_KM = 6371.0088
+
+START_RADIUS_KM = 2.0
+MAX_RADIUS_KM = 200.0
+MAX_LIMIT = 100
+
+
+def _lat_index(lat):
+    return int(math.floor((min(max(lat, -90.0), 90.0) + 90.0) / CELL_DEGREES))
+
+
+def _lng_index(lng):
+    return int(math.floor(((lng + 180.0) % 360.0) / CELL_DEGREES)) % LNG_CELLS
+
+
+def cell_for(lat, lng):
+    if lat is None or lng is None:
+        return None
+    return _lat_index(float(lat)) * LNG_CELLS + _lng_index(float(lng))
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lng2 - lng1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def bounding_box(lat, lng, radius_km):
+    """Return (min_lat, max_lat, min_lng, max_lng); longitudes may cross +/-180."""
+    d_lat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    cos_lat = math.cos(math.radians(lat))
+    if cos_lat < 1e-6 or abs(lat) + d_lat >= 90:
+        return max(lat - d_lat, -90.0), min(lat + d_lat, 90.0), -180.0, 180.0
+    d_lng = min(180.0, math.degrees(radius_km / (EARTH_RADIUS_KM * cos_lat)))
+    return lat - d_lat, lat + d_lat, lng - d_lng, lng + d_lng
+
+
+def cell_ranges_for_box(min_lat, max_lat, min_lng, max_lng):
+    """
+    Cover a bounding box with inclusive (first_cell, last_cell) ranges.
+
+    Cells of one latitude row are numbered contiguously, so each row is a
+    single index range scan (two where the box crosses the antimeridian).
+    """
+    if max_lng - min_lng >= 360 - CELL_DEGREES:
+        lng_spans = [(0, LNG_CELLS - 1)]
+    else:
+        start = int(math.floor((min_lng + 180.0) / CELL_DEGREES))
+        end = int(math.floor((max_lng + 180.0) / CELL_DEGREES))
+        if start < 0:
+            lng_spans = [(start % LNG_CELLS, LNG_CELLS - 1), (0, end)]
+        elif end >= LNG_CELLS:
+            lng_spans = [(start, LNG_CELLS - 1), (0, end % LNG_CELLS)]
+        else:
+            lng_spans = [(start, end)]
+
+    ranges = []
+    for lat_i in range(_lat_index(min_lat), _lat_index(max_lat) + 1):
+        row = lat_i * LNG_CELLS
+        ranges.extend((row + first, row + last) for first, last in lng_spans)
+    return ranges
+
+
+def _in_lng_range(lng, min_lng, max_lng):
+    if min_lng >= -180 and max_lng <= 180:
+        return min_lng <= lng <= max_lng
+    # Box crosses the antimeridian; compare on the shifted circle
+    return min_lng <= lng <= max_lng or min_lng <= lng - 360 <= max_lng or min_lng <= lng + 360 <= max_lng
+
+
+def box_candidates(queryset, lat, lng, radius):
+    """Rows of ``queryset`` inside the bounding box of ``radius`` km, and the box's longitude range."""
+    min_lat, max_lat, min_lng, max_lng = bounding_box(lat, lng, radius)
+    cells = reduce(or_, (
+        Q(geo_cell__range=cell_range)
+        for cell_range in cell_ranges_for_box(min_lat, max_lat, min_lng, max_lng)
+    ))
+    candidates = queryset.filter(
+        cells,
+        location_lat__gte=min_lat,
+        location_lat__lte=max_lat,
+    )
+    if -180 <= min_lng and max_lng <= 180:
+        candidates = candidates.filter(location_lng__gte=min_lng, location_lng__lte=max_lng)
+    return candidates, (min_lng, max_lng)
+
+
+def _within(complaints, lat, lng, radius, lng_range):
+    found = []
+    for complaint in complaints:
+        if not _in_lng_range(complaint.location_lng, *lng_range):
+            continue
+        distance = haversine_km(lat, lng, complaint.location_lat, complaint.location_lng)
+        if distance <= radius:
+            complaint.distance_km = round(distance, 2)
+            found.append(complaint)
+    return found
+
+
+def _closest(found, limit):
+    found.sort(key=lambda c: (c.distance_km, -c.pk))
+    return found[:limit]
+
+
+def nearest(queryset, lat, lng, limit=10, max_radius_km=MAX_RADIUS_KM):
+    """
+    Return up to ``limit`` complaints from ``queryset`` ordered by distance
+    from (lat, lng). Each result carries a ``distance_km`` attribute.
+    """
+    limit = max(1, min(limit, MAX_LIMIT))
+    radius = START_RADIUS_KM
+    while True:
+        candidates, lng_range = box_candidates(queryset, lat, lng, radius)
+        found = _within(candidates, lat, lng, radius, lng_range)
+        if len(found) >= limit or radius >= max_radius_km:
+            return _closest(found, limit)
+        radius = min(radius * 2, max_radius_km)
+
+
+async def anearest(queryset, lat, lng, limit=10, max_radius_km=MAX_RADIUS_KM):
+    """Async version of nearest()."""
+    limit = max(1, min(limit, MAX_LIMIT))
+    radius = START_RADIUS_KM
+    while True:
+        candidates, lng_range = box_candidates(queryset, lat, lng, radius)
+        found = _within([c async for c in candidates], lat, lng, radius, lng_range)
+        if len(found) >= limit or radius >= max_radius_km:
+            return _closest(found, limit)
+        radius = min(radius * 2, max_radius_km)
+
+
+def parse_point(lat, lng):
+    """Validate a lat/lng pair from request parameters; returns floats or None."""
+    try:
+        lat, lng = float(lat), float(lng)
+    except (TypeError, ValueError):
+        return None
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        return None
+    return lat, lng
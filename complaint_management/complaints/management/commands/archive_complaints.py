@@ -0,0 +1,30 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from complaints import archive
+
+
+class Command(BaseCommand):
+    help = (
+        'Move complaints that have been Closed and untouched for ARCHIVE_AFTER_DAYS, with their '
+        'remarks, to the archive tables in batched transactions. Run it from cron, e.g. nightly'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.ARCHIVE_AFTER_DAYS,
+                            help='Archive complaints closed and unchanged for this many days')
+        parser.add_argument('--batch-size', type=int, default=archive.BATCH_SIZE, help='Complaints per transaction')
+        parser.add_argument('--limit', type=int, help='Stop after this many complaints')
+        parser.add_argument('--dry-run', action='store_true', help='Only count the candidates')
+
+    def handle(self, *args, **options):
+        days = max(0, options['days'])
+        if options['dry_run']:
+            count = archive.candidates(archive.cutoff(days)).count()
+            self.stdout.write(f'{count} complaint(s) closed for more than {days} days would be archived')
+            return
+
+        def progress(moved):
+            self.stdout.write(f'  {moved} archived')
+
+        moved = archive.archive(days, max(1, options['batch_size']), options['limit'], progress)
+        self.stdout.write(self.style.SUCCESS(f'Archived {moved} complaint(s) closed for more than {days} days'))
@@ -0,0 +1,144 @@
+import gzip
+import json
+import os
+from html.parser import HTMLParser
+from urllib.parse import urlsplit
+
+import brotli
+from django.conf import settings
+from django.core.management.base import CommandError
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from .benchmark_views import SCENARIOS, Command as BenchmarkViewsCommand
+
+# Full pages a browser navigates to (JSON endpoints and fragments are left out)
+PAGES = (
+    'login', 'admin_dashboard', 'complaint_list', 'complaint_detail', 'complaint_create', 'sla_analytics',
+    'employee_dashboard', 'assigned_complaints', 'unassigned_complaints', 'complaint_detail_employee',
+)
+ONE_YEAR = 365 * 24 * 3600
+
+
+class AssetLinks(HTMLParser):
+    """Collects the stylesheets, scripts and preloads a page asks the browser to fetch."""
+
+    def __init__(self):
+        super().__init__()
+        self.urls = []
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == 'script' and attrs.get('src'):
+            self.urls.append(attrs['src'])
+        elif tag == 'link' and attrs.get('href') and attrs.get('rel') in ('stylesheet', 'preload'):
+            self.urls.append(attrs['href'])
+
+
+def body(response):
+    if response.streaming:
+        content = b''.join(response.streaming_content)
+        response.close()
+        return content
+    return response.content
+
+
+def cached_for(response):
+    """Seconds a browser may reuse the response without asking again."""
+    for directive in response.get('Cache-Control', '').split(','):
+        name, _, value = directive.strip().partition('=')
+        if name == 'max-age' and value.isdigit():
+            return int(value)
+    return 0
+
+
+class Command(BenchmarkViewsCommand):
+    help = (
+        'Measure what each page costs to transfer: the HTML raw, gzipped and brotli-compressed, '
+        'and the static assets it references on a first visit and on a repeat visit'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--only', nargs='+', metavar='URL_NAME', help='Measure just these pages')
+        parser.add_argument('--output', help="Also write the numbers as JSON to this path, or '-' for stdout")
+
+    def asset(self, client, url):
+        """(bytes on the wire, encoding, seconds cacheable) for a local asset; None for other hosts."""
+        if urlsplit(url).netloc:
+            return None
+        response = client.get(url, HTTP_ACCEPT_ENCODING='br, gzip')
+        if response.status_code != 200:
+            raise CommandError(f'{url} answered {response.status_code}; run collectstatic with DEBUG off first')
+        return len(body(response)), response.get('Content-Encoding', 'identity'), cached_for(response)
+
+    def measure_page(self, name):
+        role, method, kwargs, data = SCENARIOS[name]
+        client = self.clients[role]
+        response = client.get(reverse(name, kwargs=self.fill(kwargs)), self.fill(data))
+        html = body(response)
+        links = AssetLinks()
+        links.feed(html.decode())
+
+        first = repeat = 0
+        external, assets = [], {}
+        for url in dict.fromkeys(links.urls):
+            sized = self.asset(client, url)
+            if sized is None:
+                external.append(url)
+                continue
+            size, encoding, max_age = sized
+            assets[url] = {'bytes': size, 'encoding': encoding, 'max_age': max_age}
+            first += size
+            if max_age < ONE_YEAR:
+                repeat += size  # worst case: the browser fetches it again
+        html_gzip = len(gzip.compress(html, 6))
+        return {
+            'status': response.status_code,
+            'html_bytes': len(html),
+            'html_gzip': html_gzip,
+            'html_brotli': len(brotli.compress(html, quality=5)),
+            'assets': assets,
+            'external': external,
+            # HTML gzipped, as a compressing proxy would send it
+            'first_visit_bytes': html_gzip + first,
+            'repeat_visit_bytes': html_gzip + repeat,
+            'requests': 1 + len(assets) + len(external),
+        }
+
+    def handle(self, *args, **options):
+        names = list(PAGES)
+        if options['only']:
+            unknown = set(options['only']) - set(names)
+            if unknown:
+                raise CommandError(f'Not a page: {", ".join(sorted(unknown))}; choose from {", ".join(PAGES)}')
+            names = [name for name in names if name in options['only']]
+        if not os.path.exists(os.path.join(settings.STATIC_ROOT, 'staticfiles.json')):
+            raise CommandError('No staticfiles manifest in STATIC_ROOT; run collectstatic with DEBUG off first')
+
+        # As in production: hashed asset URLs, and WhiteNoise serving STATIC_ROOT
+        storages = dict(settings.STORAGES, staticfiles=settings.MANIFEST_STATICFILES_STORAGE)
+        with override_settings(DEBUG=False, STORAGES=storages):
+            self.sample_objects()
+            self.clients = {role: self.client(role) for role in ('anon', 'admin', 'employee')}
+            pages = {name: self.measure_page(name) for name in names}
+
+        self.stdout.write(
+            f'{"page":<28}{"status":>7}{"html":>9}{"gzip":>8}{"br":>8}{"assets":>9}{"reqs":>6}'
+            f'{"first KiB":>11}{"repeat KiB":>12}{"external":>10}'
+        )
+        for name, row in pages.items():
+            self.stdout.write(
+                f'{name:<28}{row["status"]:>7}{row["html_bytes"]:>9}{row["html_gzip"]:>8}{row["html_brotli"]:>8}'
+                f'{len(row["assets"]):>9}{row["requests"]:>6}{row["first_visit_bytes"] / 1024:>11.1f}'
+                f'{row["repeat_visit_bytes"] / 1024:>12.1f}{len(row["external"]):>10}'
+            )
+        if any(row['external'] for row in pages.values()):
+            self.stdout.write('External assets are counted as requests but not sized.')
+
+        if options['output']:
+            output = json.dumps(pages, indent=2)
+            if options['output'] == '-':
+                self.stdout.write(output)
+            else:
+                with open(options['output'], 'w') as handle:
+                    handle.write(output + '\n')
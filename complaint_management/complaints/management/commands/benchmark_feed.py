@@ -0,0 +1,156 @@
+import asyncio
+import resource
+import time
+
+from django.core.management.base import CommandError
+from django.db import transaction
+from django.urls import reverse
+
+from complaints.models import Complaint, ComplaintEvent, ComplaintRemark, Employee
+
+from .benchmark_servers import Command as BenchmarkServersCommand, fetch, percentile
+
+
+def rss_kib(pid):
+    """Resident memory of process ``pid`` in KiB (Linux), or None."""
+    try:
+        with open(f'/proc/{pid}/status') as status:
+            for line in status:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+class Listener:
+    """One idle browser tab: an open feed connection that notes when the first complaint event arrives."""
+
+    def __init__(self, port, path, cookie):
+        self.port, self.path, self.cookie = port, path, cookie
+        self.connected = asyncio.Event()
+        self.received_at = None
+        self.writer = None
+
+    async def run(self):
+        reader, self.writer = await asyncio.open_connection('127.0.0.1', self.port)
+        self.writer.write(
+            f'GET {self.path} HTTP/1.1\r\nHost: 127.0.0.1\r\nCookie: {self.cookie}\r\n'
+            f'Accept: text/event-stream\r\n\r\n'.encode()
+        )
+        await self.writer.drain()
+        status_line = await reader.readline()
+        if int(status_line.split()[1]) != 200:
+            raise CommandError(f'The feed answered {status_line.decode().strip()}; is the server running ASGI?')
+        async for line in reader:
+            if line.startswith(b'retry:'):
+                self.connected.set()
+            elif line.startswith(b'event: complaint') and self.received_at is None:
+                self.received_at = time.monotonic()
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+class Command(BenchmarkServersCommand):
+    help = (
+        'Start the ASGI deployment with one worker, hold many idle live-feed connections open '
+        'and report the memory they cost and how long one complaint change takes to reach all of them'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--connections', type=int, default=2000, help='Idle feed connections to hold open')
+        parser.add_argument('--port', type=int, default=8711)
+        parser.add_argument('--user', help='Username to listen as (default: first admin)')
+        parser.add_argument('--timeout', type=float, default=30.0, help='Seconds to wait for connections and delivery')
+
+    def raise_file_limit(self, needed):
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        wanted = needed + 256
+        if soft < wanted:
+            if hard != resource.RLIM_INFINITY and hard < wanted:
+                raise CommandError(f'{needed} connections need {wanted} open files; the hard limit is {hard}')
+            # Inherited by the server process started afterwards
+            resource.setrlimit(resource.RLIMIT_NOFILE, (wanted, hard))
+
+    def change_complaint(self):
+        """
+        Add a remark, as an employee would, to the newest complaint every
+        employee's feed carries; returns the remark to delete afterwards.
+        """
+        complaints = Complaint.objects.order_by('-id')
+        complaint = complaints.filter(assigned_to__isnull=True).first() or complaints.first()
+        employee = Employee.objects.order_by('id').first()
+        if complaint is None or employee is None:
+            raise CommandError('Needs at least one complaint and one employee; run seed_scale first')
+        with transaction.atomic():
+            return ComplaintRemark.objects.create(complaint=complaint, employee=employee, remark='Feed benchmark')
+
+    def forget_change(self, remark):
+        with transaction.atomic():
+            ComplaintEvent.objects.filter(kind=ComplaintEvent.REMARK, new_value=str(remark.pk)).delete()
+            remark.delete()
+
+    async def measure(self, port, path, cookie, count, timeout, pid):
+        listeners = [Listener(port, path, cookie) for _ in range(count)]
+        tasks = [asyncio.create_task(listener.run()) for listener in listeners]
+        try:
+            started = time.monotonic()
+            try:
+                await asyncio.wait_for(asyncio.gather(*(listener.connected.wait() for listener in listeners)), timeout)
+            except asyncio.TimeoutError:
+                failed = [task.exception() for task in tasks if task.done() and task.exception()]
+                if failed:
+                    raise CommandError(f'{len(failed)} connections failed, e.g. {failed[0]!r}')
+                raise CommandError(f'Not every connection was answered within {timeout:.0f}s')
+            connect_seconds = time.monotonic() - started
+            await asyncio.sleep(2)  # let the pump settle into its idle poll
+            idle_rss = rss_kib(pid)
+
+            remark = await asyncio.to_thread(self.change_complaint)
+            committed = time.monotonic()
+            try:
+                deadline = committed + timeout
+                while time.monotonic() < deadline and any(listener.received_at is None for listener in listeners):
+                    await asyncio.sleep(0.01)
+            finally:
+                await asyncio.to_thread(self.forget_change, remark)
+            delays = sorted(listener.received_at - committed for listener in listeners if listener.received_at)
+            return connect_seconds, idle_rss, delays
+        finally:
+            for listener in listeners:
+                listener.close()
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def handle(self, *args, **options):
+        count = options['connections']
+        user, cookie = self.session_cookie(options['user'])
+        self.raise_file_limit(count)
+        path = f'{reverse("complaint_feed")}?wait=600'
+
+        process = self.start('asgi', options['port'], 1)
+        try:
+            # One short request first, so the views are imported before the baseline
+            asyncio.run(fetch(options['port'], f'{reverse("complaint_feed")}?wait=0', cookie))
+            baseline_rss = rss_kib(process.pid)
+            connect_seconds, idle_rss, delays = asyncio.run(
+                self.measure(options['port'], path, cookie, count, options['timeout'], process.pid)
+            )
+        finally:
+            self.stop(process)
+
+        self.stdout.write(f'{count} idle feed connections to one uvicorn worker, as {user.username}')
+        self.stdout.write(f'  all connected in {connect_seconds:.2f}s')
+        if baseline_rss and idle_rss:
+            self.stdout.write(
+                f'  server RSS {baseline_rss / 1024:.1f} MiB before, {idle_rss / 1024:.1f} MiB with the connections '
+                f'({(idle_rss - baseline_rss) / count:.1f} KiB each)'
+            )
+        self.stdout.write(
+            f'  one remark reached {len(delays)}/{count} connections: p50 {percentile(delays, 0.5) * 1000:.0f} ms, '
+            f'p99 {percentile(delays, 0.99) * 1000:.0f} ms, last {(delays[-1] if delays else 0) * 1000:.0f} ms '
+            f'(includes up to FEED_POLL_SECONDS of polling)'
+        )
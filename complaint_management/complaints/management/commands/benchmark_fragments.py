@@ -0,0 +1,84 @@
+import statistics
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.template import engines
+from django.template.loader import get_template
+from complaints import caching
+from complaints.models import Complaint
+
+ROW_TEMPLATES = {
+    'admin': 'partials/complaint_row_admin.html',
+    'assigned': 'partials/complaint_row_assigned.html',
+    'unassigned': 'partials/complaint_row_unassigned.html',
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Time rendering a page of complaint rows inline (the old template loop) against '
+        'caching.render_rows() with a cold cache, a warm cache and a few changed rows'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000, help='Complaints on the page')
+        parser.add_argument('--repeat', type=int, default=5, help='Timed runs per case; the median is reported')
+        parser.add_argument('--changed', type=int, default=20, help='Rows modified between runs in the "changed" case')
+        parser.add_argument('--template', choices=sorted(ROW_TEMPLATES), default='admin')
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        repeat = max(1, options['repeat'])
+        template_name = ROW_TEMPLATES[options['template']]
+        complaints = list(
+            Complaint.objects.select_related('customer', 'product', 'assigned_to__user')
+            .order_by('-created_at', '-id')[:rows]
+        )
+        if len(complaints) < rows:
+            raise CommandError(f'Only {len(complaints)} complaints in the database; run seed_scale first')
+
+        # The page loop as it was before row fragments: every row rendered on every request
+        source = get_template(template_name).template.source
+        inline = engines['django'].from_string('{% for complaint in complaints %}' + source + '{% endfor %}')
+
+        tick = [0]
+
+        def touch(subset):
+            # Simulate writes without touching the database: a new updated_at is a new row version
+            tick[0] += 1
+            for complaint in subset:
+                complaint.updated_at += timedelta(microseconds=tick[0])
+
+        def run(case):
+            times = []
+            for _ in range(repeat):
+                if case == 'cold':
+                    touch(complaints)
+                elif case == 'changed':
+                    touch(complaints[:options['changed']])
+                started = time.perf_counter()
+                if case == 'inline':
+                    inline.render({'complaints': complaints})
+                else:
+                    caching.render_rows(template_name, complaints)
+                times.append(time.perf_counter() - started)
+            return statistics.median(times) * 1000
+
+        caching.render_rows(template_name, complaints)  # load templates and version stamps
+        results = {
+            'inline': run('inline'),
+            'cold': run('cold'),
+            'warm': run('warm'),
+            'changed': run('changed'),
+        }
+
+        self.stdout.write(f'{rows} rows of {template_name}, median of {repeat} runs:')
+        labels = {
+            'inline': 'inline loop (before)',
+            'cold': 'fragments, cold cache',
+            'warm': 'fragments, warm cache',
+            'changed': f'fragments, {options["changed"]} rows changed',
+        }
+        for case, label in labels.items():
+            self.stdout.write(f'  {label:<32}{results[case]:>9.1f} ms')
@@ -0,0 +1,161 @@
+import asyncio
+import os
+import signal
+import socket
+import subprocess
+import time
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from complaints.models import Complaint
+
+User = get_user_model()
+
+ADMIN_PATHS = ['/admin_dashboard/', '/admin_complaints/', '/admin_complaints/{complaint}/']
+EMPLOYEE_PATHS = [
+    '/employee/dashboard/', '/employee/complaints/assigned/', '/employee/complaints/unassigned/',
+    '/api/complaints/nearby/?lat=10&lng=76',
+]
+
+SERVERS = {
+    # The Procfile's sync gunicorn workers against the ASGI profile (Procfile.asgi)
+    'wsgi': ['gunicorn', 'complaint_management.wsgi', '--workers', '{workers}', '--bind', '127.0.0.1:{port}'],
+    'asgi': ['uvicorn', 'complaint_management.asgi:application', '--workers', '{workers}',
+             '--host', '127.0.0.1', '--port', '{port}', '--no-access-log'],
+}
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+async def fetch(port, path, cookie):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    try:
+        writer.write(
+            f'GET {path} HTTP/1.1\r\nHost: 127.0.0.1\r\nCookie: {cookie}\r\nConnection: close\r\n\r\n'.encode()
+        )
+        await writer.drain()
+        status_line = await reader.readline()
+        await reader.read()
+        return int(status_line.split()[1])
+    finally:
+        writer.close()
+
+
+async def load(port, paths, cookie, concurrency, duration):
+    """Keep ``concurrency`` requests in flight for ``duration`` seconds; returns (latencies, errors)."""
+    latencies, errors = [], []
+    deadline = time.monotonic() + duration
+
+    async def client(offset):
+        n = offset
+        while time.monotonic() < deadline:
+            path = paths[n % len(paths)]
+            n += 1
+            started = time.monotonic()
+            try:
+                status = await fetch(port, path, cookie)
+            except (OSError, IndexError, ValueError) as exc:
+                errors.append(repr(exc))
+                continue
+            if status >= 400:
+                errors.append(f'{status} {path}')
+            latencies.append(time.monotonic() - started)
+
+    await asyncio.gather(*(client(i) for i in range(concurrency)))
+    return latencies, errors
+
+
+class Command(BaseCommand):
+    help = (
+        'Start the WSGI (sync gunicorn) and ASGI (uvicorn) deployments side by side and '
+        'compare requests/sec and latency of the read-heavy pages under concurrent load'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--servers', nargs='+', choices=sorted(SERVERS), default=['wsgi', 'asgi'])
+        parser.add_argument('--concurrency', type=int, default=200, help='Requests kept in flight')
+        parser.add_argument('--duration', type=float, default=20.0, help='Seconds of load per server')
+        parser.add_argument('--warmup', type=float, default=3.0, help='Seconds of unmeasured load first')
+        parser.add_argument('--workers', type=int, default=4, help='Server worker processes')
+        parser.add_argument('--port', type=int, default=8701)
+        parser.add_argument('--user', help='Username to request as (default: first admin)')
+        parser.add_argument('--path', action='append', dest='paths',
+                            help='Path to request (repeatable; default: the dashboard, list and detail pages)')
+
+    def session_cookie(self, username):
+        if username:
+            user = User.objects.filter(username=username).first()
+        else:
+            user = User.objects.filter(role='admin').order_by('id').first()
+        if user is None:
+            raise CommandError('No such user; pass --user')
+        client = Client()
+        client.force_login(user)
+        return user, f'{settings.SESSION_COOKIE_NAME}={client.cookies[settings.SESSION_COOKIE_NAME].value}'
+
+    def start(self, name, port, workers):
+        command = [part.format(port=port, workers=workers) for part in SERVERS[name]]
+        env = dict(os.environ, DJANGO_ASYNC_VIEWS='1' if name == 'asgi' else '0')
+        process = subprocess.Popen(command, cwd=settings.BASE_DIR, env=env,
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True)
+        for _ in range(300):
+            if process.poll() is not None:
+                raise CommandError(f'{command[0]} exited with {process.returncode}; is it installed?')
+            try:
+                socket.create_connection(('127.0.0.1', port), timeout=0.2).close()
+                return process
+            except OSError:
+                time.sleep(0.1)
+        self.stop(process)
+        raise CommandError(f'{name} server did not start listening on port {port}')
+
+    def stop(self, process):
+        os.killpg(process.pid, signal.SIGTERM)
+        try:
+            process.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            os.killpg(process.pid, signal.SIGKILL)
+
+    def handle(self, *args, **options):
+        user, cookie = self.session_cookie(options['user'])
+        paths = options['paths'] or (ADMIN_PATHS if user.role == 'admin' else EMPLOYEE_PATHS)
+        complaint = Complaint.objects.order_by('-id').values_list('id', flat=True).first() or 1
+        paths = [path.format(complaint=complaint) for path in paths]
+        for path in paths:
+            if urlsplit(path).scheme:
+                raise CommandError(f'Give paths, not URLs: {path}')
+
+        self.stdout.write(
+            f'{options["concurrency"]} concurrent requests, {options["duration"]:.0f}s per server, '
+            f'{options["workers"]} workers, as {user.username}: {", ".join(paths)}'
+        )
+        rows = []
+        for offset, name in enumerate(options['servers']):
+            port = options['port'] + offset
+            process = self.start(name, port, options['workers'])
+            try:
+                if options['warmup']:
+                    asyncio.run(load(port, paths, cookie, min(options['concurrency'], 20), options['warmup']))
+                started = time.monotonic()
+                latencies, errors = asyncio.run(
+                    load(port, paths, cookie, options['concurrency'], options['duration'])
+                )
+                elapsed = time.monotonic() - started
+            finally:
+                self.stop(process)
+            latencies.sort()
+            rows.append((name, len(latencies) / elapsed, percentile(latencies, 0.5),
+                         percentile(latencies, 0.99), len(errors)))
+            for error in sorted(set(errors))[:5]:
+                self.stderr.write(f'{name}: {error}')
+
+        self.stdout.write(f'{"server":<8}{"req/s":>10}{"p50 ms":>10}{"p99 ms":>10}{"errors":>8}')
+        for name, rate, p50, p99, errors in rows:
+            self.stdout.write(f'{name:<8}{rate:>10,.0f}{p50 * 1000:>10.1f}{p99 * 1000:>10.1f}{errors:>8}')
@@ -0,0 +1,293 @@
+import json
+import platform
+import subprocess
+import time
+import tracemalloc
+from contextlib import ExitStack
+
+import django
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from complaints import urls as complaint_urls
+from complaints.models import Employee, Customer, Product, Complaint, ComplaintRemark
+
+User = get_user_model()
+
+# How to drive each named URL: (client, method, url kwargs, query string or body).
+# Clients are 'anon', 'admin' and 'employee' (an employee with assigned
+# complaints). POSTs run inside a transaction that is rolled back, so the
+# suite can be repeated against the same seeded database.
+SCENARIOS = {
+    'login': ('anon', 'GET', {}, None),
+    'logout': ('admin', 'GET', {}, None),
+    'admin_dashboard': ('admin', 'GET', {}, None),
+    'employee_list': ('admin', 'GET', {}, None),
+    'employee_create': ('admin', 'GET', {}, None),
+    'employee_edit': ('admin', 'GET', {'pk': 'employee'}, None),
+    'employee_delete': ('admin', 'GET', {'pk': 'employee'}, None),
+    'customer_list': ('admin', 'GET', {}, None),
+    'customer_create': ('admin', 'GET', {}, None),
+    'customer_edit': ('admin', 'GET', {'pk': 'customer'}, None),
+    'customer_delete': ('admin', 'GET', {'pk': 'customer'}, None),
+    'product_list': ('admin', 'GET', {}, None),
+    'product_create': ('admin', 'GET', {}, None),
+    'product_edit': ('admin', 'GET', {'pk': 'product'}, None),
+    'product_delete': ('admin', 'GET', {'pk': 'product'}, None),
+    'complaint_list': ('admin', 'GET', {}, None),
+    'complaint_export': ('admin', 'GET', {}, {'customer': 'customer'}),
+    'complaint_create': ('admin', 'GET', {}, None),
+    'complaint_edit': ('admin', 'GET', {'pk': 'complaint'}, None),
+    'complaint_detail': ('admin', 'GET', {'pk': 'complaint'}, None),
+    'assign_complaint': ('admin', 'GET', {'pk': 'complaint'}, None),
+    'sla_analytics': ('admin', 'GET', {}, {'group': 'employee'}),
+    'employee_dashboard': ('employee', 'GET', {}, None),
+    'assigned_complaints': ('employee', 'GET', {}, None),
+    'unassigned_complaints': ('employee', 'GET', {}, None),
+    'claim_next_complaints': ('employee', 'POST', {}, {'count': '1'}),
+    'assign_to_me': ('employee', 'GET', {'pk': 'unassigned'}, None),
+    'complaint_detail_employee': ('employee', 'GET', {'pk': 'complaint'}, None),
+    'update_complaint_status': ('employee', 'POST', {'pk': 'complaint'}, {'status': 'Pending'}),
+    'complaint_remarks': ('employee', 'GET', {'pk': 'complaint'}, None),
+    # wait=0 closes the event stream straight away instead of holding it open
+    'complaint_feed': ('employee', 'GET', {}, {'wait': '0'}),
+    'save_location': ('employee', 'JSON', {}, {'complaint_id': 'complaint', 'lat': 10.0, 'lng': 76.3}),
+    'save_locations': ('employee', 'JSON', {}, {'locations': [{'complaint_id': 'complaint', 'lat': 10.0, 'lng': 76.3}]}),
+    'nearby_complaints': ('employee', 'GET', {}, {'lat': '10.0', 'lng': '76.3'}),
+    'autocomplete': ('admin', 'GET', {'kind': 'customers'}, {'q': 'a'}),
+    'metrics': ('anon', 'GET', {}, None),
+}
+
+
+class Rollback(Exception):
+    pass
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+                              capture_output=True, text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+async def drain(streaming_content):
+    # Async streaming responses (the live feed under ASYNC_VIEWS) must be read on an event loop
+    return sum([len(part) async for part in streaming_content])
+
+
+class Command(BaseCommand):
+    help = (
+        'Drive every URL in complaints/urls.py through the test client and write latency '
+        'percentiles, query counts and peak memory per view to a JSON report'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=30, help='Timed requests per view')
+        parser.add_argument('--warmup', type=int, default=2, help='Untimed requests per view first')
+        parser.add_argument('--cold', action='store_true', help='Clear the cache before every request')
+        parser.add_argument('--only', nargs='+', metavar='URL_NAME', help='Benchmark just these views')
+        parser.add_argument('--output', default='benchmark-report.json', help="Report path, or '-' for stdout")
+        parser.add_argument('--baseline', help='Earlier report to compare p50/p99 and query counts against')
+
+    # -------------------------------
+    # Setup
+    # -------------------------------
+
+    def sample_objects(self):
+        complaint = (Complaint.objects.filter(assigned_to__isnull=False).select_related('assigned_to__user')
+                     .order_by('-created_at', '-id').first())
+        admin = User.objects.filter(role='admin').order_by('id').first()
+        if complaint is None or admin is None:
+            raise CommandError('Needs an admin and an assigned complaint; run seed_scale first')
+        employee = complaint.assigned_to
+        unassigned = Complaint.objects.filter(assigned_to__isnull=True).order_by('-created_at', '-id').first()
+        self.users = {'admin': admin, 'employee': employee.user}
+        self.samples = {
+            'employee': employee.pk,
+            'customer': complaint.customer_id,
+            'product': complaint.product_id,
+            'complaint': complaint.pk,
+            'unassigned': unassigned.pk if unassigned else complaint.pk,
+        }
+
+    def fill(self, value):
+        """Replace sample names ('complaint', 'customer', ...) with ids, recursively."""
+        if isinstance(value, str):
+            return self.samples.get(value, value)
+        if isinstance(value, dict):
+            return {key: self.fill(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [self.fill(item) for item in value]
+        return value
+
+    def client(self, role):
+        client = Client()
+        if role != 'anon':
+            client.force_login(self.users[role])
+        return client
+
+    # -------------------------------
+    # Running
+    # -------------------------------
+
+    def client_for(self, name, role):
+        # logout ends the session it runs in, so it gets a fresh one each time
+        return self.client(role) if name == 'logout' else self.clients[role]
+
+    def request(self, name, spec, client):
+        role, method, kwargs, data = spec
+        path = reverse(name, kwargs=self.fill(kwargs))
+        data = self.fill(data)
+        if method == 'GET':
+            response = client.get(path, data)
+        elif method == 'POST':
+            response = client.post(path, data)
+        else:
+            response = client.post(path, json.dumps(data), content_type='application/json')
+        if response.streaming and response.is_async:
+            size = async_to_sync(drain)(response.streaming_content)
+        elif response.streaming:
+            size = sum(len(part) for part in response.streaming_content)
+        else:
+            size = len(response.content)
+        return response.status_code, size
+
+    def run_once(self, name, spec, client):
+        if spec[1] == 'GET' and name != 'assign_to_me':
+            return self.request(name, spec, client)
+        try:
+            with transaction.atomic():
+                result = self.request(name, spec, client)
+                raise Rollback
+        except Rollback:
+            return result
+
+    def prepare(self, name, spec):
+        if self.cold:
+            cache.clear()
+        return self.client_for(name, spec[0])
+
+    def measure(self, name, spec):
+        for _ in range(self.warmup):
+            self.run_once(name, spec, self.prepare(name, spec))
+
+        latencies, queries = [], []
+        for _ in range(self.iterations):
+            client = self.prepare(name, spec)
+            with ExitStack() as stack:
+                contexts = [stack.enter_context(CaptureQueriesContext(connections[alias])) for alias in connections]
+                started = time.perf_counter()
+                status, size = self.run_once(name, spec, client)
+                latencies.append(time.perf_counter() - started)
+            queries.append(sum(len(context) for context in contexts))
+
+        # Peak memory in a separate run: tracing slows everything down
+        client = self.prepare(name, spec)
+        tracemalloc.start()
+        self.run_once(name, spec, client)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        latencies.sort()
+        return {
+            'method': spec[1] if spec[1] != 'JSON' else 'POST',
+            'status': status,
+            'response_bytes': size,
+            'p50_ms': round(percentile(latencies, 0.50) * 1000, 2),
+            'p90_ms': round(percentile(latencies, 0.90) * 1000, 2),
+            'p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+            'max_ms': round(latencies[-1] * 1000, 2),
+            'mean_ms': round(sum(latencies) / len(latencies) * 1000, 2),
+            'queries': max(queries),
+            'peak_memory_kib': round(peak / 1024, 1),
+        }
+
+    # -------------------------------
+    # Reporting
+    # -------------------------------
+
+    def compare(self, report, baseline_path):
+        with open(baseline_path) as handle:
+            baseline = json.load(handle)['views']
+        self.stdout.write(f'\nChange against {baseline_path}:')
+        for name, row in report['views'].items():
+            old = baseline.get(name)
+            if not old:
+                self.stdout.write(f'  {name:<28} new')
+                continue
+            changes = []
+            for key in ('p50_ms', 'p99_ms'):
+                if old[key]:
+                    changes.append(f'{key} {(row[key] - old[key]) / old[key]:+.0%}')
+            if row['queries'] != old['queries']:
+                changes.append(f'queries {old["queries"]} -> {row["queries"]}')
+            self.stdout.write(f'  {name:<28} {", ".join(changes)}')
+
+    def handle(self, *args, **options):
+        self.iterations = max(1, options['iterations'])
+        self.warmup = max(0, options['warmup'])
+        self.cold = options['cold']
+
+        names = [pattern.name for pattern in complaint_urls.urlpatterns if pattern.name]
+        missing = [name for name in names if name not in SCENARIOS]
+        if missing:
+            raise CommandError(f'No benchmark scenario for: {", ".join(missing)}; add them to SCENARIOS')
+        if options['only']:
+            unknown = set(options['only']) - set(names)
+            if unknown:
+                raise CommandError(f'Unknown URL names: {", ".join(sorted(unknown))}')
+            names = [name for name in names if name in options['only']]
+
+        self.sample_objects()
+        self.clients = {role: self.client(role) for role in ('anon', 'admin', 'employee')}
+
+        report = {
+            'created_at': timezone.now().isoformat(),
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connections['default'].vendor,
+            'async_views': getattr(settings, 'ASYNC_VIEWS', False),
+            'cache': 'cold' if self.cold else 'warm',
+            'iterations': self.iterations,
+            'rows': {
+                'employees': Employee.objects.count(),
+                'customers': Customer.objects.count(),
+                'products': Product.objects.count(),
+                'complaints': Complaint.objects.count(),
+                'remarks': ComplaintRemark.objects.count(),
+            },
+            'views': {},
+        }
+
+        self.stdout.write(f'{"view":<28}{"status":>7}{"p50 ms":>9}{"p99 ms":>9}{"queries":>9}{"peak KiB":>10}')
+        for name in names:
+            row = self.measure(name, SCENARIOS[name])
+            report['views'][name] = row
+            self.stdout.write(f'{name:<28}{row["status"]:>7}{row["p50_ms"]:>9.1f}{row["p99_ms"]:>9.1f}'
+                              f'{row["queries"]:>9}{row["peak_memory_kib"]:>10.0f}')
+
+        output = json.dumps(report, indent=2)
+        if options['output'] == '-':
+            self.stdout.write(output)
+        else:
+            with open(options['output'], 'w') as handle:
+                handle.write(output + '\n')
+            self.stdout.write(f'Report written to {options["output"]}')
+
+        if options['baseline']:
+            self.compare(report, options['baseline'])
@@ -0,0 +1,50 @@
+import time
+
+from django.core.management.base import BaseCommand
+from complaints.dispatch import DispatchConfig, Dispatcher
+
+
+class Command(BaseCommand):
+    help = 'Batch-assign unassigned complaints by workload, complaint level and distance'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Plan assignments and report, but write nothing')
+        parser.add_argument('--limit', type=int, help='Stop after scoring this many complaints')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--max-open', type=int, default=20, help='Open complaints an employee may hold')
+        parser.add_argument('--load-weight', type=float, default=1.0)
+        parser.add_argument('--distance-weight', type=float, default=1.0)
+        parser.add_argument('--distance-scale', type=float, default=25.0, help='Distance (km) that costs as much as a full workload')
+        parser.add_argument('--recent-days', type=int, default=30, help='Window used to locate employees')
+        parser.add_argument('--loop', action='store_true', help='Keep dispatching every --interval seconds')
+        parser.add_argument('--interval', type=float, default=30.0)
+
+    def report(self, result, dry_run):
+        rate = result.scored / result.elapsed if result.elapsed else 0.0
+        verb = 'Would assign' if dry_run else 'Assigned'
+        self.stdout.write(
+            f'{verb} {result.assigned} complaints to {len(result.per_employee)} employees '
+            f'({result.skipped} left: everyone at capacity) in {result.elapsed:.2f}s, '
+            f'{rate:,.0f} complaints/sec'
+        )
+        if result.distance_count:
+            self.stdout.write(f'Mean distance to assignee: {result.distance_total / result.distance_count:.1f} km')
+        if result.per_employee:
+            counts = sorted(result.per_employee.values())
+            self.stdout.write(f'Per employee: min {counts[0]}, median {counts[len(counts) // 2]}, max {counts[-1]}')
+
+    def handle(self, *args, **options):
+        config = DispatchConfig(
+            max_open=options['max_open'],
+            load_weight=options['load_weight'],
+            distance_weight=options['distance_weight'],
+            distance_scale_km=options['distance_scale'],
+            recent_days=options['recent_days'],
+            batch_size=options['batch_size'],
+        )
+        while True:
+            result = Dispatcher(config).run(dry_run=options['dry_run'], limit=options['limit'])
+            self.report(result, options['dry_run'])
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+from complaints import events
+
+
+class Command(BaseCommand):
+    help = (
+        'Create the monthly partitions of the complaint event log ahead of time (PostgreSQL). '
+        'Run it from cron, e.g. daily; it is a no-op when the partitions exist'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ahead', type=int, default=events.PARTITION_MONTHS_AHEAD,
+                            help='Months after the current one to create partitions for')
+        parser.add_argument('--list', action='store_true', help='Print the existing partitions')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            self.stdout.write('The event log is only partitioned on PostgreSQL; nothing to do')
+            return
+        created = events.ensure_partitions(max(0, options['ahead']))
+        for name in created:
+            self.stdout.write(self.style.SUCCESS(f'Created {name}'))
+        if options['list']:
+            for name in events.partitions():
+                self.stdout.write(name)
+        self.stdout.write(f'{len(created)} partition(s) created')
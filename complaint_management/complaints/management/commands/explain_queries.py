@@ -0,0 +1,153 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import RequestFactory
+from django.utils import timezone
+from complaints import claims, events, geo, views
+from complaints.models import Employee, Complaint, ComplaintRemark
+from complaints.pagination import encode_cursor, keyset_slice, offset_slice
+
+SAMPLE_SEARCH = 'printer'
+EVENT_BATCH = 5000  # events.iter_window() reads the log in batches this size
+
+# Plan fragments that mean "the planner walked an index" per backend
+INDEX_MARKERS = {
+    'postgresql': ('Index Scan', 'Index Only Scan', 'Bitmap Index Scan'),
+    'sqlite': ('USING INDEX', 'USING COVERING INDEX', 'USING INTEGER PRIMARY KEY', 'USING PRIMARY KEY'),
+}
+FULL_SCAN_MARKERS = {
+    'postgresql': ('Seq Scan on complaints_complaint', 'Seq Scan on complaints_complaintremark',
+                   'Seq Scan on complaints_complaintevent'),
+    'sqlite': ('SCAN complaints_complaint', 'SCAN complaints_complaintremark', 'SCAN complaints_complaintevent'),
+}
+# An explicit sort step means the index did not also provide the ORDER BY
+SORT_MARKERS = {
+    'postgresql': ('Sort Key',),
+    'sqlite': ('USE TEMP B-TREE FOR ORDER BY',),
+}
+
+
+def has_full_scan(plan, vendor):
+    for line in plan.splitlines():
+        if any(marker in line for marker in FULL_SCAN_MARKERS[vendor]):
+            # SQLite reports an index-ordered walk as "SCAN table USING INDEX ..."
+            # and a full-text MATCH as "SCAN <table>_fts VIRTUAL TABLE INDEX ..."
+            if vendor == 'sqlite' and (' USING ' in line or ' VIRTUAL TABLE INDEX ' in line):
+                continue
+            return True
+    return False
+
+
+class Command(BaseCommand):
+    help = 'Run EXPLAIN on the hot queries from complaints/views.py and report index usage'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verbose-plans', action='store_true', help='Print the full plan for every query')
+        parser.add_argument(
+            '--force-index', action='store_true',
+            help='PostgreSQL only: disable seq scans so small dev tables still show which index would be chosen',
+        )
+        parser.add_argument('--fail-on-scan', action='store_true', help='Exit non-zero if any query does a full scan')
+
+    def request(self, **params):
+        return RequestFactory().get('/', params)
+
+    def get_queries(self):
+        """
+        The hot queries, built with the helpers the views use so the plans
+        cannot drift from what actually runs. Keyset-paged lists are
+        explained on their second page, where the cursor filter applies.
+        """
+        employee = Employee.objects.order_by('id').first()
+        newest = Complaint.objects.order_by('-created_at', '-id').first()
+        if employee is None or newest is None:
+            raise CommandError('Needs at least one employee and one complaint; run seed_scale first')
+        page_two = {'cursor': encode_cursor(newest.created_at, newest.pk)}
+        remark = ComplaintRemark.objects.order_by('-timestamp', '-id').first()
+        remarks_page_two = {'cursor': encode_cursor(remark.timestamp, remark.pk)} if remark else {}
+        searched = {'search': SAMPLE_SEARCH}
+        now = timezone.now()
+
+        filters = (
+            ('', {}),
+            ('?status', {'status': 'Pending'}),
+            ('?assigned_to', {'assigned_to': str(employee.pk)}),
+            ('?date', {'date': timezone.localdate().isoformat()}),
+        )
+        queries = []
+        for suffix, params in filters:
+            params = {**params, **page_two}
+            queries.append((f'complaint_list{suffix}',
+                            keyset_slice(self.request(**params), views.complaint_list_queryset(params))))
+        queries.append(('complaint_list?search',
+                        offset_slice(self.request(**searched), views.complaint_list_queryset(searched))))
+        for suffix, params in filters:
+            if 'assigned_to' in params:
+                continue
+            params = {**params, **page_two}
+            queries.append((f'assigned_complaints{suffix}',
+                            keyset_slice(self.request(**params), views.assigned_queryset(employee, params))))
+        queries.append(('assigned_complaints?search',
+                        offset_slice(self.request(**searched), views.assigned_queryset(employee, searched))))
+
+        near, _ = geo.box_candidates(views.unassigned_queryset(), newest.location_lat or 0.0,
+                                     newest.location_lng or 0.0, geo.START_RADIUS_KM)
+        remarks = views.remark_timeline(newest.pk)
+        lookback = now - timedelta(seconds=settings.FEED_LOOKBACK_SECONDS)
+        return queries + [
+            ('unassigned_complaints', keyset_slice(self.request(**page_two), views.unassigned_queryset())),
+            ('unassigned_complaints?near', near),
+            ('claim_next_complaints', claims.next_unassigned(claims.MAX_CLAIM_BATCH)),
+            ('complaint_export', views.export_queryset({})),
+            ('complaint_export?customer', views.export_queryset({'customer': str(newest.customer_id)})),
+            ('complaint_detail.remarks', keyset_slice(self.request(), remarks, field='timestamp',
+                                                      default_size=settings.REMARKS_PAGE_SIZE)),
+            ('complaint_remarks?cursor', keyset_slice(self.request(**remarks_page_two), remarks, field='timestamp',
+                                                      default_size=settings.REMARKS_PAGE_SIZE)),
+            ('complaint_feed.events', events.in_window(lookback, now + timedelta(days=1))[:EVENT_BATCH]),
+            ('complaint_events', events.for_complaint(newest.pk)),
+        ]
+
+    def handle(self, *args, **options):
+        vendor = connection.vendor
+        if vendor not in INDEX_MARKERS:
+            raise CommandError(f'Unsupported database backend: {vendor}')
+
+        scans = []
+        sorts = []
+        with transaction.atomic():
+            if options['force_index'] and vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute('SET LOCAL enable_seqscan = off')
+
+            for name, queryset in self.get_queries():
+                plan = queryset.explain()
+                uses_index = any(marker in plan for marker in INDEX_MARKERS[vendor])
+                full_scan = has_full_scan(plan, vendor)
+                sorted_in_memory = any(marker in plan for marker in SORT_MARKERS[vendor])
+
+                if full_scan:
+                    scans.append(name)
+                    self.stdout.write(self.style.ERROR(f'SCAN   {name}'))
+                elif uses_index and sorted_in_memory:
+                    sorts.append(name)
+                    self.stdout.write(self.style.WARNING(f'SORT   {name}'))
+                elif uses_index:
+                    self.stdout.write(self.style.SUCCESS(f'INDEX  {name}'))
+                else:
+                    self.stdout.write(self.style.WARNING(f'?      {name}'))
+
+                if options['verbose_plans'] or full_scan:
+                    for line in plan.splitlines():
+                        self.stdout.write(f'         {line}')
+
+        if sorts:
+            self.stdout.write(self.style.WARNING(f'\nIndexed but sorted after the lookup: {", ".join(sorts)}'))
+        if scans:
+            self.stdout.write(self.style.WARNING(f'\n{len(scans)} quer{"y" if len(scans) == 1 else "ies"} without an index: {", ".join(scans)}'))
+            if options['fail_on_scan']:
+                raise CommandError('Full table scans detected')
+        else:
+            self.stdout.write(self.style.SUCCESS('\nAll hot queries use an index.'))
@@ -0,0 +1,279 @@
+import csv
+import gzip
+import json
+import sys
+import time
+from datetime import timezone as dt_timezone
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, transaction
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from complaints import bulk, events, geo
+from complaints.models import Employee, Customer, Product, Complaint
+
+User = get_user_model()
+
+LEVELS = {value for value, _ in Complaint.COMPLAINT_LEVEL_CHOICES}
+STATUSES = {value for value, _ in Complaint.STATUS_CHOICES}
+
+# Written with COPY or a plain INSERT, never bulk_create(), so created_at is
+# stored as given instead of being replaced by auto_now_add
+COLUMNS = (
+    'customer_id', 'product_id', 'complaint_level', 'description', 'location_lat', 'location_lng',
+    'geo_cell', 'status', 'assigned_to_id', 'created_by_id', 'created_at', 'updated_at',
+)
+
+
+class RowError(ValueError):
+    pass
+
+
+class Lookup:
+    """In-memory map from an id or a natural key (name/username) to a primary key."""
+
+    def __init__(self, label, pairs):
+        self.label = label
+        self.ids = set()
+        self.keys = {}
+        for pk, key in pairs:
+            self.ids.add(pk)
+            if key:
+                self.keys.setdefault(key.strip().lower(), pk)
+
+    def resolve(self, value, required=True):
+        value = str(value).strip() if value is not None else ''
+        if not value:
+            if required:
+                raise RowError(f'{self.label} is required')
+            return None
+        if value.isdigit() and int(value) in self.ids:
+            return int(value)
+        pk = self.keys.get(value.lower())
+        if pk is None:
+            raise RowError(f'unknown {self.label} {value!r}')
+        return pk
+
+
+def first(record, *names):
+    for name in names:
+        value = record.get(name)
+        if value not in (None, ''):
+            return value
+    return None
+
+
+class Command(BaseCommand):
+    help = 'Stream complaints from a CSV or JSONL file (or stdin) into the database in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV/JSONL file (optionally .gz), or '-' for stdin")
+        parser.add_argument('--format', choices=['csv', 'jsonl'], help='Input format (default: from the file extension)')
+        parser.add_argument('--created-by', help='Username recorded as creator (default: first admin user)')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows per INSERT/COPY batch')
+        parser.add_argument('--chunk-size', type=int, default=20000, help='Rows per transaction')
+        parser.add_argument('--no-copy', action='store_true', help='Use INSERT even on PostgreSQL')
+        parser.add_argument('--progress-every', type=int, default=100000, help='Report throughput every N rows')
+
+    # -------------------------------
+    # Input
+    # -------------------------------
+
+    def open_source(self, path):
+        if path == '-':
+            return sys.stdin
+        if path.endswith('.gz'):
+            return gzip.open(path, 'rt', encoding='utf-8', newline='')
+        return open(path, encoding='utf-8', newline='')
+
+    def read_records(self, stream, fmt):
+        """Yield (line_number, record) pairs without reading the whole input."""
+        if fmt == 'csv':
+            reader = csv.DictReader(stream)
+            for record in reader:
+                yield reader.line_num, record
+        else:
+            for line_number, line in enumerate(stream, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError as exc:
+                    yield line_number, RowError(f'invalid JSON: {exc}')
+                    continue
+                if not isinstance(record, dict):
+                    yield line_number, RowError('expected a JSON object')
+                    continue
+                yield line_number, record
+
+    # -------------------------------
+    # Validation
+    # -------------------------------
+
+    def build_complaint(self, record, now):
+        level = str(first(record, 'complaint_level', 'level') or '').strip()
+        if level.isdigit():
+            level = f'Level {level}'
+        if level not in LEVELS:
+            raise RowError(f'invalid complaint_level {level!r}')
+
+        status = str(first(record, 'status') or 'Pending').strip()
+        if status not in STATUSES:
+            raise RowError(f'invalid status {status!r}')
+
+        description = str(first(record, 'description') or '').strip()
+        if not description:
+            raise RowError('description is required')
+
+        lat, lng = first(record, 'location_lat', 'lat'), first(record, 'location_lng', 'lng')
+        if lat is not None or lng is not None:
+            point = geo.parse_point(lat, lng)
+            if point is None:
+                raise RowError(f'invalid location {lat!r}, {lng!r}')
+            lat, lng = point
+
+        created_at = first(record, 'created_at')
+        if created_at is None:
+            created_at = now
+        else:
+            try:
+                # None for the wrong format, ValueError for impossible dates (2024-02-30)
+                parsed = parse_datetime(str(created_at))
+            except (TypeError, ValueError):
+                parsed = None
+            if parsed is None:
+                raise RowError(f'invalid created_at {created_at!r}')
+            created_at = parsed if timezone.is_aware(parsed) else parsed.replace(tzinfo=dt_timezone.utc)
+
+        return Complaint(
+            customer_id=self.customers.resolve(first(record, 'customer_id', 'customer')),
+            product_id=self.products.resolve(first(record, 'product_id', 'product')),
+            complaint_level=level,
+            description=description,
+            location_lat=lat,
+            location_lng=lng,
+            geo_cell=geo.cell_for(lat, lng),
+            status=status,
+            assigned_to_id=self.employees.resolve(first(record, 'assigned_to_id', 'assigned_to'), required=False),
+            created_by_id=self.created_by_id,
+            created_at=created_at,
+            updated_at=now,
+        )
+
+    # -------------------------------
+    # Writing
+    # -------------------------------
+
+    def write_rows(self, complaints):
+        rows = ([getattr(complaint, column) for column in COLUMNS] for complaint in complaints)
+        if self.use_copy:
+            bulk.copy_rows(Complaint, COLUMNS, rows)
+        else:
+            bulk.insert_rows(Complaint, COLUMNS, rows)
+
+    def insert_batch(self, batch):
+        """
+        Insert one batch. A failing batch is retried row by row so one bad
+        row only costs itself.
+        """
+        try:
+            with transaction.atomic():
+                self.write_rows([complaint for _, complaint in batch])
+            return
+        except DatabaseError:
+            pass
+
+        for line_number, complaint in batch:
+            try:
+                with transaction.atomic():
+                    bulk.insert_rows(Complaint, COLUMNS, [[getattr(complaint, column) for column in COLUMNS]])
+            except DatabaseError as exc:
+                self.report_error(line_number, str(exc).strip().splitlines()[0])
+
+    def write_chunk(self, chunk):
+        if not chunk:
+            return
+        with transaction.atomic():
+            before = Complaint.objects.aggregate(last=Max('id'))['last'] or 0
+            for start in range(0, len(chunk), self.batch_size):
+                self.insert_batch(chunk[start:start + self.batch_size])
+
+            # Neither COPY nor executemany() hands back ids: the rows this
+            # chunk wrote are the ones past ``before`` carrying this run's updated_at
+            created = list(
+                Complaint.objects.filter(id__gt=before, updated_at=self.now)
+                .values_list('id', 'status', 'assigned_to_id')
+            )
+            bulk.complaints_created(((status, assignee) for _, status, assignee in created), after_id=before)
+            events.record_changes(
+                ((pk, None, (status, assignee)) for pk, status, assignee in created), actor=self.created_by_id,
+            )
+        self.imported += len(created)
+
+    def report_error(self, line_number, message):
+        self.failed += 1
+        self.stderr.write(f'line {line_number}: {message}')
+
+    def report_progress(self, final=False):
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        label = 'Imported' if final else 'Progress:'
+        self.stdout.write(
+            f'{label} {self.imported} rows, {self.failed} errors, '
+            f'{elapsed:.1f}s, {self.imported / elapsed:,.0f} rows/sec'
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        name = path[:-3] if path.endswith('.gz') else path
+        fmt = options['format'] or ('jsonl' if name.endswith(('.jsonl', '.ndjson')) else 'csv')
+        self.batch_size = max(1, options['batch_size'])
+        chunk_size = max(self.batch_size, options['chunk_size'])
+
+        if options['created_by']:
+            creator = User.objects.filter(username=options['created_by']).first()
+            if creator is None:
+                raise CommandError(f"No user named {options['created_by']!r}")
+        else:
+            creator = User.objects.filter(role='admin').order_by('id').first()
+            if creator is None:
+                raise CommandError('No admin user found; pass --created-by')
+        self.created_by_id = creator.pk
+
+        self.use_copy = not options['no_copy'] and bulk.can_copy()
+
+        self.customers = Lookup('customer', Customer.objects.values_list('id', 'name').iterator(chunk_size=10000))
+        self.products = Lookup('product', Product.objects.values_list('id', 'name').iterator(chunk_size=10000))
+        self.employees = Lookup('employee', Employee.objects.values_list('id', 'user__username').iterator(chunk_size=10000))
+
+        self.imported = 0
+        self.failed = 0
+        self.started = time.monotonic()
+        next_report = options['progress_every']
+        self.now = timezone.now()
+
+        stream = self.open_source(path)
+        try:
+            chunk = []
+            for line_number, record in self.read_records(stream, fmt):
+                try:
+                    if isinstance(record, RowError):
+                        raise record
+                    chunk.append((line_number, self.build_complaint(record, self.now)))
+                except RowError as exc:
+                    self.report_error(line_number, str(exc))
+
+                if len(chunk) >= chunk_size:
+                    self.write_chunk(chunk)
+                    chunk = []
+                    if self.imported >= next_report:
+                        self.report_progress()
+                        next_report += options['progress_every']
+            self.write_chunk(chunk)
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+        self.report_progress(final=True)
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from complaints import caching, counters
+from complaints.models import DashboardCounter
+
+
+class Command(BaseCommand):
+    help = 'Recompute the dashboard counters from the complaint, employee, customer and product tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true', help='Only report drift, do not rewrite the counters')
+
+    def handle(self, *args, **options):
+        stored = dict(DashboardCounter.objects.values_list('key', 'value'))
+        expected = counters.compute_counts()
+
+        drift = {
+            key: (stored.get(key, 0), expected.get(key, 0))
+            for key in set(stored) | set(expected)
+            if stored.get(key, 0) != expected.get(key, 0)
+        }
+        for key, (have, want) in sorted(drift.items()):
+            self.stdout.write(self.style.WARNING(f'{key}: stored {have}, actual {want}'))
+
+        if options['check']:
+            self.stdout.write(f'{len(drift)} counter(s) out of date')
+            return
+
+        counts = counters.rebuild()
+        caching.bump(caching.COMPLAINTS, caching.EMPLOYEES, caching.CUSTOMERS, caching.PRODUCTS)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {len(counts)} counters ({len(drift)} had drifted)'))
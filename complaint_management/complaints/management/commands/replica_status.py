@@ -0,0 +1,55 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+
+class Command(BaseCommand):
+    help = (
+        'Show whether each read replica is reachable and how far behind it is. '
+        'With --refresh, copy the primary into SQLite replicas (for local testing).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--refresh', action='store_true',
+                            help='Overwrite SQLite replica files with a copy of the SQLite primary')
+
+    def refresh(self, alias):
+        primary, replica = connections[DEFAULT_DB_ALIAS], connections[alias]
+        if primary.vendor != 'sqlite' or replica.vendor != 'sqlite':
+            raise CommandError('--refresh only copies SQLite databases; PostgreSQL replicas follow the primary')
+        primary.ensure_connection()
+        replica.ensure_connection()
+        primary.connection.backup(replica.connection)
+        self.stdout.write(f'{alias}: copied from {DEFAULT_DB_ALIAS}')
+
+    def lag(self, connection):
+        if connection.vendor != 'postgresql':
+            return 'n/a'
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT pg_is_in_recovery(), EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())'
+            )
+            in_recovery, seconds = cursor.fetchone()
+        if not in_recovery:
+            return 'not a standby'
+        return 'unknown' if seconds is None else f'{seconds:.1f}s'
+
+    def handle(self, *args, **options):
+        replicas = getattr(settings, 'DATABASE_REPLICAS', ())
+        if not replicas:
+            self.stdout.write('No replicas configured (set DATABASE_REPLICA_URLS)')
+            return
+
+        for alias in replicas:
+            if options['refresh']:
+                self.refresh(alias)
+            connection = connections[alias]
+            try:
+                with connection.cursor() as cursor:
+                    cursor.execute('SELECT COUNT(*) FROM complaints_complaint')
+                    complaints = cursor.fetchone()[0]
+                lag = self.lag(connection)
+            except DatabaseError as exc:
+                self.stderr.write(f'{alias}: unreachable ({str(exc).strip().splitlines()[0]})')
+                continue
+            self.stdout.write(f'{alias}: ok, {complaints} complaints, replication lag {lag}')
@@ -0,0 +1,277 @@
+import random
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+from complaints import analytics, bulk, caching, counters, geo, search
+from complaints.models import Employee, Customer, Product, Complaint, ComplaintEvent, ComplaintRemark
+
+User = get_user_model()
+
+FIRST_NAMES = ['Arun', 'Anjali', 'Rahul', 'Priya', 'Vishnu', 'Lakshmi', 'Suresh', 'Divya', 'Manoj', 'Sneha',
+               'Ajith', 'Meera', 'Kiran', 'Nisha', 'Rajesh', 'Deepa', 'Sanjay', 'Kavya', 'Anil', 'Reshma']
+LAST_NAMES = ['Nair', 'Menon', 'Pillai', 'Kumar', 'Varghese', 'Thomas', 'Joseph', 'Krishnan', 'Das', 'Iyer',
+              'Mathew', 'George', 'Raj', 'Panicker', 'Kurian', 'Warrier', 'Babu', 'Chacko', 'Shetty', 'Rao']
+CITIES = [
+    ('Kochi', 9.93, 76.27), ('Thiruvananthapuram', 8.52, 76.94), ('Kozhikode', 11.26, 75.78),
+    ('Thrissur', 10.53, 76.21), ('Kollam', 8.89, 76.61), ('Kannur', 11.87, 75.37),
+    ('Palakkad', 10.78, 76.65), ('Alappuzha', 9.50, 76.34), ('Kottayam', 9.59, 76.52),
+    ('Malappuram', 11.07, 76.07), ('Bengaluru', 12.97, 77.59), ('Chennai', 13.08, 80.27),
+    ('Coimbatore', 11.02, 76.96), ('Mangaluru', 12.91, 74.86), ('Madurai', 9.93, 78.12),
+]
+PRODUCT_KINDS = ['Inverter', 'Water Purifier', 'Air Conditioner', 'Refrigerator', 'Washing Machine',
+                 'Solar Panel', 'UPS', 'Microwave Oven', 'Television', 'Water Heater', 'Chimney', 'Printer']
+PRODUCT_TIERS = ['Lite', 'Pro', 'Max', 'Eco', 'Plus', 'Prime', 'X', 'Smart']
+SYMPTOMS = ['not powering on', 'making a loud noise', 'leaking water', 'tripping the breaker',
+            'showing an error code', 'overheating', 'not cooling', 'display is blank', 'battery drains fast',
+            'remote not working', 'smells of burning', 'stops after a few minutes', 'vibrates heavily']
+DETAILS = ['since last week', 'after the power cut', 'right after installation', 'intermittently',
+           'every morning', 'when running on full load', 'after the recent service visit',
+           'even after a reset', 'since the warranty renewal']
+REMARKS = ['Visited site, inspected the unit', 'Replaced faulty capacitor', 'Customer not available, rescheduled',
+           'Ordered spare part', 'Spare part received, installed', 'Cleaned filters and tested',
+           'Firmware updated', 'Issue could not be reproduced', 'Explained usage to the customer',
+           'Escalated to the service centre', 'Tested under load for an hour, working fine',
+           'Wiring issue at customer premises, advised electrician']
+LEVELS = ['Level 1', 'Level 2', 'Level 3']
+
+COMPLAINT_COLUMNS = (
+    'customer_id', 'product_id', 'complaint_level', 'description', 'location_lat', 'location_lng',
+    'geo_cell', 'status', 'assigned_to_id', 'created_by_id', 'created_at', 'updated_at',
+)
+REMARK_COLUMNS = ('complaint_id', 'employee_id', 'remark', 'timestamp')
+EVENT_COLUMNS = ('complaint_id', 'kind', 'old_value', 'new_value', 'actor_id', 'occurred_at')
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate production-sized synthetic data (employees, customers, products, complaints, '
+        'their events and remarks) with bulk inserts, or COPY on PostgreSQL'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--employees', type=int, default=500)
+        parser.add_argument('--customers', type=int, default=100_000)
+        parser.add_argument('--products', type=int, default=200)
+        parser.add_argument('--complaints', type=int, default=5_000_000)
+        parser.add_argument('--remarks', type=int, default=20_000_000)
+        parser.add_argument('--days', type=int, default=730, help='Spread complaints over this many past days')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows per INSERT/COPY')
+        parser.add_argument('--chunk-size', type=int, default=50_000, help='Rows per transaction')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed, for repeatable data')
+        parser.add_argument('--no-copy', action='store_true', help='Use INSERT even on PostgreSQL')
+
+    # -------------------------------
+    # Writing
+    # -------------------------------
+
+    def insert(self, model, columns, rows):
+        """Insert an iterable of value tuples in chunked transactions; returns the row count."""
+        total = 0
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= self.chunk_size:
+                total += self.write_chunk(model, columns, chunk)
+                chunk = []
+        total += self.write_chunk(model, columns, chunk)
+        return total
+
+    def write_chunk(self, model, columns, chunk):
+        with transaction.atomic():
+            if model is Complaint:
+                before = Complaint.objects.aggregate(last=Max('id'))['last'] or 0
+            self.write_batches(model, columns, chunk)
+            if model is Complaint:
+                # Raw inserts bypass events.record_changes(); log the history each row implies
+                self.write_batches(ComplaintEvent, EVENT_COLUMNS, list(self.event_rows(before)))
+        return len(chunk)
+
+    def write_batches(self, model, columns, rows):
+        for start in range(0, len(rows), self.batch_size):
+            batch = rows[start:start + self.batch_size]
+            if self.use_copy:
+                bulk.copy_rows(model, columns, batch)
+            else:
+                bulk.insert_rows(model, columns, batch)
+
+    def timed(self, label, func, *args):
+        started = time.monotonic()
+        count = func(*args)
+        elapsed = max(time.monotonic() - started, 1e-9)
+        self.stdout.write(f'{label}: {count:,} rows in {elapsed:.1f}s ({count / elapsed:,.0f} rows/sec)')
+        return count
+
+    # -------------------------------
+    # Generators
+    # -------------------------------
+
+    def person(self):
+        return self.rnd.choice(FIRST_NAMES), self.rnd.choice(LAST_NAMES)
+
+    def phone(self):
+        return f'+91{self.rnd.randint(6_000_000_000, 9_999_999_999)}'
+
+    def seed_employees(self, count):
+        password = make_password('employee123')  # hashing is slow; every seeded employee shares one
+        users = []
+        for i in range(count):
+            first, last = self.person()
+            users.append(User(
+                username=f'{self.tag}_emp{i}', first_name=first, last_name=last, password=password,
+                email=f'{first}.{last}.{i}@{self.tag}.example.com'.lower(), role='employee',
+            ))
+        users = User.objects.bulk_create(users, batch_size=self.batch_size)
+        employees = Employee.objects.bulk_create((
+            Employee(user=user, phone=self.phone(), designation=self.rnd.choice(['Field Engineer', 'Technician',
+                                                                                 'Senior Technician']),
+                     salary=Decimal(self.rnd.randrange(25_000, 90_000, 500)), address=self.rnd.choice(CITIES)[0])
+            for user in users
+        ), batch_size=self.batch_size)
+        # Engineers work around a home city
+        self.employees_by_city = {}
+        for employee in employees:
+            self.employees_by_city.setdefault(employee.address, []).append(employee.pk)
+        self.employee_ids = [employee.pk for employee in employees]
+        return len(employees)
+
+    def customer_rows(self, count):
+        for i in range(count):
+            first, last = self.person()
+            city = self.rnd.choice(CITIES)[0]
+            yield (f'{first} {last}', self.phone(), f'{first}.{last}.{i}@{self.tag}.example.com'.lower(),
+                   f'{self.rnd.randint(1, 999)}, Ward {self.rnd.randint(1, 60)}, {city}')
+
+    def product_rows(self, count):
+        for i in range(count):
+            yield (f'{self.rnd.choice(PRODUCT_KINDS)} {self.rnd.choice(PRODUCT_TIERS)} {100 + i}',
+                   Decimal(self.rnd.randrange(2_000, 150_000, 50)), Decimal(self.rnd.choice([5, 12, 18, 28])))
+
+    def complaint_rows(self, count, days, customer_ids, products):
+        now = timezone.now()
+        start = now - timedelta(days=days)
+        step = days * 86400 / max(count, 1)
+        for i in range(count):
+            created_at = start + timedelta(seconds=i * step + self.rnd.random() * step)
+            age_days = (now - created_at).days
+            product_id, product_name = self.rnd.choice(products)
+
+            lat = lng = None
+            city, city_lat, city_lng = self.rnd.choice(CITIES)
+            if self.rnd.random() < 0.8:
+                lat = round(self.rnd.gauss(city_lat, 0.08), 6)
+                lng = round(self.rnd.gauss(city_lng, 0.08), 6)
+
+            # Old complaints are mostly resolved; the recent ones form the open backlog
+            roll = self.rnd.random()
+            if age_days > 30:
+                status = 'Closed' if roll < 0.9 else 'Not Closed'
+            else:
+                status = 'Pending' if roll < 0.6 else ('Closed' if roll < 0.9 else 'Not Closed')
+
+            assigned_to_id = None
+            if not (status == 'Pending' and age_days < 14 and self.rnd.random() < 0.4):
+                local = self.employees_by_city.get(city) or self.employee_ids
+                assigned_to_id = self.rnd.choice(local)
+
+            description = (f'{product_name} {self.rnd.choice(SYMPTOMS)} {self.rnd.choice(DETAILS)}. '
+                           f'Customer in {city} requests a visit.')
+            yield (self.rnd.choice(customer_ids), product_id, self.rnd.choices(LEVELS, (6, 3, 1))[0], description,
+                   lat, lng, geo.cell_for(lat, lng), status, assigned_to_id, self.created_by_id, created_at,
+                   created_at)
+
+    def event_rows(self, after_id):
+        """CREATED, ASSIGNED and STATUS events for the complaints after ``after_id``, at plausible past times."""
+        now = timezone.now()
+        complaints = (
+            Complaint.objects.filter(id__gt=after_id).order_by('id')
+            .values_list('id', 'status', 'assigned_to_id', 'created_at')
+        )
+        for complaint_id, status, assigned_to_id, created_at in complaints.iterator():
+            yield complaint_id, ComplaintEvent.CREATED, None, 'Pending', self.created_by_id, created_at
+            at = created_at
+            if assigned_to_id is not None:
+                at = min(at + timedelta(hours=self.rnd.uniform(0.5, 24)), now)
+                yield complaint_id, ComplaintEvent.ASSIGNED, None, str(assigned_to_id), None, at
+            if status != 'Pending':
+                at = min(at + timedelta(hours=self.rnd.uniform(1, 120)), now)
+                yield complaint_id, ComplaintEvent.STATUS, 'Pending', status, None, at
+
+    def remark_rows(self, after_id, per_complaint):
+        whole, fraction = int(per_complaint), per_complaint - int(per_complaint)
+        now = timezone.now()
+        last_id = after_id
+        while True:
+            complaints = list(
+                Complaint.objects.filter(id__gt=last_id, assigned_to__isnull=False).order_by('id')
+                .values_list('id', 'assigned_to_id', 'created_at')[:self.chunk_size]
+            )
+            if not complaints:
+                return
+            last_id = complaints[-1][0]
+            for complaint_id, employee_id, created_at in complaints:
+                count = whole + (self.rnd.random() < fraction)
+                timestamp = created_at
+                for _ in range(count):
+                    # Recent complaints cannot have remarks from the future
+                    timestamp = min(timestamp + timedelta(hours=self.rnd.uniform(1, 72)), now)
+                    yield complaint_id, employee_id, self.rnd.choice(REMARKS), timestamp
+
+    # -------------------------------
+    # Command
+    # -------------------------------
+
+    def handle(self, *args, **options):
+        if options['complaints'] and not options['employees'] and not Employee.objects.exists():
+            raise CommandError('Complaints need employees; pass --employees')
+        creator = User.objects.filter(role='admin').order_by('id').first()
+        if creator is None:
+            raise CommandError('No admin user found; run setup_data first')
+
+        self.created_by_id = creator.pk
+        self.rnd = random.Random(options['seed'])
+        self.tag = f'seed{format(int(time.time()), "x")}'
+        self.batch_size = max(1, options['batch_size'])
+        self.chunk_size = max(self.batch_size, options['chunk_size'])
+        self.use_copy = not options['no_copy'] and bulk.can_copy()
+        started = time.monotonic()
+
+        self.timed('Employees', self.seed_employees, options['employees'])
+        if not options['employees']:
+            self.employee_ids = list(Employee.objects.values_list('id', flat=True))
+            self.employees_by_city = {}
+
+        self.timed('Customers', self.insert, Customer, ('name', 'contact_number', 'email', 'address'),
+                   self.customer_rows(options['customers']))
+        self.timed('Products', self.insert, Product, ('name', 'price', 'tax'), self.product_rows(options['products']))
+        customer_ids = list(Customer.objects.values_list('id', flat=True))
+        products = list(Product.objects.values_list('id', 'name'))
+        if options['complaints'] and not (customer_ids and products):
+            raise CommandError('Complaints need customers and products')
+
+        # The raw INSERT/COPY paths write created_at and timestamp as given
+        before = Complaint.objects.aggregate(last=Max('id'))['last'] or 0
+        complaints = self.timed('Complaints', self.insert, Complaint, COMPLAINT_COLUMNS,
+                                self.complaint_rows(options['complaints'], options['days'], customer_ids, products))
+        assigned = Complaint.objects.filter(id__gt=before, assigned_to__isnull=False).count()
+        if assigned and options['remarks']:
+            self.timed('Remarks', self.insert, ComplaintRemark, REMARK_COLUMNS,
+                       self.remark_rows(before, options['remarks'] / assigned))
+
+        # Bulk inserts skip the signals; rebuild what they would have maintained
+        step = time.monotonic()
+        counters.rebuild()
+        search.reindex(after_id=before)
+        # The seeded events lie behind the rollup watermark; fold everything in again on the next run
+        analytics.reset_rollups()
+        caching.bump(caching.COMPLAINTS, caching.EMPLOYEES, caching.CUSTOMERS, caching.PRODUCTS)
+        self.stdout.write(f'Counters and search index rebuilt in {time.monotonic() - step:.1f}s')
+        self.stdout.write(self.style.SUCCESS(
+            f'Seeded {complaints:,} complaints in {time.monotonic() - started:.1f}s (tag {self.tag})'
+        ))
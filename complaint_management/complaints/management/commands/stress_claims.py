@@ -0,0 +1,137 @@
+import random
+import threading
+import time
+from collections import Counter
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, connections
+from complaints import bulk, claims, counters
+from complaints.models import Employee, Customer, Product, Complaint, DashboardCounter
+
+User = get_user_model()
+
+STRESS_DESCRIPTION = 'stress_claims synthetic complaint'
+
+
+class Command(BaseCommand):
+    help = (
+        'Concurrency stress test for claiming unassigned complaints. Many threads claim '
+        'at once; the run fails if a complaint is claimed twice or counters drift. '
+        'Writes to the configured database: run it against a scratch copy.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=32, help='Concurrent claimer threads')
+        parser.add_argument('--batch', type=int, default=5, help='Complaints per "claim next" call')
+        parser.add_argument('--mode', choices=['next', 'same'], default='next',
+                            help='"next": drain the queue with claim_next; "same": every worker races for the same complaint')
+        parser.add_argument('--seed', type=int, default=0, help='Insert this many unassigned complaints first')
+        parser.add_argument('--cleanup', action='store_true', help='Delete the seeded complaints afterwards')
+
+    def seed(self, count):
+        customer = Customer.objects.order_by('id').first()
+        product = Product.objects.order_by('id').first()
+        creator = User.objects.filter(role='admin').order_by('id').first()
+        if not (customer and product and creator):
+            raise CommandError('Seeding needs at least one customer, product and admin user')
+        created = Complaint.objects.bulk_create(
+            Complaint(customer=customer, product=product, complaint_level='Level 1',
+                      description=STRESS_DESCRIPTION, created_by=creator)
+            for _ in range(count)
+        )
+        bulk.complaints_created([c.counter_state() for c in created], complaint_ids=[c.pk for c in created])
+        self.stdout.write(f'Seeded {len(created)} unassigned complaints')
+
+    def run_workers(self, employees, work):
+        """Run ``work(employee)`` in one thread per worker; returns per-worker results and errors."""
+        results = [[] for _ in employees]
+        errors = []
+        barrier = threading.Barrier(len(employees))
+
+        def target(index, employee):
+            try:
+                barrier.wait()
+                results[index] = work(employee)
+            except Exception as exc:  # reported below, the run continues
+                errors.append(f'worker {index}: {exc!r}')
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=target, args=(i, emp)) for i, emp in enumerate(employees)]
+        started = time.monotonic()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results, errors, time.monotonic() - started
+
+    def retrying(self, func, *args):
+        # SQLite serialises writers with one database lock; back off and retry
+        for attempt in range(200):
+            try:
+                return func(*args)
+            except OperationalError as exc:
+                if 'locked' not in str(exc):
+                    raise
+                time.sleep(random.uniform(0, 0.005 * 2 ** min(attempt, 6)))
+        raise OperationalError('database stayed locked')
+
+    def handle(self, *args, **options):
+        if options['seed']:
+            self.seed(options['seed'])
+
+        staff = list(Employee.objects.order_by('id'))
+        if not staff:
+            raise CommandError('Need at least one employee')
+        workers = max(2, options['workers'])
+        employees = [staff[i % len(staff)] for i in range(workers)]
+        self.stdout.write(f'{connection.vendor}: {workers} workers, mode={options["mode"]}')
+
+        if options['mode'] == 'next':
+            def work(employee):
+                claimed = []
+                while True:
+                    ids = self.retrying(claims.claim_next, employee, options['batch'])
+                    if not ids:
+                        return claimed
+                    claimed.extend(ids)
+        else:
+            targets = list(Complaint.objects.filter(assigned_to__isnull=True).order_by('id').values_list('id', flat=True)[:200])
+
+            def work(employee):
+                return [pk for pk in targets if self.retrying(claims.claim, pk, employee)]
+
+        results, errors, elapsed = self.run_workers(employees, work)
+
+        claimed = Counter(pk for ids in results for pk in ids)
+        duplicates = [pk for pk, n in claimed.items() if n > 1]
+        winners = {pk: employees[i].pk for i, ids in enumerate(results) for pk in ids}
+        mismatched = [
+            pk for pk, assignee in Complaint.objects.filter(pk__in=winners).values_list('id', 'assigned_to_id')
+            if assignee != winners[pk]
+        ]
+        stored = dict(DashboardCounter.objects.values_list('key', 'value'))
+        expected = counters.compute_counts()
+        drift = [key for key in set(stored) | set(expected) if stored.get(key, 0) != expected.get(key, 0)]
+
+        self.stdout.write(
+            f'{len(claimed)} complaints claimed in {elapsed:.2f}s '
+            f'({len(claimed) / max(elapsed, 1e-9):,.0f} claims/sec)'
+        )
+        for error in errors:
+            self.stderr.write(error)
+        if duplicates:
+            self.stderr.write(f'Claimed more than once: {duplicates[:20]}')
+        if mismatched:
+            self.stderr.write(f'Assignee differs from the winning claimer: {mismatched[:20]}')
+        if drift:
+            self.stderr.write(f'Counters drifted: {sorted(drift)}')
+
+        if options['cleanup']:
+            for complaint in Complaint.objects.filter(description=STRESS_DESCRIPTION):
+                complaint.delete()
+
+        if errors or duplicates or mismatched or drift:
+            raise CommandError('Stress test failed')
+        self.stdout.write(self.style.SUCCESS('No double claims, no lost assignments, counters consistent'))
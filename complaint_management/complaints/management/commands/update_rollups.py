@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from complaints import analytics
+
+
+class Command(BaseCommand):
+    help = (
+        'Fold complaint events recorded since the last run into the daily SLA rollups '
+        'behind the analytics page. Run it from cron, e.g. every few minutes'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=analytics.BATCH_SIZE, help='Events per transaction')
+        parser.add_argument('--settle', type=int, default=None,
+                            help='Skip events younger than this many seconds (default ROLLUP_SETTLE_SECONDS)')
+        parser.add_argument('--rebuild', action='store_true',
+                            help='Drop the rollups and fold in the whole event log again')
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            analytics.reset_rollups()
+            self.stdout.write('Rollups cleared')
+
+        def progress(folded):
+            self.stdout.write(f'  {folded} events folded in')
+
+        folded = analytics.update_rollups(max(1, options['batch_size']), options['settle'], progress)
+        self.stdout.write(self.style.SUCCESS(f'{folded} events folded in; watermark at {analytics.last_update()}'))
@@ -0,0 +1,146 @@
+import atexit
+import contextvars
+import logging
+import os
+import time
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Histogram, REGISTRY, generate_latest
+
+logger = logging.getLogger(__name__)
+
+# -------------------------------
+# Request metrics
+# -------------------------------
+# MetricsMiddleware (complaints/middleware.py) times every request and
+# labels it with its URL name. Queries are counted by a wrapper installed on
+# every new database connection; it finds the running request through a
+# context variable, which also follows async views into the threads that
+# run their ORM calls.
+#
+# With several gunicorn/uvicorn workers set PROMETHEUS_MULTIPROC_DIR to an
+# empty directory shared by the workers: each worker then writes its
+# samples there and /metrics sums them (see gunicorn.conf.py; Procfile.asgi
+# empties the directory before uvicorn starts).
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144)
+SIZE_BUCKETS = (1_000, 10_000, 50_000, 100_000, 250_000, 500_000, 1_000_000, 5_000_000)
+MAX_LOGGED_QUERIES = 200
+
+LABELS = ('view', 'method', 'status')
+
+REQUEST_SECONDS = Histogram('cms_request_duration_seconds', 'Wall time per request', LABELS,
+                            buckets=LATENCY_BUCKETS)
+REQUEST_QUERIES = Histogram('cms_request_db_queries', 'Database queries per request', LABELS,
+                            buckets=QUERY_BUCKETS)
+REQUEST_DB_SECONDS = Histogram('cms_request_db_duration_seconds', 'Time spent in database queries per request',
+                               LABELS, buckets=LATENCY_BUCKETS)
+RESPONSE_BYTES = Histogram('cms_response_size_bytes', 'Response body size (streamed responses excluded)',
+                           LABELS, buckets=SIZE_BUCKETS)
+OVER_BUDGET = Counter('cms_request_over_budget', 'Requests over the query-count or latency budget',
+                      ('view', 'budget'))
+
+
+def _mark_process_dead():
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(os.getpid())
+
+
+if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+    # gunicorn's master does this for its workers (child_exit); uvicorn has no
+    # such hook, so every worker also does it itself on the way out
+    atexit.register(_mark_process_dead)
+
+
+class RequestStats:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.statements = []
+
+
+_current = contextvars.ContextVar('cms_request_stats', default=None)
+
+
+def begin_request():
+    # Connections opened before this module was imported missed the signal
+    for connection in connections.all(initialized_only=True):
+        _install_wrapper(None, connection)
+    return _current.set(RequestStats())
+
+
+def end_request(token):
+    _current.reset(token)
+
+
+def current_stats():
+    return _current.get()
+
+
+def _record_query(execute, sql, params, many, context):
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter() - started
+        stats.queries += 1
+        stats.db_seconds += elapsed
+        if len(stats.statements) < MAX_LOGGED_QUERIES:
+            stats.statements.append((context['connection'].alias, elapsed, sql))
+
+
+def _install_wrapper(sender, connection, **kwargs):
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+connection_created.connect(_install_wrapper, dispatch_uid='cms_metrics_query_wrapper')
+
+
+def observe(view, method, status, stats, response_bytes=None):
+    """Record one finished request and log it if it went over budget."""
+    elapsed = time.perf_counter() - stats.started
+    labels = (view, method, str(status))
+    REQUEST_SECONDS.labels(*labels).observe(elapsed)
+    REQUEST_QUERIES.labels(*labels).observe(stats.queries)
+    REQUEST_DB_SECONDS.labels(*labels).observe(stats.db_seconds)
+    if response_bytes is not None:
+        RESPONSE_BYTES.labels(*labels).observe(response_bytes)
+
+    over = []
+    query_budget = getattr(settings, 'METRICS_QUERY_BUDGET', 50)
+    latency_budget_ms = getattr(settings, 'METRICS_LATENCY_BUDGET_MS', 1000)
+    if query_budget is not None and stats.queries > query_budget:
+        over.append('queries')
+    if latency_budget_ms is not None and elapsed * 1000 > latency_budget_ms:
+        over.append('latency')
+    for budget in over:
+        OVER_BUDGET.labels(view, budget).inc()
+    if over:
+        lines = [f'  [{alias}] {seconds * 1000:.1f} ms  {sql}' for alias, seconds, sql in stats.statements]
+        if stats.queries > len(stats.statements):
+            lines.append(f'  ... {stats.queries - len(stats.statements)} more')
+        logger.warning(
+            '%s %s over budget (%s): %.0f ms, %d queries, %.0f ms in the database\n%s',
+            method, view, ', '.join(over), elapsed * 1000, stats.queries, stats.db_seconds * 1000, '\n'.join(lines),
+        )
+
+
+def render():
+    """Prometheus text exposition of all metrics, summed across workers in multiprocess mode."""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,81 @@
+import time
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.utils.decorators import sync_and_async_middleware
+
+from . import metrics, routers
+
+
+def view_label(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        # WhiteNoise answers static files before URL resolution
+        return 'static' if request.path.startswith(settings.STATIC_URL) else 'unmatched'
+    return match.url_name or match.route or 'unnamed'
+
+
+@sync_and_async_middleware
+def ReadYourWritesMiddleware(get_response):
+    """
+    Track database writes per request for the replica router.
+
+    A request that wrote sets a short-lived cookie; while it is present the
+    user's reads stay on the primary, which covers the replica's lag.
+    """
+    def pinned(request):
+        try:
+            return float(request.COOKIES.get(routers.PIN_COOKIE, 0)) > time.time()
+        except ValueError:
+            return False
+
+    def finish(response, state):
+        if state.wrote:
+            lag = routers.lag_seconds()
+            response.set_cookie(routers.PIN_COOKIE, str(time.time() + lag), max_age=lag, httponly=True, samesite='Lax')
+        return response
+
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            token = routers.begin_request(pinned(request))
+            try:
+                response = await get_response(request)
+                return finish(response, routers.current_state())
+            finally:
+                routers.end_request(token)
+    else:
+        def middleware(request):
+            token = routers.begin_request(pinned(request))
+            try:
+                response = get_response(request)
+                return finish(response, routers.current_state())
+            finally:
+                routers.end_request(token)
+    return middleware
+
+
+@sync_and_async_middleware
+def MetricsMiddleware(get_response):
+    """Record wall time, query count, database time and size of every request (complaints/metrics.py)."""
+    def finish(request, response, stats):
+        size = None if response.streaming else len(response.content)
+        metrics.observe(view_label(request), request.method, response.status_code, stats, size)
+        return response
+
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            token = metrics.begin_request()
+            try:
+                response = await get_response(request)
+                return finish(request, response, metrics.current_stats())
+            finally:
+                metrics.end_request(token)
+    else:
+        def middleware(request):
+            token = metrics.begin_request()
+            try:
+                response = get_response(request)
+                return finish(request, response, metrics.current_stats())
+            finally:
+                metrics.end_request(token)
+    return middleware
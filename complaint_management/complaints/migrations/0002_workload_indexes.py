@@ -0,0 +1,37 @@
+# Generated by Django 5.2.4 on 2026-10-18 09:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('complaints', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='complaint',
+            index=models.Index(fields=['assigned_to', 'status', 'created_at'], name='complaint_assignee_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='complaint',
+            index=models.Index(fields=['assigned_to', '-created_at', '-id'], name='complaint_assignee_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='complaint',
+            index=models.Index(fields=['status', 'created_at'], name='complaint_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='complaint',
+            index=models.Index(fields=['-created_at', '-id'], name='complaint_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='complaint',
+            index=models.Index(condition=models.Q(('assigned_to__isnull', True)), fields=['-created_at', '-id'], name='complaint_unassigned_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='complaintremark',
+            index=models.Index(fields=['complaint', 'timestamp'], name='remark_complaint_ts_idx'),
+        ),
+    ]
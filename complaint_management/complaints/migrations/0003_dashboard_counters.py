@@ -0,0 +1,53 @@
+# Generated by Django 5.2.4 on 2026-10-18 09:30
+
+from django.db import migrations, models
+
+
+# A frozen copy of complaints.counters.compute_counts() as of this migration,
+# so later changes to the live module cannot change what it writes
+def populate_counters(apps, schema_editor):
+    using = schema_editor.connection.alias
+    Employee = apps.get_model('complaints', 'Employee')
+    Customer = apps.get_model('complaints', 'Customer')
+    Product = apps.get_model('complaints', 'Product')
+    Complaint = apps.get_model('complaints', 'Complaint')
+    DashboardCounter = apps.get_model('complaints', 'DashboardCounter')
+
+    complaints = Complaint.objects.using(using)
+    counts = {
+        'employees': Employee.objects.using(using).count(),
+        'customers': Customer.objects.using(using).count(),
+        'products': Product.objects.using(using).count(),
+        'complaints': 0,
+        'complaints:unassigned': 0,
+    }
+    for row in complaints.values('status').annotate(n=models.Count('id')).order_by():
+        counts[f'complaints:status:{row["status"]}'] = row['n']
+        counts['complaints'] += row['n']
+    for row in complaints.values('assigned_to').annotate(n=models.Count('id')).order_by():
+        if row['assigned_to'] is None:
+            counts['complaints:unassigned'] = row['n']
+        else:
+            counts[f'complaints:assigned:{row["assigned_to"]}'] = row['n']
+    DashboardCounter.objects.using(using).bulk_create(
+        DashboardCounter(key=key, value=value) for key, value in counts.items()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('complaints', '0002_workload_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DashboardCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=64, unique=True)),
+                ('value', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,74 @@
+# Generated by Django 5.2.4 on 2026-10-18 10:00
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+# Frozen copies of the search table and reindex statements in
+# complaints.search as of this migration
+FTS_TABLE = 'complaints_complaint_fts'
+
+PG_REINDEX_SQL = """
+    UPDATE complaints_complaint AS c
+    SET search_vector =
+        setweight(to_tsvector('english', coalesce(c.description, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(cu.name, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce((
+            SELECT string_agg(r.remark, ' ')
+            FROM complaints_complaintremark r
+            WHERE r.complaint_id = c.id
+        ), '')), 'C')
+    FROM complaints_customer AS cu
+    WHERE cu.id = c.customer_id
+"""
+
+SQLITE_REINDEX_SQL = f"""
+    INSERT INTO {FTS_TABLE} (rowid, description, customer_name, remarks)
+    SELECT c.id, c.description, cu.name, (
+        SELECT group_concat(r.remark, ' ')
+        FROM complaints_complaintremark r
+        WHERE r.complaint_id = c.id
+    )
+    FROM complaints_complaint c
+    JOIN complaints_customer cu ON cu.id = c.customer_id
+"""
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute(
+            'CREATE INDEX IF NOT EXISTS complaint_search_gin_idx '
+            'ON complaints_complaint USING gin (search_vector)'
+        )
+        schema_editor.execute(PG_REINDEX_SQL)
+    elif vendor == 'sqlite':
+        schema_editor.execute(
+            f'CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} '
+            "USING fts5(description, customer_name, remarks, tokenize = 'porter unicode61')"
+        )
+        schema_editor.execute(SQLITE_REINDEX_SQL)
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS complaint_search_gin_idx')
+    elif vendor == 'sqlite':
+        schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('complaints', '0003_dashboard_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='complaint',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.4 on 2026-10-18 10:30
+
+import math
+
+from django.db import migrations, models
+
+
+# A frozen copy of complaints.geo.cell_for() as of this migration
+CELL_DEGREES = 0.05
+LNG_CELLS = int(round(360 / CELL_DEGREES))
+
+
+def cell_for(lat, lng):
+    lat_index = int(math.floor((min(max(float(lat), -90.0), 90.0) + 90.0) / CELL_DEGREES))
+    lng_index = int(math.floor(((float(lng) + 180.0) % 360.0) / CELL_DEGREES)) % LNG_CELLS
+    return lat_index * LNG_CELLS + lng_index
+
+
+def backfill_geo_cells(apps, schema_editor):
+    Complaint = apps.get_model('complaints', 'Complaint')
+    complaints = Complaint.objects.using(schema_editor.connection.alias)
+    located = (
+        complaints.filter(location_lat__isnull=False, location_lng__isnull=False)
+        .only('id', 'location_lat', 'location_lng')
+        .order_by('id')
+    )
+    batch = []
+    for complaint in located.iterator(chunk_size=2000):
+        complaint.geo_cell = cell_for(complaint.location_lat, complaint.location_lng)
+        batch.append(complaint)
+        if len(batch) >= 2000:
+            complaints.bulk_update(batch, ['geo_cell'])
+            batch = []
+    if batch:
+        complaints.bulk_update(batch, ['geo_cell'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('complaints', '0004_complaint_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='complaint',
+            name='geo_cell',
+            field=models.BigIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_geo_cells, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='complaint',
+            index=models.Index(condition=models.Q(('assigned_to__isnull', True), ('geo_cell__isnull', False)), fields=['geo_cell'], name='complaint_unassigned_cell_idx'),
+        ),
+    ]
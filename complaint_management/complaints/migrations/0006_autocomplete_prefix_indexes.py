@@ -0,0 +1,43 @@
+# Generated by Django 5.2.4 on 2026-10-18 11:00
+
+from django.db import migrations
+
+# Case-insensitive prefix indexes for the typeahead lookups in
+# complaints/autocomplete.py (istartswith). PostgreSQL compares
+# UPPER(col::text) with LIKE, which needs text_pattern_ops to use an index
+# under a non-C collation; SQLite's LIKE only uses NOCASE indexes.
+PREFIX_INDEXES = (
+    ('customer_name_prefix_idx', 'complaints_customer', 'name'),
+    ('product_name_prefix_idx', 'complaints_product', 'name'),
+    ('user_first_name_prefix_idx', 'complaints_user', 'first_name'),
+    ('user_last_name_prefix_idx', 'complaints_user', 'last_name'),
+    ('user_username_prefix_idx', 'complaints_user', 'username'),
+)
+
+
+def create_prefix_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    for name, table, column in PREFIX_INDEXES:
+        if vendor == 'postgresql':
+            schema_editor.execute(
+                f'CREATE INDEX IF NOT EXISTS {name} ON {table} (UPPER({column}::text) text_pattern_ops)'
+            )
+        elif vendor == 'sqlite':
+            schema_editor.execute(f'CREATE INDEX IF NOT EXISTS {name} ON {table} ({column} COLLATE NOCASE)')
+
+
+def drop_prefix_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor in ('postgresql', 'sqlite'):
+        for name, table, column in PREFIX_INDEXES:
+            schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('complaints', '0005_complaint_geo_cell'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_prefix_indexes, drop_prefix_indexes),
+    ]
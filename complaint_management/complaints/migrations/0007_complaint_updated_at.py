@@ -0,0 +1,38 @@
+# Generated by Django 5.2.4 on 2026-10-18 11:30
+
+from django.db import migrations, models
+from django.db.models import Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Now
+
+
+def backfill_updated_at(apps, schema_editor):
+    # AddField stamps every existing row with the migration time. A complaint's
+    # latest remark is the last change that left a timestamp; status and
+    # assignment changes were not recorded before the event log (0008), so
+    # complaints without remarks keep the migration time rather than
+    # created_at, which could archive one closed yesterday but filed long ago.
+    Complaint = apps.get_model('complaints', 'Complaint')
+    ComplaintRemark = apps.get_model('complaints', 'ComplaintRemark')
+    latest_remark = (
+        ComplaintRemark.objects.filter(complaint=OuterRef('pk'))
+        .order_by().values('complaint').annotate(last=Max('timestamp')).values('last')
+    )
+    Complaint.objects.using(schema_editor.connection.alias).update(
+        updated_at=Coalesce(Subquery(latest_remark), Now()),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('complaints', '0006_autocomplete_prefix_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='complaint',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(backfill_updated_at, migrations.RunPython.noop),
+    ]
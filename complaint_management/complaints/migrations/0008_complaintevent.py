@@ -0,0 +1,93 @@
+# Generated by Django 5.2.4 on 2026-10-18 12:00
+
+from datetime import datetime, timezone as dt_timezone
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+# On PostgreSQL the event log is partitioned by month on occurred_at, which
+# Django cannot express, so the table is created by hand there. A
+# partitioned table's primary key must include the partition key, hence
+# (id, occurred_at); ids still come from one sequence and stay unique.
+# Other databases get the plain table from the model.
+POSTGRES_TABLE = """
+CREATE TABLE complaints_complaintevent (
+    id bigserial NOT NULL,
+    complaint_id bigint NOT NULL,
+    kind smallint NOT NULL CHECK (kind >= 0),
+    old_value varchar(20) NULL,
+    new_value varchar(20) NULL,
+    actor_id bigint NULL,
+    occurred_at timestamp with time zone NOT NULL,
+    PRIMARY KEY (id, occurred_at)
+) PARTITION BY RANGE (occurred_at)
+"""
+
+POSTGRES_INDEXES = (
+    'CREATE INDEX event_complaint_time_idx ON complaints_complaintevent (complaint_id, occurred_at, id)',
+    'CREATE INDEX event_time_idx ON complaints_complaintevent (occurred_at, id)',
+    'CREATE TABLE complaints_complaintevent_default PARTITION OF complaints_complaintevent DEFAULT',
+)
+
+
+# Partitions for this month and the next three, named like the ones
+# complaints.events.ensure_partitions() adds later. The new table is empty,
+# so they can be created in place without moving rows out of the default.
+PARTITION_MONTHS = 4
+
+
+def create_event_table(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        schema_editor.create_model(apps.get_model('complaints', 'ComplaintEvent'))
+        return
+
+    schema_editor.execute(POSTGRES_TABLE)
+    for statement in POSTGRES_INDEXES:
+        schema_editor.execute(statement)
+    now = django.utils.timezone.now()
+    low = datetime(now.year, now.month, 1, tzinfo=dt_timezone.utc)
+    for _ in range(PARTITION_MONTHS):
+        high = datetime(low.year + low.month // 12, low.month % 12 + 1, 1, tzinfo=dt_timezone.utc)
+        schema_editor.execute(
+            f'CREATE TABLE complaints_complaintevent_y{low.year}m{low.month:02d} '
+            f"PARTITION OF complaints_complaintevent FOR VALUES FROM ('{low.isoformat()}') TO ('{high.isoformat()}')"
+        )
+        low = high
+
+
+def drop_event_table(apps, schema_editor):
+    # Dropping a partitioned table drops its partitions
+    schema_editor.execute('DROP TABLE complaints_complaintevent')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('complaints', '0007_complaint_updated_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name='ComplaintEvent',
+                    fields=[
+                        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('kind', models.PositiveSmallIntegerField(choices=[(1, 'Created'), (2, 'Status changed'), (3, 'Assignment changed')])),
+                        ('old_value', models.CharField(blank=True, max_length=20, null=True)),
+                        ('new_value', models.CharField(blank=True, max_length=20, null=True)),
+                        ('occurred_at', models.DateTimeField(default=django.utils.timezone.now)),
+                        ('actor', models.ForeignKey(blank=True, db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL)),
+                        ('complaint', models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='events', to='complaints.complaint')),
+                    ],
+                    options={
+                        'indexes': [models.Index(fields=['complaint', 'occurred_at', 'id'], name='event_complaint_time_idx'), models.Index(fields=['occurred_at', 'id'], name='event_time_idx')],
+                    },
+                ),
+            ],
+        ),
+        migrations.RunPython(create_event_table, drop_event_table),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.4 on 2026-10-18 12:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('complaints', '0008_complaintevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RollupWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=64, unique=True)),
+                ('occurred_at', models.DateTimeField(blank=True, null=True)),
+                ('event_id', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ComplaintRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('complaint_level', models.CharField(max_length=10)),
+                ('assigned_count', models.PositiveIntegerField(default=0)),
+                ('assign_seconds', models.BigIntegerField(default=0)),
+                ('assign_histogram', models.JSONField(default=dict)),
+                ('closed_count', models.PositiveIntegerField(default=0)),
+                ('close_seconds', models.BigIntegerField(default=0)),
+                ('close_histogram', models.JSONField(default=dict)),
+                ('employee', models.ForeignKey(blank=True, db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='complaints.employee')),
+                ('product', models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='complaints.product')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('day', 'product', 'complaint_level', 'employee'), name='rollup_key_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,76 @@
+# Generated by Django 5.2.4 on 2026-10-18 13:00
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('complaints', '0009_sla_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedComplaint',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('complaint_level', models.CharField(choices=[('Level 1', 'Level 1'), ('Level 2', 'Level 2'), ('Level 3', 'Level 3')], max_length=10)),
+                ('description', models.TextField()),
+                ('location_lat', models.FloatField(blank=True, null=True)),
+                ('location_lng', models.FloatField(blank=True, null=True)),
+                ('status', models.CharField(choices=[('Pending', 'Pending'), ('Closed', 'Closed'), ('Not Closed', 'Not Closed')], max_length=20)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArchivedRemark',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('remark', models.TextField()),
+                ('timestamp', models.DateTimeField()),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='complaint',
+            index=models.Index(condition=models.Q(('status', 'Closed')), fields=['updated_at', 'id'], name='complaint_closed_updated_idx'),
+        ),
+        migrations.AddField(
+            model_name='archivedcomplaint',
+            name='assigned_to',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='complaints.employee'),
+        ),
+        migrations.AddField(
+            model_name='archivedcomplaint',
+            name='created_by',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='archivedcomplaint',
+            name='customer',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='complaints.customer'),
+        ),
+        migrations.AddField(
+            model_name='archivedcomplaint',
+            name='product',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='complaints.product'),
+        ),
+        migrations.AddField(
+            model_name='archivedremark',
+            name='complaint',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='remarks', to='complaints.archivedcomplaint'),
+        ),
+        migrations.AddField(
+            model_name='archivedremark',
+            name='employee',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='complaints.employee'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedremark',
+            index=models.Index(fields=['complaint', 'timestamp'], name='archived_remark_ts_idx'),
+        ),
+    ]
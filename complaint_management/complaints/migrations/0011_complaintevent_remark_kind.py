@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-18 02:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('complaints', '0010_complaint_archive'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='complaintevent',
+            name='kind',
+            field=models.PositiveSmallIntegerField(choices=[(1, 'Created'), (2, 'Status changed'), (3, 'Assignment changed'), (4, 'Remark added')]),
+        ),
+    ]
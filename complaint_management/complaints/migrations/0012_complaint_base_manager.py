@@ -0,0 +1,17 @@
+# Generated by Django 5.2.4 on 2026-10-18 03:12
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('complaints', '0011_complaintevent_remark_kind'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='complaint',
+            options={'base_manager_name': 'objects'},
+        ),
+    ]
@@ -1,5 +1,8 @@
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
 from django.contrib.auth.models import AbstractUser
+from django.contrib.postgres.search import SearchVectorField
+from . import geo
 
 # -------------------------------
 # 1. Custom User Model
@@ -60,6 +63,15 @@ class Product(models.Model):
 # -------------------------------
 # 5. Complaint
 # -------------------------------
+class ComplaintManager(models.Manager):
+    def get_queryset(self):
+        # search_vector holds the description, customer name and every
+        # remark; complaints.search only filters and ranks on it in SQL, so
+        # no query loads it (or pickles it into cached pages) unless it asks
+        # with .defer(None)
+        return super().get_queryset().defer('search_vector')
+
+
 class Complaint(models.Model):
     COMPLAINT_LEVEL_CHOICES = (
         ('Level 1', 'Level 1'),
@@ -79,14 +91,77 @@ class Complaint(models.Model):
     description = models.TextField()
     location_lat = models.FloatField(blank=True, null=True)
     location_lng = models.FloatField(blank=True, null=True)
+    # Grid cell of (location_lat, location_lng), see complaints.geo
+    geo_cell = models.BigIntegerField(blank=True, null=True, editable=False)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='Pending')
     assigned_to = models.ForeignKey(Employee, on_delete=models.SET_NULL, blank=True, null=True)
     created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='created_complaints')
     created_at = models.DateTimeField(auto_now_add=True)
+    # Row version for fragment caching; bulk writes set it explicitly
+    updated_at = models.DateTimeField(auto_now=True)
+    # Maintained by complaints.search on PostgreSQL; SQLite uses an FTS5 table instead
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = ComplaintManager()
+
+    class Meta:
+        # Related lookups (remark.complaint) defer search_vector too
+        base_manager_name = 'objects'
+        indexes = [
+            # Employee "my complaints" list and dashboard count
+            models.Index(fields=['assigned_to', 'status', 'created_at'], name='complaint_assignee_status_idx'),
+            # Same list without a status filter, keyset-paginated newest first
+            models.Index(fields=['assigned_to', '-created_at', '-id'], name='complaint_assignee_created_idx'),
+            # Admin list status filter and dashboard status counts
+            models.Index(fields=['status', 'created_at'], name='complaint_status_created_idx'),
+            # Unfiltered admin list, keyset-paginated newest first
+            models.Index(fields=['-created_at', '-id'], name='complaint_created_id_idx'),
+            # Unassigned queue, ordered the way the list pages it
+            models.Index(
+                fields=['-created_at', '-id'],
+                name='complaint_unassigned_idx',
+                condition=models.Q(assigned_to__isnull=True),
+            ),
+            # "Near me" lookups over the unassigned queue
+            models.Index(
+                fields=['geo_cell'],
+                name='complaint_unassigned_cell_idx',
+                condition=models.Q(assigned_to__isnull=True, geo_cell__isnull=False),
+            ),
+            # Archival candidates (complaints.archive), oldest first
+            models.Index(
+                fields=['updated_at', 'id'],
+                name='complaint_closed_updated_idx',
+                condition=models.Q(status='Closed'),
+            ),
+        ]
 
     def __str__(self):
         return f"Complaint #{self.id} - {self.customer.name}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the state the dashboard counters currently account for
+        if 'status' in instance.__dict__ and 'assigned_to_id' in instance.__dict__:
+            instance._counted_state = instance.counter_state()
+        return instance
+
+    def counter_state(self):
+        return (self.status, self.assigned_to_id)
+
+    def save(self, *args, **kwargs):
+        self.geo_cell = geo.cell_for(self.location_lat, self.location_lng)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            update_fields = set(update_fields) | {'updated_at'}
+            if {'location_lat', 'location_lng'} & update_fields:
+                update_fields.add('geo_cell')
+            kwargs['update_fields'] = update_fields
+        # Keep the row and its dashboard counters in one transaction
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+
 
 # -------------------------------
 # 6. Complaint Remark / Work Report
@@ -97,5 +172,154 @@ class ComplaintRemark(models.Model):
     remark = models.TextField()
     timestamp = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['complaint', 'timestamp'], name='remark_complaint_ts_idx'),
+        ]
+
     def __str__(self):
         return f"Remark by {self.employee.user.username} on Complaint #{self.complaint.id}"
+
+
+# -------------------------------
+# 7. Dashboard Counters
+# -------------------------------
+class DashboardCounter(models.Model):
+    key = models.CharField(max_length=64, unique=True)
+    value = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.key} = {self.value}"
+
+
+# -------------------------------
+# 8. Complaint Event Log
+# -------------------------------
+class ComplaintEvent(models.Model):
+    """
+    Append-only history of complaint state changes and new remarks, written
+    by complaints.events in the same transaction as the change. Partitioned by
+    month on PostgreSQL (migration 0008). The foreign keys have no database
+    constraints so that the log outlives the rows it describes.
+    """
+    CREATED = 1
+    STATUS = 2
+    ASSIGNED = 3
+    REMARK = 4
+    KIND_CHOICES = (
+        (CREATED, 'Created'),
+        (STATUS, 'Status changed'),
+        (ASSIGNED, 'Assignment changed'),
+        (REMARK, 'Remark added'),
+    )
+
+    complaint = models.ForeignKey(
+        Complaint, on_delete=models.DO_NOTHING, db_constraint=False, db_index=False, related_name='events',
+    )
+    kind = models.PositiveSmallIntegerField(choices=KIND_CHOICES)
+    # Status names, employee ids for assignments or the remark id; NULL is "none"
+    old_value = models.CharField(max_length=20, blank=True, null=True)
+    new_value = models.CharField(max_length=20, blank=True, null=True)
+    actor = models.ForeignKey(
+        User, on_delete=models.DO_NOTHING, db_constraint=False, db_index=False, blank=True, null=True,
+        related_name='+',
+    )
+    occurred_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            # History of one complaint
+            models.Index(fields=['complaint', 'occurred_at', 'id'], name='event_complaint_time_idx'),
+            # Everything in a time window, read in keyset order
+            models.Index(fields=['occurred_at', 'id'], name='event_time_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} on Complaint #{self.complaint_id}: {self.old_value} -> {self.new_value}"
+
+
+# -------------------------------
+# 9. Daily SLA Rollups
+# -------------------------------
+class ComplaintRollup(models.Model):
+    """
+    Time-to-assign and time-to-close per (day, product, level, employee),
+    folded in from ComplaintEvent by complaints.analytics. Histograms are
+    sparse {bucket: count} sketches (see analytics.BUCKET_RATIO).
+    """
+    day = models.DateField()
+    product = models.ForeignKey(
+        Product, on_delete=models.DO_NOTHING, db_constraint=False, db_index=False, related_name='+',
+    )
+    complaint_level = models.CharField(max_length=10)
+    employee = models.ForeignKey(
+        Employee, on_delete=models.DO_NOTHING, db_constraint=False, db_index=False, blank=True, null=True,
+        related_name='+',
+    )
+    assigned_count = models.PositiveIntegerField(default=0)
+    assign_seconds = models.BigIntegerField(default=0)
+    assign_histogram = models.JSONField(default=dict)
+    closed_count = models.PositiveIntegerField(default=0)
+    close_seconds = models.BigIntegerField(default=0)
+    close_histogram = models.JSONField(default=dict)
+
+    class Meta:
+        constraints = [
+            # Also the index the analytics page's date range uses
+            models.UniqueConstraint(fields=['day', 'product', 'complaint_level', 'employee'], name='rollup_key_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.day} product {self.product_id} {self.complaint_level} employee {self.employee_id}"
+
+
+class RollupWatermark(models.Model):
+    """The last ComplaintEvent (by occurred_at, id) a rollup has folded in."""
+    name = models.CharField(max_length=64, unique=True)
+    occurred_at = models.DateTimeField(blank=True, null=True)
+    event_id = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.name} @ {self.occurred_at} #{self.event_id}"
+
+
+# -------------------------------
+# 10. Archive
+# -------------------------------
+class ArchivedComplaint(models.Model):
+    """
+    A closed complaint moved out of the active table by complaints.archive,
+    with its original id. Read-only: only the admin detail page shows it.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    customer = models.ForeignKey(Customer, on_delete=models.CASCADE, related_name='+')
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='+')
+    complaint_level = models.CharField(max_length=10, choices=Complaint.COMPLAINT_LEVEL_CHOICES)
+    description = models.TextField()
+    location_lat = models.FloatField(blank=True, null=True)
+    location_lng = models.FloatField(blank=True, null=True)
+    status = models.CharField(max_length=20, choices=Complaint.STATUS_CHOICES)
+    assigned_to = models.ForeignKey(Employee, on_delete=models.SET_NULL, blank=True, null=True, related_name='+')
+    created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"Archived complaint #{self.id} - {self.customer.name}"
+
+
+class ArchivedRemark(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    complaint = models.ForeignKey(ArchivedComplaint, on_delete=models.CASCADE, related_name='remarks')
+    employee = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name='+')
+    remark = models.TextField()
+    timestamp = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['complaint', 'timestamp'], name='archived_remark_ts_idx'),
+        ]
+
+    def __str__(self):
+        return f"Archived remark on Complaint #{self.complaint_id}"
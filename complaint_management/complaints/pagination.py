@@ -0,0 +1,145 @@
+import base64
+from datetime import datetime
+
+from django.conf import settings
+from django.db.models import Q
+
+# -------------------------------
+# Keyset (cursor) pagination on (created_at, id)
+# -------------------------------
+# Any other (timestamp, id) pair works the same way; remark timelines page
+# on (timestamp, id) by passing field='timestamp'.
+
+DEFAULT_PAGE_SIZE = 25
+MAX_PAGE_SIZE = 200
+
+
+def encode_cursor(created_at, pk):
+    raw = f"{created_at.isoformat()}|{pk}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Return (created_at, id) for a cursor string, or None if it is malformed."""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, pk = base64.urlsafe_b64decode(padded.encode()).decode().split('|')
+        return datetime.fromisoformat(created_at), int(pk)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def get_page_size(request, default=None):
+    default = default or getattr(settings, 'COMPLAINTS_PAGE_SIZE', DEFAULT_PAGE_SIZE)
+    limit = getattr(settings, 'COMPLAINTS_MAX_PAGE_SIZE', MAX_PAGE_SIZE)
+    try:
+        page_size = int(request.GET.get('page_size', default))
+    except (TypeError, ValueError):
+        page_size = default
+    return max(1, min(page_size, limit))
+
+
+class CursorPage:
+    def __init__(self, object_list, next_cursor, page_size, is_first):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.page_size = page_size
+        self.is_first = is_first
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __bool__(self):
+        return bool(self.object_list)
+
+
+def _keyset_query(request, queryset, field, default_size):
+    page_size = get_page_size(request, default_size)
+    queryset = queryset.order_by(f'-{field}', '-id')
+
+    position = decode_cursor(request.GET.get('cursor'))
+    if position:
+        value, pk = position
+        queryset = queryset.filter(
+            Q(**{f'{field}__lt': value}) | Q(**{field: value, 'id__lt': pk})
+        )
+    return queryset[:page_size + 1], page_size, position is None
+
+
+def _keyset_page(rows, page_size, is_first, field):
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, field), last.pk)
+    return CursorPage(rows, next_cursor, page_size, is_first)
+
+
+def keyset_paginate(request, queryset, field='created_at', default_size=None):
+    """
+    Slice ``queryset`` newest-first using the ``cursor`` GET parameter.
+
+    The query is a single indexed range scan of ``page_size + 1`` rows; the
+    extra row only tells us whether a next page exists.
+    """
+    queryset, page_size, is_first = _keyset_query(request, queryset, field, default_size)
+    return _keyset_page(list(queryset), page_size, is_first, field)
+
+
+def keyset_slice(request, queryset, field='created_at', default_size=None):
+    """The unevaluated query keyset_paginate() runs for this request (for EXPLAIN)."""
+    return _keyset_query(request, queryset, field, default_size)[0]
+
+
+async def akeyset_paginate(request, queryset, field='created_at', default_size=None):
+    """Async version of keyset_paginate()."""
+    queryset, page_size, is_first = _keyset_query(request, queryset, field, default_size)
+    return _keyset_page([row async for row in queryset], page_size, is_first, field)
+
+
+def _offset_query(request, queryset):
+    page_size = get_page_size(request)
+    try:
+        offset = max(0, int(request.GET.get('cursor') or 0))
+    except ValueError:
+        offset = 0
+    return queryset[offset:offset + page_size + 1], page_size, offset
+
+
+def _offset_page(rows, page_size, offset):
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = str(offset + page_size)
+    return CursorPage(rows, next_cursor, page_size, is_first=offset == 0)
+
+
+def offset_paginate(request, queryset):
+    """
+    Slice an already-ordered queryset (e.g. ranked search results) by offset.
+
+    Uses the same ``cursor`` parameter as keyset_paginate, so templates and
+    links do not need to know which kind of page they are showing.
+    """
+    queryset, page_size, offset = _offset_query(request, queryset)
+    return _offset_page(list(queryset), page_size, offset)
+
+
+def offset_slice(request, queryset):
+    """The unevaluated query offset_paginate() runs for this request (for EXPLAIN)."""
+    return _offset_query(request, queryset)[0]
+
+
+async def aoffset_paginate(request, queryset):
+    """Async version of offset_paginate()."""
+    queryset, page_size, offset = _offset_query(request, queryset)
+    return _offset_page([row async for row in queryset], page_size, offset)
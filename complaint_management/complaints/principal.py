@@ -0,0 +1,72 @@
+from django.contrib.auth.backends import ModelBackend
+
+from . import caching
+from .models import Employee, User
+
+# -------------------------------
+# Request principal
+# -------------------------------
+# AuthenticationMiddleware resolves request.user from the session through
+# the backend's get_user(). PrincipalBackend answers it from the cache with
+# the user row and its employee profile, loaded together in one joined
+# query on a miss, so the role checks and request.user.employee_profile
+# cost nothing afterwards. request.user is resolved once per request.
+#
+# Each user has a version stamp of their own (namespace "user:<id>"),
+# bumped when the user or their employee profile is saved or deleted
+# (signals.py), so edits, password changes and deactivations apply on
+# the next request. With the cached_db session engine an authenticated
+# request runs no query before the view's own on a warm cache.
+
+
+def namespace(user_id):
+    return f'user:{user_id}'
+
+
+def forget(user_id):
+    """Drop the cached principal of ``user_id`` once the current transaction commits."""
+    caching.bump(namespace(user_id))
+
+
+def _principals():
+    return User.objects.select_related('employee_profile')
+
+
+def load(user_id):
+    """The user with their employee profile attached, or None."""
+    return caching.cached(
+        f'principal:{user_id}', (namespace(user_id),), lambda: _principals().filter(pk=user_id).first(),
+    )
+
+
+async def aload(user_id):
+    """Async version of load()."""
+    return await caching.acached(
+        f'principal:{user_id}', (namespace(user_id),), lambda: _principals().filter(pk=user_id).afirst(),
+    )
+
+
+def employee_of(user):
+    """``user``'s Employee profile or None, without a query when the principal carries it."""
+    if User.employee_profile.is_cached(user):
+        return User.employee_profile.related.get_cached_value(user)
+    return Employee.objects.filter(user_id=user.pk).first()
+
+
+async def aemployee_of(user):
+    """Async version of employee_of()."""
+    if User.employee_profile.is_cached(user):
+        return User.employee_profile.related.get_cached_value(user)
+    return await Employee.objects.filter(user_id=user.pk).afirst()
+
+
+class PrincipalBackend(ModelBackend):
+    """ModelBackend that resolves session users through load()."""
+
+    def get_user(self, user_id):
+        user = load(user_id)
+        return user if user is not None and self.user_can_authenticate(user) else None
+
+    async def aget_user(self, user_id):
+        user = await aload(user_id)
+        return user if user is not None and self.user_can_authenticate(user) else None
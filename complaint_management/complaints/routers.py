@@ -0,0 +1,163 @@
+import contextvars
+import random
+import time
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, InterfaceError, OperationalError, connections
+
+# -------------------------------
+# Read replicas
+# -------------------------------
+# Views decorated with @replica_reads run their queries against one of
+# settings.DATABASE_REPLICAS; everything else, and every write, uses the
+# primary. ReadYourWritesMiddleware (complaints/middleware.py) keeps a user
+# on the primary for REPLICA_LAG_SECONDS after they wrote, so they never see
+# a page older than their own change. A replica that cannot be reached is
+# skipped for REPLICA_RETRY_SECONDS and the view is served from the primary.
+
+PIN_COOKIE = 'cms_primary'
+# Read from the primary even inside @replica_reads views: the previous
+# request's session, and the flash messages kept in it, may not have
+# reached a replica yet
+PRIMARY_APPS = ('sessions',)
+
+
+class RoutingState:
+    """Per-request routing decisions, shared between the middleware, views and the router."""
+
+    def __init__(self, pinned=False):
+        self.pinned = pinned
+        self.read_alias = None
+        self.wrote = False
+
+
+_state = contextvars.ContextVar('cms_routing_state', default=None)
+_down_until = {}
+
+
+def current_state():
+    return _state.get()
+
+
+def begin_request(pinned=False):
+    return _state.set(RoutingState(pinned))
+
+
+def end_request(token):
+    _state.reset(token)
+
+
+def read_alias():
+    """The alias reads are routed to right now."""
+    state = _state.get()
+    if state is None or state.read_alias is None or state.wrote:
+        return DEFAULT_DB_ALIAS
+    return state.read_alias
+
+
+def reading_from_replica():
+    return read_alias() != DEFAULT_DB_ALIAS
+
+
+def lag_seconds():
+    return getattr(settings, 'REPLICA_LAG_SECONDS', 10)
+
+
+def mark_down(alias):
+    _down_until[alias] = time.monotonic() + getattr(settings, 'REPLICA_RETRY_SECONDS', 30)
+    connections[alias].close()
+
+
+def _reachable(alias):
+    if _down_until.get(alias, 0) > time.monotonic():
+        return False
+    try:
+        connections[alias].ensure_connection()
+    except (OperationalError, InterfaceError):
+        mark_down(alias)
+        return False
+    _down_until.pop(alias, None)
+    return True
+
+
+def choose_replica():
+    """A reachable replica alias, or None to stay on the primary."""
+    replicas = list(getattr(settings, 'DATABASE_REPLICAS', ()))
+    random.shuffle(replicas)
+    for alias in replicas:
+        if _reachable(alias):
+            return alias
+    return None
+
+
+def replica_reads(view):
+    """
+    Route the queries of a read-only view to a replica.
+
+    Falls back to the primary when the user is pinned after a write, when
+    no replica is reachable, or when the replica fails mid-request (the
+    view is read-only, so running it again is safe).
+    """
+    def should_try(state):
+        return state is not None and not state.pinned and getattr(settings, 'DATABASE_REPLICAS', ())
+
+    if iscoroutinefunction(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            state = _state.get()
+            if not should_try(state):
+                return await view(request, *args, **kwargs)
+            state.read_alias = await sync_to_async(choose_replica)()
+            try:
+                return await view(request, *args, **kwargs)
+            except (OperationalError, InterfaceError):
+                if state.read_alias is None:
+                    raise
+                await sync_to_async(mark_down)(state.read_alias)
+                state.read_alias = None
+                return await view(request, *args, **kwargs)
+            finally:
+                state.read_alias = None
+        return wrapper
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        state = _state.get()
+        if not should_try(state):
+            return view(request, *args, **kwargs)
+        state.read_alias = choose_replica()
+        try:
+            return view(request, *args, **kwargs)
+        except (OperationalError, InterfaceError):
+            if state.read_alias is None:
+                raise
+            mark_down(state.read_alias)
+            state.read_alias = None
+            return view(request, *args, **kwargs)
+        finally:
+            state.read_alias = None
+    return wrapper
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label in PRIMARY_APPS:
+            return DEFAULT_DB_ALIAS
+        return read_alias()
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        # Session rows are not something a user reads back through a page
+        if state is not None and model._meta.app_label != 'sessions':
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema through replication
+        return db == DEFAULT_DB_ALIAS or db not in getattr(settings, 'DATABASE_REPLICAS', ())
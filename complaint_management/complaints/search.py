@@ -0,0 +1,179 @@
+import contextvars
+import re
+
+from django.db import connection, transaction
+from django.db.models import F
+from django.db.models.expressions import RawSQL
+
+# -------------------------------
+# Full-text search over complaints
+# -------------------------------
+# Each complaint has one search document made of its description (weight A),
+# its customer's name (weight B) and all of its remarks (weight C).
+#
+# PostgreSQL: stored in Complaint.search_vector (tsvector, GIN indexed).
+# SQLite:     stored in the FTS5 shadow table complaints_complaint_fts, whose
+#             rowid is the complaint id.
+#
+# The documents are refreshed with one set-based statement per write, see
+# reindex() and complaints/signals.py. Remarks arrive one at a time and each
+# one re-aggregates all of its complaint's remarks, so they are queued with
+# reindex_on_commit() and refreshed together once their transaction commits.
+
+SEARCH_CONFIG = 'english'
+FTS_TABLE = 'complaints_complaint_fts'
+
+PG_REINDEX_SQL = f"""
+    UPDATE complaints_complaint AS c
+    SET search_vector =
+        setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(c.description, '')), 'A') ||
+        setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(cu.name, '')), 'B') ||
+        setweight(to_tsvector('{SEARCH_CONFIG}', coalesce((
+            SELECT string_agg(r.remark, ' ')
+            FROM complaints_complaintremark r
+            WHERE r.complaint_id = c.id
+        ), '')), 'C')
+    FROM complaints_customer AS cu
+    WHERE cu.id = c.customer_id
+"""
+
+SQLITE_REINDEX_SQL = f"""
+    INSERT INTO {FTS_TABLE} (rowid, description, customer_name, remarks)
+    SELECT c.id, c.description, cu.name, (
+        SELECT group_concat(r.remark, ' ')
+        FROM complaints_complaintremark r
+        WHERE r.complaint_id = c.id
+    )
+    FROM complaints_complaint c
+    JOIN complaints_customer cu ON cu.id = c.customer_id
+"""
+
+# Column weights for bm25(); negated so that, as on PostgreSQL, higher ranks first
+SQLITE_RANK_SQL = (
+    f'SELECT -bm25({FTS_TABLE}, 10.0, 5.0, 1.0) FROM {FTS_TABLE} '
+    f'WHERE {FTS_TABLE}.rowid = complaints_complaint.id AND {FTS_TABLE} MATCH %s'
+)
+
+
+# Complaint ids waiting for reindex_on_commit()
+_pending = contextvars.ContextVar('cms_search_pending', default=None)
+
+
+def is_supported(conn=connection):
+    return conn.vendor in ('postgresql', 'sqlite')
+
+
+def _where(complaint_ids=None, customer_id=None, after_id=None, alias='c'):
+    if after_id is not None:
+        return f' AND {alias}.id > %s', [after_id]
+    if complaint_ids is not None:
+        ids = [int(pk) for pk in complaint_ids]
+        if not ids:
+            return None, []
+        return f' AND {alias}.id IN ({", ".join(["%s"] * len(ids))})', ids
+    if customer_id is not None:
+        return f' AND {alias}.customer_id = %s', [customer_id]
+    return '', []
+
+
+def reindex(complaint_ids=None, customer_id=None, after_id=None, conn=connection):
+    """
+    Rebuild search documents for the given complaints, for every complaint of
+    one customer, for every complaint with an id above ``after_id`` (bulk
+    loads), or (with no arguments) for all complaints.
+    """
+    if not is_supported(conn):
+        return
+    where, params = _where(complaint_ids, customer_id, after_id)
+    if where is None:
+        return
+    rebuild_all = complaint_ids is None and customer_id is None and after_id is None
+
+    with conn.cursor() as cursor:
+        if conn.vendor == 'postgresql':
+            cursor.execute(PG_REINDEX_SQL + where, params)
+        else:
+            if rebuild_all:
+                cursor.execute(f'DELETE FROM {FTS_TABLE}')
+            else:
+                cursor.execute(
+                    f'DELETE FROM {FTS_TABLE} WHERE rowid IN '
+                    f'(SELECT c.id FROM complaints_complaint c WHERE 1 = 1{where})',
+                    params,
+                )
+            cursor.execute(SQLITE_REINDEX_SQL + ' WHERE 1 = 1' + where, params)
+
+
+def reindex_on_commit(complaint_ids):
+    """
+    Queue complaints for reindex() when the current transaction commits;
+    everything queued in one transaction is refreshed in one statement.
+    """
+    pending = _pending.get()
+    if pending is None:
+        pending = set()
+        _pending.set(pending)
+    pending.update(int(pk) for pk in complaint_ids)
+    transaction.on_commit(_reindex_pending)
+
+
+def _reindex_pending():
+    # The first callback of a transaction takes the whole queue; ids queued by
+    # a rolled back transaction ride along with the next commit, harmlessly
+    pending = _pending.get()
+    if pending:
+        ids = sorted(pending)
+        pending.clear()
+        reindex(complaint_ids=ids)
+
+
+def remove(complaint_ids, conn=connection):
+    """Drop search documents of deleted complaints (PostgreSQL drops them with the row)."""
+    ids = [int(pk) for pk in complaint_ids]
+    if conn.vendor != 'sqlite' or not ids:
+        return
+    with conn.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid IN ({", ".join(["%s"] * len(ids))})', ids)
+
+
+def to_fts_query(text):
+    """Turn free text into a safe FTS5 query: every word must match, the last one as a prefix."""
+    terms = re.findall(r'\w+', text)
+    if not terms:
+        return None
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += '*'
+    return ' '.join(quoted)
+
+
+def search(queryset, text):
+    """
+    Restrict a Complaint queryset to matches for ``text``, annotated with
+    ``search_rank`` and ordered best match first.
+    """
+    text = (text or '').strip()
+    if not text:
+        return queryset
+
+    if connection.vendor == 'postgresql':
+        from django.contrib.postgres.search import SearchQuery, SearchRank
+
+        query = SearchQuery(text, config=SEARCH_CONFIG, search_type='websearch')
+        return (
+            queryset.filter(search_vector=query)
+            .annotate(search_rank=SearchRank(F('search_vector'), query))
+            .order_by('-search_rank', '-id')
+        )
+
+    if connection.vendor == 'sqlite':
+        fts_query = to_fts_query(text)
+        if fts_query is None:
+            return queryset.none()
+        return (
+            queryset.filter(id__in=RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [fts_query]))
+            .annotate(search_rank=RawSQL(SQLITE_RANK_SQL, [fts_query]))
+            .order_by('-search_rank', '-id')
+        )
+
+    # Other backends: unranked substring match, newest first
+    return queryset.filter(description__icontains=text).order_by('-created_at', '-id')
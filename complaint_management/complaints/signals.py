@@ -0,0 +1,152 @@
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+from . import caching, counters, events, principal, search
+from .models import User, Employee, Customer, Product, Complaint, ComplaintRemark, ArchivedComplaint
+
+# -------------------------------
+# Dashboard counter maintenance
+# -------------------------------
+
+@receiver(pre_save, sender=Complaint)
+def complaint_pre_save(sender, instance, raw, **kwargs):
+    if raw or hasattr(instance, '_counted_state') or instance.pk is None:
+        return
+    # Instance was not loaded from the database; look up what was counted
+    instance._counted_state = (
+        Complaint.objects.filter(pk=instance.pk).values_list('status', 'assigned_to_id').first()
+    )
+
+@receiver(post_save, sender=Complaint)
+def complaint_saved(sender, instance, created, raw, **kwargs):
+    if raw:
+        return
+    old_state = None if created else getattr(instance, '_counted_state', None)
+    new_state = instance.counter_state()
+    if old_state != new_state:
+        counters.complaint_state_changed(old_state, new_state)
+    instance._counted_state = new_state
+
+@receiver(post_delete, sender=Complaint)
+def complaint_deleted(sender, instance, **kwargs):
+    old_state = getattr(instance, '_counted_state', None) or instance.counter_state()
+    counters.complaint_state_changed(old_state, None)
+
+@receiver(post_delete, sender=ArchivedComplaint)
+def archived_complaint_deleted(sender, instance, **kwargs):
+    # Archiving itself counts in bulk (bulk.complaints_archived); deletes,
+    # including cascades from customers, products and users, come one by one
+    counters.adjust({counters.ARCHIVED: -1})
+
+@receiver(post_delete, sender=Employee)
+def employee_deleted(sender, instance, **kwargs):
+    # Deleting an employee SET_NULLs their complaints without per-row signals
+    moved = counters.get_counts(counters.assigned_key(instance.pk))[counters.assigned_key(instance.pk)]
+    counters.adjust({
+        counters.TOTAL_EMPLOYEES: -1,
+        counters.assigned_key(instance.pk): -moved,
+        counters.UNASSIGNED: moved,
+    })
+
+MODEL_TOTALS = {
+    Employee: counters.TOTAL_EMPLOYEES,
+    Customer: counters.TOTAL_CUSTOMERS,
+    Product: counters.TOTAL_PRODUCTS,
+}
+
+def master_record_saved(sender, instance, created, raw, **kwargs):
+    if created and not raw:
+        counters.adjust({MODEL_TOTALS[sender]: 1})
+
+def master_record_deleted(sender, instance, **kwargs):
+    counters.adjust({MODEL_TOTALS[sender]: -1})
+
+for model in MODEL_TOTALS:
+    post_save.connect(master_record_saved, sender=model, dispatch_uid=f'counter_saved_{model.__name__}')
+for model in (Customer, Product):
+    post_delete.connect(master_record_deleted, sender=model, dispatch_uid=f'counter_deleted_{model.__name__}')
+
+# -------------------------------
+# Cache version stamps
+# -------------------------------
+
+CACHE_NAMESPACES = {
+    Complaint: (caching.COMPLAINTS,),
+    # Deleting an employee SET_NULLs their complaints in one UPDATE
+    Employee: (caching.EMPLOYEES, caching.COMPLAINTS),
+    Customer: (caching.CUSTOMERS,),
+    Product: (caching.PRODUCTS,),
+    # Remarks are part of a complaint's search document
+    ComplaintRemark: (caching.COMPLAINTS,),
+    # The dashboards count archived complaints
+    ArchivedComplaint: (caching.COMPLAINTS,),
+}
+
+def bump_cache_version(sender, **kwargs):
+    caching.bump(*CACHE_NAMESPACES[sender])
+
+for model in CACHE_NAMESPACES:
+    post_save.connect(bump_cache_version, sender=model, dispatch_uid=f'cache_saved_{model.__name__}')
+    post_delete.connect(bump_cache_version, sender=model, dispatch_uid=f'cache_deleted_{model.__name__}')
+
+# -------------------------------
+# Cached request principals
+# -------------------------------
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_principal_changed(sender, instance, **kwargs):
+    principal.forget(instance.pk)
+
+@receiver(post_save, sender=Employee)
+@receiver(post_delete, sender=Employee)
+def employee_principal_changed(sender, instance, **kwargs):
+    # The profile travels with the cached user (principal.py)
+    principal.forget(instance.user_id)
+
+# -------------------------------
+# Search documents
+# -------------------------------
+
+@receiver(post_save, sender=Complaint)
+def complaint_search_saved(sender, instance, raw, **kwargs):
+    if not raw:
+        search.reindex(complaint_ids=[instance.pk])
+
+@receiver(post_delete, sender=Complaint)
+def complaint_search_deleted(sender, instance, **kwargs):
+    search.remove([instance.pk])
+
+@receiver(post_save, sender=ComplaintRemark)
+@receiver(post_delete, sender=ComplaintRemark)
+def remark_search_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        search.reindex_on_commit([instance.complaint_id])
+
+@receiver(post_save, sender=Customer)
+def customer_search_saved(sender, instance, created, raw, **kwargs):
+    # The customer's name is part of every one of their complaints' documents
+    if not created and not raw:
+        search.reindex(customer_id=instance.pk)
+
+# -------------------------------
+# Complaint modification time
+# -------------------------------
+
+@receiver(post_save, sender=ComplaintRemark)
+@receiver(post_delete, sender=ComplaintRemark)
+def remark_touches_complaint(sender, instance, raw=False, **kwargs):
+    # A complaint's pages show its remarks, so their ETags must change with them
+    if not raw:
+        Complaint.objects.filter(pk=instance.complaint_id).update(updated_at=timezone.now())
+
+# -------------------------------
+# Complaint event log
+# -------------------------------
+
+@receiver(post_save, sender=ComplaintRemark)
+def remark_logged(sender, instance, created, raw, **kwargs):
+    # Status and assignment changes are logged by the code making them
+    # (events.record_changes); remarks are added from several places
+    if created and not raw:
+        events.record_remark(instance.complaint_id, instance.pk, actor=instance.employee.user_id)
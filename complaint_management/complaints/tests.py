@@ -1,3 +1,911 @@
-from django.test import TestCase
+import datetime
+import json
+import math
+import os
+import tempfile
+import threading
+from io import StringIO
+from unittest import skipUnless
+from unittest.mock import patch
 
-# Create your tests here.
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, connections, transaction
+from django.http import HttpResponse
+from django.test import (
+    Client, RequestFactory, TestCase, TransactionTestCase, override_settings, skipUnlessDBFeature,
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from . import analytics, archive, caching, claims, counters, events, feed, geo, principal, routers, search
+from .dispatch import Dispatcher
+from .middleware import ReadYourWritesMiddleware
+from .models import (
+    User, Employee, Customer, Product, Complaint, ComplaintRemark, ComplaintEvent, ComplaintRollup,
+    ArchivedComplaint, DashboardCounter,
+)
+from .pagination import keyset_paginate
+
+
+class ComplaintFixtures:
+    """An admin, two employees, a customer and a product, and a helper to file complaints."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('admin', password='x', role='admin')
+        cls.employees = []
+        for index in range(2):
+            user = User.objects.create_user(f'employee{index}', password='x', role='employee')
+            cls.employees.append(Employee.objects.create(user=user, phone='1', designation='Engineer', salary=1))
+        cls.customer = Customer.objects.create(name='Acme', contact_number='1', email='a@example.com', address='x')
+        cls.product = Product.objects.create(name='Printer', price=1, tax=1)
+
+    def setUp(self):
+        # Version stamps and cached pages live in the cache, outside the test transaction
+        cache.clear()
+
+    def complaint(self, **fields):
+        fields = {
+            'customer': self.customer, 'product': self.product, 'complaint_level': 'Level 1',
+            'description': 'Paper jam', 'created_by': self.admin, **fields,
+        }
+        return Complaint.objects.create(**fields)
+
+
+# -------------------------------
+# import_complaints
+# -------------------------------
+
+class ImportComplaintsTests(ComplaintFixtures, TestCase):
+    def run_import(self, text, suffix='.csv'):
+        with tempfile.NamedTemporaryFile('w', suffix=suffix, delete=False) as source:
+            source.write(text)
+        self.addCleanup(os.remove, source.name)
+        out, err = StringIO(), StringIO()
+        call_command('import_complaints', source.name, '--no-copy', stdout=out, stderr=err)
+        return out.getvalue(), err.getvalue()
+
+    def test_bad_rows_are_reported_and_skipped(self):
+        out, err = self.run_import(
+            'customer,product,complaint_level,description,created_at\n'
+            'Acme,Printer,1,Good row,2024-02-01T10:00:00\n'
+            'Acme,Printer,7,Bad level,\n'
+            'Nobody,Printer,1,Unknown customer,\n'
+            'Acme,Printer,1,Good row too,\n'
+        )
+        self.assertIn('Imported 2 rows, 2 errors', out)
+        self.assertIn("line 3: invalid complaint_level 'Level 7'", err)
+        self.assertIn("line 4: unknown customer 'Nobody'", err)
+        self.assertEqual(Complaint.objects.count(), 2)
+
+    def test_imported_rows_keep_created_at_and_are_logged(self):
+        out, err = self.run_import(
+            'customer,product,complaint_level,description,created_at,assigned_to,status\n'
+            'Acme,Printer,1,Old one,2024-02-01T10:00:00,employee0,Closed\n'
+            'Acme,Printer,2,New one,,,\n'
+        )
+        self.assertEqual(err, '')
+        old, new = Complaint.objects.order_by('id')
+        self.assertEqual(old.created_at, datetime.datetime(2024, 2, 1, 10, tzinfo=datetime.timezone.utc))
+        self.assertEqual(old.assigned_to, self.employees[0])
+        logged = ComplaintEvent.objects.order_by('complaint_id', 'kind').values_list('complaint_id', 'kind', 'new_value')
+        self.assertEqual(list(logged), [
+            (old.pk, ComplaintEvent.CREATED, 'Closed'),
+            (old.pk, ComplaintEvent.ASSIGNED, str(self.employees[0].pk)),
+            (new.pk, ComplaintEvent.CREATED, 'Pending'),
+        ])
+        self.assertEqual(counters.get_counts(counters.status_key('Closed'))[counters.status_key('Closed')], 1)
+
+    def test_impossible_created_at_is_a_row_error(self):
+        out, err = self.run_import(
+            '{"customer": "Acme", "product": "Printer", "level": 1, "description": "a", "created_at": "2024-02-30T10:00:00"}\n'
+            '{"customer": "Acme", "product": "Printer", "level": 1, "description": "b", "created_at": "2024-02-28T10:00:00"}\n',
+            suffix='.jsonl',
+        )
+        self.assertIn("line 1: invalid created_at '2024-02-30T10:00:00'", err)
+        self.assertIn('Imported 1 rows, 1 errors', out)
+        self.assertEqual(list(Complaint.objects.values_list('description', flat=True)), ['b'])
+
+
+# -------------------------------
+# save_locations
+# -------------------------------
+
+class SaveLocationsTests(ComplaintFixtures, TestCase):
+    def post(self, client, locations, **headers):
+        return client.post(reverse('save_locations'), json.dumps({'locations': locations}),
+                           content_type='application/json', headers=headers)
+
+    def test_requires_csrf_token(self):
+        complaint = self.complaint()
+        client = Client(enforce_csrf_checks=True)
+        client.force_login(self.employees[0].user)
+        location = {'complaint_id': complaint.pk, 'lat': 10.0, 'lng': 76.3}
+
+        self.assertEqual(self.post(client, [location]).status_code, 403)
+
+        client.get(reverse('unassigned_complaints'))
+        response = self.post(client, [location], **{'X-CSRFToken': client.cookies['csrftoken'].value})
+        self.assertEqual(response.json()['updated'], 1)
+        complaint.refresh_from_db()
+        self.assertEqual((complaint.location_lat, complaint.location_lng), (10.0, 76.3))
+
+    def test_rejects_non_integer_ids(self):
+        complaint = self.complaint()
+        self.client.force_login(self.employees[0].user)
+        response = self.post(self.client, [
+            {'complaint_id': True, 'lat': 10.0, 'lng': 76.3},
+            {'complaint_id': 1.5, 'lat': 10.0, 'lng': 76.3},
+            {'complaint_id': str(complaint.pk), 'lat': 11.0, 'lng': 76.3},
+        ])
+        self.assertEqual([result['status'] for result in response.json()['results']], ['error', 'error', 'updated'])
+
+
+# -------------------------------
+# Nearest complaints
+# -------------------------------
+
+class NearestTests(ComplaintFixtures, TestCase):
+    def at(self, lat, lng):
+        return self.complaint(location_lat=lat, location_lng=lng)
+
+    def nearest(self, lat, lng, limit=10):
+        return [(c.pk, c.distance_km) for c in geo.nearest(Complaint.objects.all(), lat, lng, limit=limit)]
+
+    def test_rings_grow_until_enough_are_found(self):
+        near = self.at(10.0, 76.01)  # ~1 km
+        middle = self.at(10.27, 76.0)  # ~30 km
+        far = self.at(11.35, 76.0)  # ~150 km
+        self.at(12.7, 76.0)  # ~300 km, past MAX_RADIUS_KM
+
+        with self.assertNumQueries(1):
+            self.assertEqual([pk for pk, _ in self.nearest(10.0, 76.0, limit=1)], [near.pk])
+        # 2, 4, 8, 16 and 32 km
+        with self.assertNumQueries(5):
+            self.assertEqual([pk for pk, _ in self.nearest(10.0, 76.0, limit=2)], [near.pk, middle.pk])
+        found = self.nearest(10.0, 76.0)
+        self.assertEqual([pk for pk, _ in found], [near.pk, middle.pk, far.pk])
+        self.assertEqual([round(km) for _, km in found], [1, 30, 150])
+
+    def test_search_wraps_around_the_antimeridian(self):
+        east = self.at(0.0, 179.99)
+        west = self.at(0.0, -179.99)
+        farther_west = self.at(0.0, -179.0)
+
+        self.assertEqual([pk for pk, _ in self.nearest(0.0, 179.995)], [east.pk, west.pk, farther_west.pk])
+        self.assertEqual([pk for pk, _ in self.nearest(0.0, -179.995, limit=2)], [west.pk, east.pk])
+        self.assertEqual([round(km) for _, km in self.nearest(0.0, 179.995)], [1, 2, 112])
+
+    def test_search_crosses_the_poles(self):
+        for pole in (90.0, -90.0):
+            with self.subTest(pole=pole):
+                Complaint.objects.all().delete()
+                sign = 1 if pole > 0 else -1
+                across = self.at(sign * 89.99, 180.0)  # ~2 km away, on the far side of the pole
+                beside = self.at(sign * 89.5, 90.0)  # ~55 km away
+                found = self.nearest(sign * 89.99, 0.0)
+                self.assertEqual([pk for pk, _ in found], [across.pk, beside.pk])
+                self.assertEqual([round(km) for _, km in found], [2, 56])
+
+    def test_complaints_without_coordinates_are_never_returned(self):
+        self.complaint()
+        self.at(10.0, None)
+        self.assertEqual(self.nearest(10.0, 76.0), [])
+        located = self.at(10.0, 76.0)
+        self.assertEqual(self.nearest(10.0, 76.0), [(located.pk, 0.0)])
+
+
+# -------------------------------
+# Complaint list filters
+# -------------------------------
+
+class ComplaintFilterTests(ComplaintFixtures, TestCase):
+    def test_malformed_date_is_ignored(self):
+        self.complaint()
+        self.client.force_login(self.admin)
+        for name in ('complaint_list', 'complaint_export'):
+            for value in ('2024-02-30', 'yesterday'):
+                with self.subTest(name, date=value):
+                    response = self.client.get(reverse(name), {'date': value})
+                    self.assertEqual(response.status_code, 200)
+
+    def test_date_filters_by_day(self):
+        complaint = self.complaint()
+        day = timezone.localdate(complaint.created_at)
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse('complaint_list'), {'date': day.isoformat()})
+        self.assertContains(response, f'data-complaint="{complaint.pk}"')
+        response = self.client.get(reverse('complaint_list'), {'date': (day - datetime.timedelta(days=1)).isoformat()})
+        self.assertNotContains(response, f'data-complaint="{complaint.pk}"')
+
+
+# -------------------------------
+# Full-text search
+# -------------------------------
+
+@skipUnless(search.is_supported(), 'No full-text search on this database')
+class SearchTests(ComplaintFixtures, TestCase):
+    def matches(self, text):
+        return list(search.search(Complaint.objects.all(), text).values_list('id', flat=True))
+
+    def remark(self, complaint, text):
+        return ComplaintRemark.objects.create(complaint=complaint, employee=self.employees[0], remark=text)
+
+    def test_description_outranks_customer_and_remarks(self):
+        described = self.complaint(description='Fuser overheating')
+        remarked = self.complaint()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.remark(remarked, 'Replaced the fuser')
+        self.complaint(description='Toner smudges')
+        self.assertEqual(self.matches('fuser'), [described.pk, remarked.pk])
+
+    def test_remarks_are_indexed_when_the_transaction_commits(self):
+        complaint = self.complaint()
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.remark(complaint, 'Capacitor swapped')
+            self.assertEqual(self.matches('capacitor'), [])
+        for callback in callbacks:
+            callback()
+        self.assertEqual(self.matches('capacitor'), [complaint.pk])
+
+    def test_remarks_in_one_transaction_share_one_reindex(self):
+        first, second = self.complaint(), self.complaint()
+        with patch('complaints.search.reindex', wraps=search.reindex) as reindex, \
+                self.captureOnCommitCallbacks(execute=True):
+            for complaint in (first, second, first):
+                self.remark(complaint, 'Visited site')
+        reindex.assert_called_once_with(complaint_ids=[first.pk, second.pk])
+        self.assertEqual(sorted(self.matches('visited')), [first.pk, second.pk])
+
+    def test_customer_name_matches_and_follows_renames(self):
+        complaint = self.complaint()
+        other = Customer.objects.create(name='Globex', contact_number='2', email='g@example.com', address='y')
+        self.complaint(customer=other)
+        self.assertEqual(self.matches('acme'), [complaint.pk])
+
+        self.customer.name = 'Initech'
+        self.customer.save()
+        self.assertEqual(self.matches('acme'), [])
+        self.assertEqual(self.matches('initech'), [complaint.pk])
+
+    @skipUnless(connection.vendor == 'sqlite', 'SQLite FTS5 query syntax')
+    def test_fts5_query_is_stemmed_prefixed_and_escaped(self):
+        complaint = self.complaint(description='Leaking after installation')
+        self.assertEqual(self.matches('leaks after'), [complaint.pk])
+        self.assertEqual(self.matches('"instal'), [complaint.pk])
+        self.assertEqual(self.matches('after OR NOT'), [])
+        self.assertEqual(self.matches('-- ;'), [])
+
+
+# -------------------------------
+# Live feed
+# -------------------------------
+
+@patch('complaints.feed.close_old_connections')  # _load runs in a worker thread in production
+class FeedReplayTests(ComplaintFixtures, TestCase):
+    def log_created(self, count):
+        for _ in range(count):
+            complaint = self.complaint()
+            events.record_change(complaint.pk, None, complaint.counter_state())
+        return timezone.now() - datetime.timedelta(minutes=1)
+
+    def test_too_far_behind_resets_before_loading_complaints(self, close_old_connections):
+        start = self.log_created(3)
+        with patch('complaints.feed.caching.render_rows') as render_rows, self.assertNumQueries(1):
+            self.assertIsNone(feed._load(start, set(), limit=2))
+        render_rows.assert_not_called()
+
+    def test_catch_up_within_the_limit(self, close_old_connections):
+        start = self.log_created(3)
+        missed = feed._load(start, set(), limit=3)
+        self.assertEqual([event.type for event in missed], ['created'] * 3)
+
+
+# -------------------------------
+# Automatic dispatch
+# -------------------------------
+
+class DispatchTests(ComplaintFixtures, TestCase):
+    def test_commit_batch_leaves_complaints_claimed_meanwhile(self):
+        first, second = self.complaint(), self.complaint()
+        claimed = self.complaint(assigned_to=self.employees[1])
+        plan = {self.employees[0].pk: [first.pk, claimed.pk], self.employees[1].pk: [second.pk]}
+
+        self.assertEqual(sorted(Dispatcher().commit_batch(plan)), sorted([
+            (first.pk, self.employees[0].pk), (second.pk, self.employees[1].pk),
+        ]))
+        assigned = dict(Complaint.objects.values_list('id', 'assigned_to_id'))
+        self.assertEqual(assigned, {
+            first.pk: self.employees[0].pk, second.pk: self.employees[1].pk, claimed.pk: self.employees[1].pk,
+        })
+        self.assertEqual(ComplaintEvent.objects.filter(kind=ComplaintEvent.ASSIGNED).count(), 2)
+
+    def test_run_counts_only_committed_rows(self):
+        complaints = [self.complaint() for _ in range(4)]
+        dispatcher = Dispatcher()
+        plan_batch = dispatcher.plan_batch
+
+        def plan_then_claim(batch, result):
+            plan = plan_batch(batch, result)
+            # Someone claims the first complaint by hand before the batch commits
+            Complaint.objects.filter(pk=complaints[0].pk).update(assigned_to=self.employees[1])
+            return plan
+
+        with patch.object(dispatcher, 'plan_batch', plan_then_claim):
+            result = dispatcher.run()
+
+        self.assertEqual(result.assigned, 3)
+        self.assertEqual(sum(result.per_employee.values()), 3)
+        assigned = Complaint.objects.exclude(pk=complaints[0].pk).values_list('assigned_to_id', flat=True)
+        for employee in self.employees:
+            self.assertEqual(result.per_employee.get(employee.pk, 0), list(assigned).count(employee.pk))
+            self.assertEqual(dispatcher.workers[employee.pk].open_count, result.per_employee.get(employee.pk, 0))
+
+
+# -------------------------------
+# Claiming
+# -------------------------------
+
+class ClaimTests(ComplaintFixtures, TestCase):
+    def test_only_one_employee_wins_a_complaint(self):
+        complaint = self.complaint()
+        self.assertTrue(claims.claim(complaint.pk, self.employees[0]))
+        self.assertFalse(claims.claim(complaint.pk, self.employees[1]))
+        complaint.refresh_from_db()
+        self.assertEqual(complaint.assigned_to, self.employees[0])
+
+    def test_claim_next_hands_out_each_complaint_once(self):
+        complaints = [self.complaint() for _ in range(5)]
+        first = claims.claim_next(self.employees[0], 3)
+        second = claims.claim_next(self.employees[1], 3)
+        self.assertEqual(first, [complaint.pk for complaint in complaints[:3]])
+        self.assertEqual(second, [complaint.pk for complaint in complaints[3:]])
+        self.assertEqual(claims.claim_next(self.employees[0], 3), [])
+
+    def test_claim_inside_another_claims_transaction_fails_cleanly(self):
+        complaint = self.complaint()
+        record_claims = claims._record_claims
+        rival = []
+
+        def rival_claims_first(employee, claimed):
+            # A second claimer runs while the first one's UPDATE is still uncommitted
+            if not rival:
+                rival.append(claims.claim(complaint.pk, self.employees[1]))
+            record_claims(employee, claimed)
+
+        with patch('complaints.claims._record_claims', rival_claims_first):
+            self.assertTrue(claims.claim(complaint.pk, self.employees[0]))
+        self.assertEqual(rival, [False])
+        complaint.refresh_from_db()
+        self.assertEqual(complaint.assigned_to, self.employees[0])
+        self.assertEqual(ComplaintEvent.objects.filter(kind=ComplaintEvent.ASSIGNED).count(), 1)
+
+    def test_claim_next_racing_another_claimer_never_shares_a_complaint(self):
+        complaints = [self.complaint() for _ in range(4)]
+        next_unassigned = claims.next_unassigned
+        rival = []
+
+        def rival_claims_between(count):
+            ids = list(next_unassigned(count))
+            if not rival:
+                # The rival takes the oldest rows after we picked them, before our UPDATE
+                rival.append(None)
+                rival[0] = claims.claim_next(self.employees[1], 2)
+            return ids
+
+        with patch('complaints.claims.next_unassigned', rival_claims_between):
+            mine = claims.claim_next(self.employees[0], 3)
+        self.assertEqual(rival[0], [complaints[0].pk, complaints[1].pk])
+        self.assertEqual(mine, [complaints[2].pk])
+        assigned = dict(Complaint.objects.values_list('id', 'assigned_to_id'))
+        self.assertEqual(assigned, {
+            complaints[0].pk: self.employees[1].pk, complaints[1].pk: self.employees[1].pk,
+            complaints[2].pk: self.employees[0].pk, complaints[3].pk: None,
+        })
+        self.assertEqual(ComplaintEvent.objects.filter(kind=ComplaintEvent.ASSIGNED).count(), 3)
+
+
+# Real concurrency needs row locks; SQLite serialises writers per database
+@skipUnlessDBFeature('has_select_for_update_skip_locked')
+class ConcurrentClaimTests(ComplaintFixtures, TransactionTestCase):
+    def setUp(self):
+        # TransactionTestCase empties the tables after every test and never calls setUpTestData
+        self.setUpTestData()
+        super().setUp()
+
+    def in_thread(self, func, *args):
+        def run():
+            try:
+                func(*args)
+            finally:
+                connections.close_all()
+        thread = threading.Thread(target=run)
+        thread.start()
+        return thread
+
+    def test_racing_claims_have_one_winner(self):
+        complaint = self.complaint()
+        barrier = threading.Barrier(len(self.employees))
+        results = []
+
+        def claim(employee):
+            barrier.wait()
+            results.append(claims.claim(complaint.pk, employee))
+
+        for thread in [self.in_thread(claim, employee) for employee in self.employees]:
+            thread.join()
+        self.assertEqual(sorted(results), [False, True])
+
+    def test_claim_next_skips_rows_locked_by_another_claimer(self):
+        oldest, newer = self.complaint(), self.complaint()
+        locked, release = threading.Event(), threading.Event()
+
+        def hold_oldest():
+            with transaction.atomic():
+                list(claims.next_unassigned(1))
+                locked.set()
+                release.wait(10)
+
+        holder = self.in_thread(hold_oldest)
+        try:
+            self.assertTrue(locked.wait(10))
+            self.assertEqual(claims.claim_next(self.employees[0], 2), [newer.pk])
+        finally:
+            release.set()
+            holder.join()
+        self.assertIsNone(Complaint.objects.get(pk=oldest.pk).assigned_to_id)
+
+
+# -------------------------------
+# Cursor pagination
+# -------------------------------
+
+class KeysetPaginationTests(ComplaintFixtures, TestCase):
+    def page(self, queryset, **params):
+        return keyset_paginate(RequestFactory().get('/', params), queryset)
+
+    def test_page_boundaries(self):
+        complaints = [self.complaint() for _ in range(4)]
+        newest_first = [complaint.pk for complaint in reversed(complaints)]
+
+        exact = self.page(Complaint.objects.all(), page_size=4)
+        self.assertEqual([c.pk for c in exact], newest_first)
+        self.assertFalse(exact.has_next)
+
+        first = self.page(Complaint.objects.all(), page_size=3)
+        self.assertEqual([c.pk for c in first], newest_first[:3])
+        last = self.page(Complaint.objects.all(), page_size=3, cursor=first.next_cursor)
+        self.assertEqual([c.pk for c in last], newest_first[3:])
+        self.assertFalse(last.has_next)
+        self.assertFalse(last.is_first)
+
+    def test_equal_timestamps_are_neither_skipped_nor_repeated(self):
+        complaints = [self.complaint() for _ in range(5)]
+        Complaint.objects.update(created_at=complaints[0].created_at)
+        seen, cursor = [], None
+        while True:
+            page = self.page(Complaint.objects.all(), page_size=2, **({'cursor': cursor} if cursor else {}))
+            seen.extend(c.pk for c in page)
+            if not page.has_next:
+                break
+            cursor = page.next_cursor
+        self.assertEqual(seen, sorted((c.pk for c in complaints), reverse=True))
+
+    def test_malformed_cursor_starts_over(self):
+        self.complaint()
+        page = self.page(Complaint.objects.all(), cursor='not-a-cursor')
+        self.assertTrue(page.is_first)
+        self.assertEqual(len(page), 1)
+
+    def test_list_queries_do_not_grow_with_the_page(self):
+        self.client.force_login(self.admin)
+
+        def count_queries():
+            cache.clear()
+            with CaptureQueriesContext(connection) as queries:
+                self.client.get(reverse('complaint_list'))
+            return len(queries)
+
+        self.complaint(assigned_to=self.employees[0])
+        few = count_queries()
+        for index in range(10):
+            self.complaint(assigned_to=self.employees[index % 2])
+        self.assertEqual(count_queries(), few)
+
+
+# -------------------------------
+# Dashboard counters
+# -------------------------------
+
+class CounterDriftTests(ComplaintFixtures, TestCase):
+    def assertCountersMatchTables(self):
+        stored = {key: value for key, value in DashboardCounter.objects.values_list('key', 'value') if value}
+        computed = {key: value for key, value in counters.compute_counts().items() if value}
+        self.assertEqual(stored, computed)
+
+    def test_counters_follow_every_write_path(self):
+        counters.rebuild()
+        assigned = self.complaint(assigned_to=self.employees[0])
+        contested = self.complaint()
+        for _ in range(3):
+            self.complaint()
+        self.assertCountersMatchTables()
+
+        claims.claim(contested.pk, self.employees[1])
+        claims.claim_next(self.employees[0], 2)
+        self.assertCountersMatchTables()
+
+        self.client.force_login(self.employees[0].user)
+        self.client.post(reverse('update_complaint_status', args=[assigned.pk]), {'status': 'Closed'})
+        self.assertCountersMatchTables()
+
+        Complaint.objects.filter(pk=assigned.pk).update(updated_at=timezone.now() - datetime.timedelta(days=400))
+        call_command('archive_complaints', stdout=StringIO())
+        self.assertEqual(ArchivedComplaint.objects.count(), 1)
+        self.assertCountersMatchTables()
+
+        ArchivedComplaint.objects.get().delete()
+        self.employees[1].delete()
+        Complaint.objects.filter(assigned_to__isnull=True).first().delete()
+        self.assertCountersMatchTables()
+
+    def test_zero_deltas_touch_no_counter(self):
+        DashboardCounter.objects.all().delete()
+        counters.adjust({counters.UNASSIGNED: 0, counters.TOTAL_COMPLAINTS: 2})
+        self.assertEqual(dict(DashboardCounter.objects.values_list('key', 'value')), {counters.TOTAL_COMPLAINTS: 2})
+
+
+# -------------------------------
+# Complaint event log
+# -------------------------------
+
+class EventLogTests(ComplaintFixtures, TestCase):
+    def set_status(self, complaint, status):
+        self.client.force_login(self.employees[0].user)
+        self.client.post(reverse('update_complaint_status', args=[complaint.pk]), {'status': status})
+
+    def test_status_change_writes_one_event(self):
+        complaint = self.complaint(assigned_to=self.employees[0])
+        self.set_status(complaint, 'Closed')
+        logged = ComplaintEvent.objects.filter(complaint=complaint).values_list('kind', 'old_value', 'new_value', 'actor')
+        self.assertEqual(list(logged), [(ComplaintEvent.STATUS, 'Pending', 'Closed', self.employees[0].user_id)])
+
+    def test_unchanged_status_writes_nothing(self):
+        complaint = self.complaint(assigned_to=self.employees[0])
+        self.set_status(complaint, 'Pending')
+        self.assertFalse(ComplaintEvent.objects.filter(complaint=complaint).exists())
+
+    def test_one_transition_logs_each_changed_field(self):
+        complaint = self.complaint()
+        events.record_change(complaint.pk, ('Pending', None), ('Closed', self.employees[1].pk))
+        self.assertEqual(
+            sorted(ComplaintEvent.objects.filter(complaint=complaint).values_list('kind', 'old_value', 'new_value')),
+            [(ComplaintEvent.STATUS, 'Pending', 'Closed'), (ComplaintEvent.ASSIGNED, None, str(self.employees[1].pk))],
+        )
+
+
+# -------------------------------
+# SLA rollups
+# -------------------------------
+
+class RollupTests(ComplaintFixtures, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.now = timezone.now()
+
+    def handled(self, days_ago, hours_to_assign, hours_to_close, employee=0):
+        """A complaint filed ``days_ago``, with its first assignment and closing logged that many hours later."""
+        employee = self.employees[employee]
+        complaint = self.complaint()
+        created_at = self.now - datetime.timedelta(days=days_ago)
+        Complaint.objects.filter(pk=complaint.pk).update(created_at=created_at, assigned_to=employee, status='Closed')
+        ComplaintEvent.objects.bulk_create([
+            ComplaintEvent(complaint=complaint, kind=ComplaintEvent.ASSIGNED, new_value=str(employee.pk),
+                           occurred_at=created_at + datetime.timedelta(hours=hours_to_assign)),
+            ComplaintEvent(complaint=complaint, kind=ComplaintEvent.STATUS, old_value='Pending', new_value='Closed',
+                           occurred_at=created_at + datetime.timedelta(hours=hours_to_close)),
+        ])
+
+    def rollups(self):
+        return {
+            (row.day, row.product_id, row.complaint_level, row.employee_id): (
+                row.assigned_count, row.assign_seconds, {int(b): n for b, n in row.assign_histogram.items()},
+                row.closed_count, row.close_seconds, {int(b): n for b, n in row.close_histogram.items()},
+            )
+            for row in ComplaintRollup.objects.all()
+        }
+
+    def test_incremental_runs_match_a_full_rebuild(self):
+        for index, hours in enumerate((1, 5, 20, 30, 47)):
+            self.handled(5, hours / 2, hours, employee=index % 2)
+        self.assertEqual(analytics.update_rollups(batch_size=3, settle_seconds=0), 10)
+
+        # Newer events, some for the same days and employees and one pair at
+        # the same instant, straddling the next run's batches
+        for index, hours in enumerate((2, 2, 10, 36)):
+            self.handled(2, 1, hours, employee=index % 2)
+        self.assertEqual(analytics.update_rollups(batch_size=3, settle_seconds=0), 8)
+        incremental = self.rollups()
+
+        analytics.reset_rollups()
+        self.assertEqual(analytics.update_rollups(settle_seconds=0), 18)
+        self.assertEqual(self.rollups(), incremental)
+        self.assertEqual(sum(row[3] for row in incremental.values()), 9)
+
+    def test_percentiles_of_a_known_set(self):
+        for hours in range(1, 11):
+            self.handled(2, 0.5, hours)
+        analytics.update_rollups(settle_seconds=0)
+        today = timezone.localdate()
+        _, (assign, close) = analytics.report(today - datetime.timedelta(days=3), today, 'day')
+
+        self.assertEqual((assign['count'], assign['mean']), (10, 1800))
+        self.assertEqual((close['count'], close['mean']), (10, 5.5 * 3600))
+        # Each estimate is within one bucket of the exact value
+        for estimate, exact in ((assign['p50'], 1800), (close['p50'], 5 * 3600), (close['p90'], 9 * 3600)):
+            self.assertLessEqual(abs(math.log(estimate / exact)), math.log(analytics.BUCKET_RATIO))
+
+    def test_percentile_edges(self):
+        self.assertIsNone(analytics.percentile({}, 0.5))
+        histogram = {analytics.bucket_for(60): 1}
+        self.assertEqual(analytics.percentile(histogram, 0.0), analytics.percentile(histogram, 1.0))
+        self.assertEqual(analytics.bucket_for(0), 0)
+
+
+# -------------------------------
+# Archiving
+# -------------------------------
+
+class ArchiveTests(ComplaintFixtures, TestCase):
+    def closed(self, days_ago, **fields):
+        complaint = self.complaint(status='Closed', assigned_to=self.employees[0], **fields)
+        return self.age(complaint, days_ago)
+
+    def age(self, complaint, days_ago):
+        Complaint.objects.filter(pk=complaint.pk).update(updated_at=timezone.now() - datetime.timedelta(days=days_ago))
+        complaint.refresh_from_db()
+        return complaint
+
+    def test_only_closed_complaints_past_the_cutoff_move(self):
+        old = self.closed(200)
+        recent = self.closed(10)
+        still_open = self.age(self.complaint(), 200)
+
+        self.assertEqual(archive.archive(days=180), 1)
+        self.assertEqual(list(ArchivedComplaint.objects.values_list('id', flat=True)), [old.pk])
+        self.assertCountEqual(Complaint.objects.values_list('id', flat=True), [recent.pk, still_open.pk])
+
+    def test_cutoff_is_exclusive(self):
+        complaint = self.closed(200)
+        self.assertFalse(archive.candidates(complaint.updated_at).exists())
+        self.assertTrue(archive.candidates(complaint.updated_at + datetime.timedelta(microseconds=1)).exists())
+
+    def test_archived_complaint_reads_back_unchanged(self):
+        complaint = self.complaint(status='Closed', assigned_to=self.employees[0], description='Fuser replaced',
+                                   location_lat=9.93, location_lng=76.27)
+        remark = ComplaintRemark.objects.create(complaint=complaint, employee=self.employees[0], remark='Tested OK')
+        complaint = self.age(complaint, 200)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            archive.archive(days=180)
+
+        self.assertFalse(Complaint.objects.filter(pk=complaint.pk).exists())
+        self.assertFalse(ComplaintRemark.objects.exists())
+        archived = archive.archived_complaint(complaint.pk)
+        for field in archive.COMPLAINT_FIELDS:
+            self.assertEqual(getattr(archived, field), getattr(complaint, field), field)
+        self.assertEqual(
+            [(r.pk, r.remark, r.timestamp) for r in archive.archived_timeline(complaint.pk)],
+            [(remark.pk, remark.remark, remark.timestamp)],
+        )
+        self.assertEqual(
+            counters.get_counts(counters.TOTAL_COMPLAINTS, counters.ARCHIVED, counters.status_key('Closed')),
+            {counters.TOTAL_COMPLAINTS: 0, counters.ARCHIVED: 1, counters.status_key('Closed'): 0},
+        )
+
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse('complaint_detail', args=[complaint.pk]))
+        self.assertContains(response, 'Fuser replaced')
+        self.assertContains(response, 'Tested OK')
+
+
+# -------------------------------
+# Cache invalidation
+# -------------------------------
+
+class CacheInvalidationTests(ComplaintFixtures, TestCase):
+    def test_versions_move_only_when_the_write_commits(self):
+        before = caching.get_versions(caching.COMPLAINTS)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.complaint()
+            self.assertEqual(caching.get_versions(caching.COMPLAINTS), before)
+        self.assertNotEqual(caching.get_versions(caching.COMPLAINTS), before)
+
+    def test_rolled_back_write_keeps_the_cache(self):
+        before = caching.get_versions(caching.COMPLAINTS)
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                self.complaint()
+                raise RuntimeError
+        self.assertEqual(callbacks, [])
+        self.assertEqual(caching.get_versions(caching.COMPLAINTS), before)
+
+    def test_cached_list_shows_a_committed_complaint(self):
+        self.client.force_login(self.admin)
+        self.assertNotContains(self.client.get(reverse('complaint_list')), 'data-complaint=')
+        with self.captureOnCommitCallbacks(execute=True):
+            complaint = self.complaint()
+        self.assertContains(self.client.get(reverse('complaint_list')), f'data-complaint="{complaint.pk}"')
+
+
+# -------------------------------
+# Conditional GET
+# -------------------------------
+
+class NotModifiedTests(ComplaintFixtures, TestCase):
+    def revalidate(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return self.client.get(url, headers={'If-None-Match': response['ETag']})
+
+    def test_unchanged_complaint_answers_304(self):
+        complaint = self.complaint()
+        self.client.force_login(self.admin)
+        url = reverse('complaint_detail', args=[complaint.pk])
+        response = self.revalidate(url)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+    def test_changed_complaint_renders_again(self):
+        complaint = self.complaint()
+        self.client.force_login(self.admin)
+        url = reverse('complaint_detail', args=[complaint.pk])
+        etag = self.client.get(url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            complaint.description = 'Toner leak'
+            complaint.save()
+        response = self.client.get(url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Toner leak')
+
+    def test_unchanged_list_page_answers_304(self):
+        self.complaint(assigned_to=self.employees[0])
+        self.client.force_login(self.employees[0].user)
+        url = reverse('assigned_complaints')
+        self.client.get(url)  # sets the CSRF cookie the ETag covers
+        self.assertEqual(self.revalidate(url).status_code, 304)
+
+    def test_validated_pages_are_private_and_revalidated(self):
+        complaint = self.complaint()
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse('complaint_detail', args=[complaint.pk]))
+        self.assertIn('private', response['Cache-Control'])
+        self.assertIn('no-cache', response['Cache-Control'])
+        self.assertIn('Last-Modified', response)
+
+
+# -------------------------------
+# Read replicas
+# -------------------------------
+
+class ReplicaRoutingTests(ComplaintFixtures, TestCase):
+    router = routers.ReplicaRouter()
+
+    def read_from(self, request=None):
+        """Run a @replica_reads view behind ReadYourWritesMiddleware; returns where its reads went."""
+        reads = {}
+
+        @routers.replica_reads
+        def view(request):
+            reads['complaint'] = self.router.db_for_read(Complaint)
+            reads['session'] = self.router.db_for_read(Session)
+            return HttpResponse()
+
+        ReadYourWritesMiddleware(view)(request or RequestFactory().get('/'))
+        return reads
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_reads_use_the_primary_without_replicas(self):
+        self.assertEqual(self.read_from(), {'complaint': 'default', 'session': 'default'})
+
+    @override_settings(DATABASE_REPLICAS=['replica1'])
+    def test_unreachable_replica_falls_back_to_the_primary(self):
+        with patch('complaints.routers._reachable', return_value=False):
+            self.assertEqual(self.read_from()['complaint'], 'default')
+
+    @override_settings(DATABASE_REPLICAS=['replica1'])
+    @patch('complaints.routers._reachable', return_value=True)
+    def test_sessions_are_read_from_the_primary_in_replica_views(self, reachable):
+        self.assertEqual(self.read_from(), {'complaint': 'replica1', 'session': 'default'})
+
+    @override_settings(DATABASE_REPLICAS=['replica1'])
+    @patch('complaints.routers._reachable', return_value=True)
+    def test_user_stays_on_the_primary_after_a_write(self, reachable):
+        reads = []
+
+        @routers.replica_reads
+        def write_then_read(request):
+            reads.append(routers.read_alias())
+            self.complaint()
+            reads.append(routers.read_alias())
+            return HttpResponse()
+
+        response = ReadYourWritesMiddleware(write_then_read)(RequestFactory().post('/'))
+        self.assertEqual(reads, ['replica1', 'default'])
+
+        pinned = RequestFactory().get('/')
+        pinned.COOKIES[routers.PIN_COOKIE] = response.cookies[routers.PIN_COOKIE].value
+        self.assertEqual(self.read_from(pinned)['complaint'], 'default')
+        self.assertEqual(self.read_from()['complaint'], 'replica1')
+
+
+# -------------------------------
+# Cached request principals
+# -------------------------------
+
+class PrincipalCacheTests(ComplaintFixtures, TestCase):
+    backend = principal.PrincipalBackend()
+
+    def setUp(self):
+        super().setUp()
+        self.employee = self.employees[0]
+        self.user = self.employee.user
+        self.backend.get_user(self.user.pk)  # warm the cache
+
+    def save(self, instance):
+        with self.captureOnCommitCallbacks(execute=True):
+            instance.save()
+
+    def test_principal_is_served_from_the_cache(self):
+        with self.assertNumQueries(0):
+            user = self.backend.get_user(self.user.pk)
+        self.assertEqual(principal.employee_of(user), self.employee)
+
+    def test_role_change_applies_on_the_next_lookup(self):
+        self.user.role = 'admin'
+        self.save(self.user)
+        self.assertEqual(self.backend.get_user(self.user.pk).role, 'admin')
+
+    def test_deactivated_user_is_signed_out(self):
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(reverse('employee_dashboard')).status_code, 200)
+        self.user.is_active = False
+        self.save(self.user)
+        self.assertIsNone(self.backend.get_user(self.user.pk))
+        self.assertEqual(self.client.get(reverse('employee_dashboard')).status_code, 302)
+
+    def test_employee_profile_changes_travel_with_the_principal(self):
+        self.employee.designation = 'Team Lead'
+        self.save(self.employee)
+        user = self.backend.get_user(self.user.pk)
+        self.assertEqual(principal.employee_of(user).designation, 'Team Lead')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.employee.delete()
+        user = self.backend.get_user(self.user.pk)
+        with self.assertNumQueries(0):
+            self.assertIsNone(principal.employee_of(user))
+
+
+# -------------------------------
+# Monitoring
+# -------------------------------
+
+class MetricsAccessTests(TestCase):
+    @override_settings(DEBUG=False, METRICS_TOKEN=None, METRICS_INTERNAL=False)
+    def test_hidden_without_token_in_production(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 404)
+
+    @override_settings(DEBUG=False, METRICS_TOKEN=None, METRICS_INTERNAL=True)
+    def test_internal_deployment_needs_no_token(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 200)
+
+    @override_settings(DEBUG=False, METRICS_TOKEN='s3cret', METRICS_INTERNAL=False)
+    def test_token_is_required_when_set(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 401)
+        response = self.client.get(reverse('metrics'), headers={'Authorization': 'Bearer s3cret'})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'cms_request_duration_seconds', response.content)
@@ -1,13 +1,22 @@
 from django.shortcuts import render, redirect, get_object_or_404
+from django.conf import settings
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib import messages
-from django.http import JsonResponse
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
+from django.db import transaction
 from django.db.models import Q, Count
+from django.utils import timezone
 from django.contrib.auth.models import User
-from .models import User as CustomUser, Employee, Customer, Product, Complaint, ComplaintRemark
+from .models import User as CustomUser, Employee, Customer, Product, Complaint, ComplaintRemark, ArchivedComplaint
 from .forms import LoginForm, EmployeeForm, CustomerForm, ProductForm, ComplaintForm, ComplaintRemarkForm
+from .pagination import keyset_paginate, offset_paginate, get_page_size
+from .routers import replica_reads
+from .conditional import complaint_validator, conditional, page_validator
+from . import analytics, archive, autocomplete, caching, claims, counters, events, geo, metrics as request_metrics, routers, search as complaint_search
+import csv
+import datetime
 import json
 
 # -------------------------------
@@ -46,27 +55,37 @@ def is_admin(user):
 
 @login_required
 @user_passes_test(is_admin)
+@replica_reads
 def admin_dashboard(request):
-    total_employees = Employee.objects.count()
-    total_customers = Customer.objects.count()
-    total_products = Product.objects.count()
-    total_complaints = Complaint.objects.count()
-    pending_complaints = Complaint.objects.filter(status='Pending').count()
-    closed_complaints = Complaint.objects.filter(status='Closed').count()
-    
+    counts = caching.cached(
+        'admin_dashboard',
+        (caching.COMPLAINTS, caching.EMPLOYEES, caching.CUSTOMERS, caching.PRODUCTS),
+        lambda: counters.get_counts(
+            counters.TOTAL_EMPLOYEES,
+            counters.TOTAL_CUSTOMERS,
+            counters.TOTAL_PRODUCTS,
+            counters.TOTAL_COMPLAINTS,
+            counters.status_key('Pending'),
+            counters.status_key('Closed'),
+            counters.ARCHIVED,
+        ),
+    )
+
     context = {
-        'total_employees': total_employees,
-        'total_customers': total_customers,
-        'total_products': total_products,
-        'total_complaints': total_complaints,
-        'pending_complaints': pending_complaints,
-        'closed_complaints': closed_complaints,
+        'total_employees': counts[counters.TOTAL_EMPLOYEES],
+        'total_customers': counts[counters.TOTAL_CUSTOMERS],
+        'total_products': counts[counters.TOTAL_PRODUCTS],
+        # Archived complaints are all closed
+        'total_complaints': counts[counters.TOTAL_COMPLAINTS] + counts[counters.ARCHIVED],
+        'pending_complaints': counts[counters.status_key('Pending')],
+        'closed_complaints': counts[counters.status_key('Closed')] + counts[counters.ARCHIVED],
     }
     return render(request, 'admin_section/dashboard.html', context)
 
 # Employee Management
 @login_required
 @user_passes_test(is_admin)
+@replica_reads
 def employee_list(request):
     employees = Employee.objects.all()
     return render(request, 'admin_section/employee_list.html', {'employees': employees})
@@ -116,6 +135,7 @@ def employee_delete(request, pk):
 # Customer Management
 @login_required
 @user_passes_test(is_admin)
+@replica_reads
 def customer_list(request):
     customers = Customer.objects.all()
     return render(request, 'admin_section/customer_list.html', {'customers': customers})
@@ -160,6 +180,7 @@ def customer_delete(request, pk):
 # Product Management
 @login_required
 @user_passes_test(is_admin)
+@replica_reads
 def product_list(request):
     products = Product.objects.all()
     return render(request, 'admin_section/product_list.html', {'products': products})
@@ -202,17 +223,14 @@ def product_delete(request, pk):
     return render(request, 'admin_section/product_confirm_delete.html', {'product': product})
 
 # Complaint Management
-@login_required
-@user_passes_test(is_admin)
-def complaint_list(request):
-    complaints = Complaint.objects.all().order_by('-created_at')
-
-    # Get filter values from GET request
-    assigned_to = request.GET.get('assigned_to')
-    status = request.GET.get('status')
-    date = request.GET.get('date')
-    product = request.GET.get('product')
-    customer = request.GET.get('customer')
+def filter_complaints(complaints, params):
+    """Apply the admin complaint list filters (also used by the export)."""
+    assigned_to = params.get('assigned_to')
+    status = params.get('status')
+    # Malformed values are ignored rather than turned into a 500
+    date = parse_day(params.get('date'), None)
+    product = params.get('product')
+    customer = params.get('customer')
 
     if assigned_to:
         complaints = complaints.filter(assigned_to__id=assigned_to)
@@ -224,19 +242,109 @@ def complaint_list(request):
         complaints = complaints.filter(product__id=product)
     if customer:
         complaints = complaints.filter(customer__id=customer)
+    return complaints
+
+def complaint_list_queryset(params):
+    """The admin complaint list before paging; ranked by match when searching."""
+    complaints = Complaint.objects.select_related('customer', 'product', 'assigned_to__user')
+    complaints = filter_complaints(complaints, params)
+    if params.get('search'):
+        return complaint_search.search(complaints, params['search'])
+    return complaints
+
+FILTER_PICKERS = {'assigned_to': 'employees', 'product': 'products', 'customer': 'customers'}
+
+def complaint_list_page(request):
+    def load_page():
+        complaints = complaint_list_queryset(request.GET)
+        if request.GET.get('search'):
+            return offset_paginate(request, complaints)
+        return keyset_paginate(request, complaints)
+
+    return caching.cached(
+        'complaint_list',
+        (caching.COMPLAINTS, caching.EMPLOYEES, caching.CUSTOMERS, caching.PRODUCTS),
+        load_page,
+        params=request.GET.dict(),
+    )
 
-    # For filter dropdowns
-    employees = Employee.objects.all()
-    products = Product.objects.all()
-    customers = Customer.objects.all()
+@login_required
+@user_passes_test(is_admin)
+@replica_reads
+@conditional(page_validator(complaint_list_page))
+def complaint_list(request):
+    page = complaint_list_page(request)
+
+    # Labels for the selected filters; the pickers look everything else up as the user types
+    selected = {
+        param: autocomplete.label(kind, request.GET[param])
+        for param, kind in FILTER_PICKERS.items() if request.GET.get(param)
+    }
 
     return render(request, 'admin_section/complaint_list.html', {
-        'complaints': complaints,
-        'employees': employees,
-        'products': products,
-        'customers': customers,
+        'complaints': page,
+        'page': page,
+        'rows': caching.render_rows('partials/complaint_row_admin.html', page),
+        'selected': selected,
     })
 
+EXPORT_COLUMNS = (
+    ('id', 'id'),
+    ('created_at', 'created_at'),
+    ('customer', 'customer__name'),
+    ('customer_contact', 'customer__contact_number'),
+    ('product', 'product__name'),
+    ('complaint_level', 'complaint_level'),
+    ('status', 'status'),
+    ('assigned_to', 'assigned_to__user__username'),
+    ('location_lat', 'location_lat'),
+    ('location_lng', 'location_lng'),
+    ('description', 'description'),
+)
+
+class Echo:
+    """File-like object whose write() hands the line back to the csv writer's caller."""
+    def write(self, value):
+        return value
+
+def export_queryset(params):
+    complaints = filter_complaints(Complaint.objects.all(), params)
+    search = params.get('search')
+    if search:
+        return complaint_search.search(complaints, search)
+    return complaints.order_by('-created_at', '-id')
+
+def export_rows(complaints, export_format):
+    names = [name for name, _ in EXPORT_COLUMNS]
+    # Related names come from the same joined query; iterator() streams
+    # through a server-side cursor where the backend has one
+    rows = complaints.values_list(*[lookup for _, lookup in EXPORT_COLUMNS]).iterator(chunk_size=2000)
+
+    if export_format == 'jsonl':
+        for row in rows:
+            record = dict(zip(names, row))
+            record['created_at'] = record['created_at'].isoformat()
+            yield json.dumps(record) + '\n'
+        return
+
+    writer = csv.writer(Echo())
+    yield writer.writerow(names)
+    for row in rows:
+        yield writer.writerow(row)
+
+@login_required
+@user_passes_test(is_admin)
+@replica_reads
+def complaint_export(request):
+    export_format = 'jsonl' if request.GET.get('format') == 'jsonl' else 'csv'
+    # The rows are read while streaming, after the view (and its routing) returned
+    complaints = export_queryset(request.GET).using(routers.read_alias())
+
+    content_type = 'application/x-ndjson' if export_format == 'jsonl' else 'text/csv'
+    response = StreamingHttpResponse(export_rows(complaints, export_format), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="complaints.{export_format}"'
+    return response
+
 @login_required
 @user_passes_test(is_admin)
 def complaint_create(request):
@@ -245,7 +353,9 @@ def complaint_create(request):
         if form.is_valid():
             complaint = form.save(commit=False)
             complaint.created_by = request.user
-            complaint.save()
+            with transaction.atomic():
+                complaint.save()
+                events.record_change(complaint.pk, None, complaint.counter_state(), actor=request.user)
             messages.success(request, 'Complaint registered successfully')
             return redirect('complaint_list')
     else:
@@ -257,9 +367,12 @@ def complaint_create(request):
 def complaint_edit(request, pk):
     complaint = get_object_or_404(Complaint, pk=pk)
     if request.method == 'POST':
+        old_state = complaint.counter_state()
         form = ComplaintForm(request.POST, instance=complaint)
         if form.is_valid():
-            form.save()
+            with transaction.atomic():
+                complaint = form.save()
+                events.record_change(complaint.pk, old_state, complaint.counter_state(), actor=request.user)
             messages.success(request, 'Complaint updated successfully')
             return redirect('complaint_list')
     else:
@@ -268,10 +381,21 @@ def complaint_edit(request, pk):
 
 @login_required
 @user_passes_test(is_admin)
+@replica_reads
+@conditional(complaint_validator)
 def complaint_detail(request, pk):
-    complaint = get_object_or_404(Complaint, pk=pk)
-    remarks = complaint.remarks.all().order_by('-timestamp')
-    return render(request, 'admin_section/complaint_detail.html', {'complaint': complaint, 'remarks': remarks})
+    complaint = Complaint.objects.select_related('customer', 'product', 'assigned_to__user').filter(pk=pk).first()
+    if complaint is None:
+        complaint = archive.archived_complaint(pk)
+        if complaint is None:
+            raise Http404('No complaint matches the given query.')
+        timeline, archived = archive.archived_timeline(pk), True
+    else:
+        timeline, archived = remark_timeline(pk), False
+    remarks = keyset_paginate(request, timeline, field='timestamp', default_size=settings.REMARKS_PAGE_SIZE)
+    return render(request, 'admin_section/complaint_detail.html', {
+        'complaint': complaint, 'remarks': remarks, 'archived': archived,
+    })
 
 @login_required
 @user_passes_test(is_admin)
@@ -281,13 +405,70 @@ def assign_complaint(request, pk):
         employee_id = request.POST.get('employee_id')
         if employee_id:
             employee = get_object_or_404(Employee, pk=employee_id)
-            complaint.assigned_to = employee
-            complaint.save()
+            with transaction.atomic():
+                # Lock the row and write only the assignment so a concurrent status change survives
+                complaint = Complaint.objects.select_for_update().get(pk=pk)
+                old_state = complaint.counter_state()
+                complaint.assigned_to = employee
+                complaint.save(update_fields=['assigned_to'])
+                events.record_change(pk, old_state, complaint.counter_state(), actor=request.user)
             messages.success(request, f'Complaint assigned to {employee.user.get_full_name()}')
         return redirect('complaint_detail', pk=pk)
     
-    employees = Employee.objects.all()
-    return render(request, 'admin_section/assign_complaint.html', {'complaint': complaint, 'employees': employees})
+    return render(request, 'admin_section/assign_complaint.html', {'complaint': complaint})
+
+# Analytics
+ANALYTICS_DAYS = 30
+
+def parse_day(value, default):
+    try:
+        return datetime.date.fromisoformat(value) if value else default
+    except ValueError:
+        return default
+
+def sla_summary(summary):
+    return {
+        'count': summary['count'],
+        'mean': analytics.format_duration(summary['mean']),
+        'p50': analytics.format_duration(summary['p50']),
+        'p90': analytics.format_duration(summary['p90']),
+    }
+
+def sla_report(start, end, group):
+    grouped, (assign, close) = analytics.report(start, end, group)
+    names = analytics.labels(group, [key for key, _, _ in grouped])
+    rows = [
+        {'label': names.get(key, f'#{key}'), 'assign': sla_summary(assign), 'close': sla_summary(close)}
+        for key, assign, close in grouped
+    ]
+    return rows, {'assign': sla_summary(assign), 'close': sla_summary(close)}
+
+@login_required
+@user_passes_test(is_admin)
+@replica_reads
+def sla_analytics(request):
+    end = parse_day(request.GET.get('end'), timezone.localdate())
+    start = parse_day(request.GET.get('start'), end - datetime.timedelta(days=ANALYTICS_DAYS - 1))
+    start, end = min(start, end), max(start, end)
+    group = request.GET.get('group')
+    if group not in analytics.GROUPS:
+        group = 'product'
+
+    rows, total = caching.cached(
+        'sla_analytics',
+        (analytics.ANALYTICS, caching.PRODUCTS, caching.EMPLOYEES),
+        lambda: sla_report(start, end, group),
+        params={'start': start.isoformat(), 'end': end.isoformat(), 'group': group},
+    )
+    return render(request, 'admin_section/analytics.html', {
+        'rows': rows,
+        'total': total,
+        'start': start,
+        'end': end,
+        'group': group,
+        'groups': list(analytics.GROUPS),
+        'updated_until': analytics.last_update(),
+    })
 
 # -------------------------------
 # Employee Views
@@ -298,15 +479,19 @@ def is_employee(user):
 
 @login_required
 @user_passes_test(is_employee)
+@replica_reads
 def employee_dashboard(request):
     try:
         employee = request.user.employee_profile
-        assigned_complaints = Complaint.objects.filter(assigned_to=employee).count()
-        unassigned_complaints = Complaint.objects.filter(assigned_to__isnull=True).count()
+        counts = caching.cached(
+            f'employee_dashboard:{employee.pk}',
+            (caching.COMPLAINTS,),
+            lambda: counters.get_counts(counters.assigned_key(employee.pk), counters.UNASSIGNED),
+        )
         
         context = {
-            'assigned_complaints': assigned_complaints,
-            'unassigned_complaints': unassigned_complaints,
+            'assigned_complaints': counts[counters.assigned_key(employee.pk)],
+            'unassigned_complaints': counts[counters.UNASSIGNED],
         }
     except Employee.DoesNotExist:
         context = {
@@ -316,35 +501,84 @@ def employee_dashboard(request):
     
     return render(request, 'employees/dashboard.html', context)
 
-@login_required
-@user_passes_test(is_employee)
-def assigned_complaints(request):
+def assigned_queryset(employee, params):
+    """An employee's complaints before paging; ranked by match when searching."""
+    complaints = Complaint.objects.filter(assigned_to=employee).select_related('customer', 'product')
+    
+    # Get filter values from GET request
+    status = params.get('status')
+    date = parse_day(params.get('date'), None)
+    search = params.get('search')
+
+    # Apply filters if present
+    if status:
+        complaints = complaints.filter(status=status)
+    if date:
+        complaints = complaints.filter(created_at__date=date)
+    if search:
+        complaints = complaint_search.search(complaints, search)
+    return complaints
+
+def assigned_complaints_page(request):
     try:
         employee = request.user.employee_profile
-        complaints = Complaint.objects.filter(assigned_to=employee).order_by('-created_at')
-        
-        # Get filter values from GET request
-        status = request.GET.get('status')
-        date = request.GET.get('date')
-        search = request.GET.get('search')
-
-        # Apply filters if present
-        if status:
-            complaints = complaints.filter(status=status)
-        if date:
-            complaints = complaints.filter(created_at__date=date)
-        if search:
-            complaints = complaints.filter(description__icontains=search)
     except Employee.DoesNotExist:
-        complaints = []
+        return None
+    complaints = assigned_queryset(employee, request.GET)
+    paginate = offset_paginate if request.GET.get('search') else keyset_paginate
+    return caching.cached(
+        f'assigned_complaints:{employee.pk}',
+        (caching.COMPLAINTS, caching.CUSTOMERS, caching.PRODUCTS),
+        lambda: paginate(request, complaints),
+        params=request.GET.dict(),
+    )
+
+@login_required
+@user_passes_test(is_employee)
+@replica_reads
+@conditional(page_validator(assigned_complaints_page))
+def assigned_complaints(request):
+    page = assigned_complaints_page(request)
+    rows = caching.render_rows('partials/complaint_row_assigned.html', page or [])
+    return render(request, 'employees/assigned_complaints.html', {'complaints': page, 'page': page, 'rows': rows})
+
+UNASSIGNED_ROW = 'partials/complaint_row_unassigned.html'
 
-    return render(request, 'employees/assigned_complaints.html', {'complaints': complaints})
+def distance_key(complaint):
+    # "Near me" rows show the distance from this request's position
+    return f'near{complaint.distance_km}'
+
+def unassigned_queryset():
+    return Complaint.objects.filter(assigned_to__isnull=True).select_related('customer', 'product')
+
+def unassigned_complaints_page(request):
+    if geo.parse_point(request.GET.get('lat'), request.GET.get('lng')):
+        return None  # "Near me" pages depend on the position and are not cached
+    return caching.cached(
+        'unassigned_complaints',
+        (caching.COMPLAINTS, caching.CUSTOMERS, caching.PRODUCTS),
+        lambda: keyset_paginate(request, unassigned_queryset()),
+        params=request.GET.dict(),
+    )
 
 @login_required
 @user_passes_test(is_employee)
+@replica_reads
+@conditional(page_validator(unassigned_complaints_page))
 def unassigned_complaints(request):
-    complaints = Complaint.objects.filter(assigned_to__isnull=True).order_by('-created_at')
-    return render(request, 'employees/unassigned_complaints.html', {'complaints': complaints})
+    # "Near me": nearest unassigned complaints to the engineer's position
+    point = geo.parse_point(request.GET.get('lat'), request.GET.get('lng'))
+    if point:
+        nearby = geo.nearest(unassigned_queryset(), *point, limit=get_page_size(request))
+        return render(request, 'employees/unassigned_complaints.html', {
+            'complaints': nearby,
+            'rows': caching.render_rows(UNASSIGNED_ROW, nearby, {'near': point}, vary=distance_key),
+            'near': point,
+        })
+
+    page = unassigned_complaints_page(request)
+    rows = caching.render_rows(UNASSIGNED_ROW, page)
+    return render(request, 'employees/unassigned_complaints.html', {'complaints': page, 'page': page, 'rows': rows})
 
 @login_required
 @user_passes_test(is_employee)
@@ -352,9 +586,10 @@ def assign_to_me(request, pk):
     complaint = get_object_or_404(Complaint, pk=pk)
     try:
         employee = request.user.employee_profile
-        complaint.assigned_to = employee
-        complaint.save()
-        messages.success(request, 'Complaint assigned to you successfully')
+        if claims.claim(complaint.pk, employee):
+            messages.success(request, 'Complaint assigned to you successfully')
+        else:
+            messages.error(request, 'This complaint has already been assigned')
     except Employee.DoesNotExist:
         messages.error(request, 'Employee profile not found')
     
@@ -362,9 +597,29 @@ def assign_to_me(request, pk):
 
 @login_required
 @user_passes_test(is_employee)
+def claim_next_complaints(request):
+    if request.method == 'POST':
+        try:
+            employee = request.user.employee_profile
+            try:
+                count = int(request.POST.get('count', 1))
+            except ValueError:
+                count = 1
+            claimed = claims.claim_next(employee, count)
+            if claimed:
+                messages.success(request, f'{len(claimed)} complaint(s) assigned to you')
+            else:
+                messages.info(request, 'There are no unassigned complaints to claim')
+        except Employee.DoesNotExist:
+            messages.error(request, 'Employee profile not found')
+        return redirect('assigned_complaints')
+    return redirect('unassigned_complaints')
+
+@login_required
+@user_passes_test(is_employee)
+@conditional(complaint_validator)
 def complaint_detail_employee(request, pk):
-    complaint = get_object_or_404(Complaint, pk=pk)
-    remarks = complaint.remarks.all().order_by('-timestamp')
+    complaint = get_object_or_404(Complaint.objects.select_related('customer', 'product', 'assigned_to__user'), pk=pk)
     
     if request.method == 'POST':
         form = ComplaintRemarkForm(request.POST)
@@ -378,6 +633,7 @@ def complaint_detail_employee(request, pk):
     else:
         form = ComplaintRemarkForm()
     
+    remarks = keyset_paginate(request, remark_timeline(pk), field='timestamp', default_size=settings.REMARKS_PAGE_SIZE)
     return render(request, 'employees/complaint_detail.html', {
         'complaint': complaint, 
         'remarks': remarks, 
@@ -391,16 +647,187 @@ def update_complaint_status(request, pk):
     if request.method == 'POST':
         status = request.POST.get('status')
         if status in ['Pending', 'Closed', 'Not Closed']:
-            complaint.status = status
-            complaint.save()
+            with transaction.atomic():
+                # Lock the row and write only the status so a concurrent claim survives
+                complaint = Complaint.objects.select_for_update().get(pk=pk)
+                old_state = complaint.counter_state()
+                complaint.status = status
+                complaint.save(update_fields=['status'])
+                events.record_change(pk, old_state, complaint.counter_state(), actor=request.user)
             messages.success(request, 'Status updated successfully')
     
     return redirect('complaint_detail_employee', pk=pk)
 
+# -------------------------------
+# Remark Timeline
+# -------------------------------
+# Detail pages show the newest REMARKS_PAGE_SIZE remarks; the "Load older"
+# button pages back through complaint_remarks with the keyset cursor.
+
+REMARK_ITEM_TEMPLATES = {
+    'admin': 'partials/remark_items_admin.html',
+    'employee': 'partials/remark_items_employee.html',
+}
+
+def is_admin_or_employee(user):
+    return is_admin(user) or is_employee(user)
+
+def remark_timeline(complaint_id):
+    return ComplaintRemark.objects.filter(complaint_id=complaint_id).select_related('employee__user')
+
+def remark_json(remark):
+    return {
+        'id': remark.id,
+        'remark': remark.remark,
+        'timestamp': remark.timestamp.isoformat(),
+        'employee': {
+            'id': remark.employee_id,
+            'name': remark.employee.user.get_full_name() or remark.employee.user.username,
+            'designation': remark.employee.designation,
+        },
+    }
+
+def remarks_response(request, page):
+    """The rendered remark items (next cursor in X-Next-Cursor), or JSON with ?format=json."""
+    if request.GET.get('format') == 'json':
+        return JsonResponse({'remarks': [remark_json(remark) for remark in page], 'next_cursor': page.next_cursor})
+    response = render(request, REMARK_ITEM_TEMPLATES[request.user.role], {'remarks': page})
+    if page.next_cursor:
+        response['X-Next-Cursor'] = page.next_cursor
+    return response
+
+@login_required
+@user_passes_test(is_admin_or_employee)
+@replica_reads
+def complaint_remarks(request, pk):
+    if Complaint.objects.filter(pk=pk).exists():
+        timeline = remark_timeline(pk)
+    elif is_admin(request.user) and ArchivedComplaint.objects.filter(pk=pk).exists():
+        timeline = archive.archived_timeline(pk)
+    else:
+        raise Http404('No complaint matches the given query.')
+    page = keyset_paginate(request, timeline, field='timestamp', default_size=settings.REMARKS_PAGE_SIZE)
+    return remarks_response(request, page)
+
+# -------------------------------
+# Live Feed
+# -------------------------------
+
+@login_required
+@user_passes_test(is_admin_or_employee)
+def complaint_feed(request):
+    # The SSE feed needs the ASGI profile (async_views.complaint_feed); a
+    # sync worker would be pinned per open page. 204 stops EventSource from
+    # reconnecting, so the pages simply stay static.
+    return HttpResponse(status=204)
+
+# -------------------------------
+# Monitoring
+# -------------------------------
+
+def metrics(request):
+    token = settings.METRICS_TOKEN
+    if token:
+        if request.headers.get('Authorization') != f'Bearer {token}':
+            return HttpResponse('Unauthorized', status=401, content_type='text/plain')
+    elif not (settings.DEBUG or settings.METRICS_INTERNAL):
+        # Neither a token nor a deployment that keeps /metrics off the public network
+        raise Http404
+    body, content_type = request_metrics.render()
+    return HttpResponse(body, content_type=content_type)
+
 # -------------------------------
 # API Views for AJAX
 # -------------------------------
 
+@login_required
+@user_passes_test(is_admin)
+@replica_reads
+def autocomplete_lookup(request, kind):
+    if kind not in autocomplete.SOURCES:
+        raise Http404
+    results = autocomplete.lookup(kind, request.GET.get('q', ''), autocomplete.clean_limit(request.GET.get('limit')))
+    return JsonResponse({'results': results})
+
+@login_required
+@user_passes_test(is_employee)
+@replica_reads
+def nearby_complaints(request):
+    point = geo.parse_point(request.GET.get('lat'), request.GET.get('lng'))
+    if not point:
+        return JsonResponse({'status': 'error', 'message': 'Valid lat and lng are required'}, status=400)
+    try:
+        limit = int(request.GET.get('limit', 10))
+    except ValueError:
+        limit = 10
+
+    nearby = geo.nearest(unassigned_queryset(), *point, limit=limit)
+    return JsonResponse({
+        'status': 'success',
+        'complaints': [
+            {
+                'id': complaint.pk,
+                'customer': complaint.customer.name,
+                'product': complaint.product.name,
+                'complaint_level': complaint.complaint_level,
+                'lat': complaint.location_lat,
+                'lng': complaint.location_lng,
+                'distance_km': complaint.distance_km,
+                'created_at': complaint.created_at.isoformat(),
+            }
+            for complaint in nearby
+        ],
+    })
+
+LOCATION_BATCH_MAX = 5000
+
+def apply_locations(items):
+    """
+    Validate and apply a batch of {complaint_id, lat, lng} updates.
+
+    One query resolves which complaints exist and ``bulk_update`` writes only
+    the location columns. When a complaint appears more than once, the last
+    entry wins. Returns one result dict per input item, in input order.
+    """
+    results = [None] * len(items)
+    latest = {}
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            results[index] = {'index': index, 'status': 'error', 'message': 'Expected an object'}
+            continue
+        complaint_id = item.get('complaint_id')
+        point = geo.parse_point(item.get('lat'), item.get('lng'))
+        # bool is an int subclass: true must not pass as complaint 1
+        if isinstance(complaint_id, bool) or not (isinstance(complaint_id, int) or str(complaint_id).isdigit()):
+            results[index] = {'index': index, 'status': 'error', 'message': 'Invalid complaint_id'}
+        elif point is None:
+            results[index] = {'index': index, 'complaint_id': complaint_id, 'status': 'error',
+                              'message': 'Invalid lat/lng'}
+        else:
+            complaint_id = int(complaint_id)
+            if complaint_id in latest:
+                earlier = latest[complaint_id][0]
+                results[earlier] = {'index': earlier, 'complaint_id': complaint_id, 'status': 'superseded'}
+            latest[complaint_id] = (index, point)
+
+    existing = set(Complaint.objects.filter(pk__in=latest).values_list('id', flat=True))
+    now = timezone.now()
+    updates = []
+    for complaint_id, (index, (lat, lng)) in latest.items():
+        if complaint_id not in existing:
+            results[index] = {'index': index, 'complaint_id': complaint_id, 'status': 'not_found'}
+            continue
+        updates.append(Complaint(pk=complaint_id, location_lat=lat, location_lng=lng,
+                                 geo_cell=geo.cell_for(lat, lng), updated_at=now))
+        results[index] = {'index': index, 'complaint_id': complaint_id, 'status': 'updated'}
+
+    if updates:
+        with transaction.atomic():
+            Complaint.objects.bulk_update(updates, ['location_lat', 'location_lng', 'geo_cell', 'updated_at'],
+                                          batch_size=1000)
+            caching.bump(caching.COMPLAINTS)
+    return results
+
 @csrf_exempt
 def save_location(request):
     if request.method == 'POST':
@@ -410,10 +837,31 @@ def save_location(request):
         lng = data.get('lng')
         
         if complaint_id and lat and lng:
-            complaint = get_object_or_404(Complaint, pk=complaint_id)
-            complaint.location_lat = lat
-            complaint.location_lng = lng
-            complaint.save()
-            return JsonResponse({'status': 'success'})
+            result = apply_locations([{'complaint_id': complaint_id, 'lat': lat, 'lng': lng}])[0]
+            if result['status'] == 'not_found':
+                raise Http404('No Complaint matches the given query.')
+            if result['status'] == 'updated':
+                return JsonResponse({'status': 'success'})
     
     return JsonResponse({'status': 'error'})
+
+def save_locations(request):
+    if request.method != 'POST':
+        return JsonResponse({'status': 'error', 'message': 'POST required'}, status=405)
+    if not request.user.is_authenticated:
+        return JsonResponse({'status': 'error', 'message': 'Authentication required'}, status=401)
+    try:
+        data = json.loads(request.body)
+    except ValueError:
+        return JsonResponse({'status': 'error', 'message': 'Invalid JSON'}, status=400)
+
+    items = data.get('locations') if isinstance(data, dict) else data
+    if not isinstance(items, list):
+        return JsonResponse({'status': 'error', 'message': 'Expected a list of locations'}, status=400)
+    if len(items) > LOCATION_BATCH_MAX:
+        return JsonResponse({'status': 'error',
+                             'message': f'At most {LOCATION_BATCH_MAX} locations per request'}, status=400)
+
+    results = apply_locations(items)
+    updated = sum(1 for result in results if result['status'] == 'updated')
+    return JsonResponse({'status': 'success', 'updated': updated, 'results': results})
@@ -0,0 +1,20 @@
+# gunicorn reads this file from the working directory. With several workers
+# set PROMETHEUS_MULTIPROC_DIR so /metrics reports all of them, not just the
+# worker that answered the scrape (complaints/metrics.py).
+import glob
+import os
+
+
+def on_starting(server):
+    directory = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+        for path in glob.glob(os.path.join(directory, '*.db')):
+            os.remove(path)
+
+
+def child_exit(server, worker):
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
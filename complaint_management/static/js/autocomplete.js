@@ -0,0 +1,81 @@
+// Typeahead pickers (partials/autocomplete_input.html): the text box asks
+// the autocomplete endpoint for matches and stores the chosen id in the
+// hidden input next to it. Editing the text clears the selection.
+document.querySelectorAll('[data-autocomplete]').forEach(function (picker) {
+    const hidden = picker.querySelector('input[type=hidden]');
+    const text = picker.querySelector('.autocomplete-text');
+    const menu = picker.querySelector('.autocomplete-menu');
+    let timer = null;
+    let active = -1;
+
+    function close() {
+        menu.classList.add('d-none');
+        menu.innerHTML = '';
+        active = -1;
+    }
+
+    function choose(item) {
+        hidden.value = item.dataset.id;
+        text.value = item.textContent;
+        close();
+    }
+
+    function highlight(index) {
+        const items = menu.querySelectorAll('.list-group-item');
+        if (!items.length) return;
+        active = (index + items.length) % items.length;
+        items.forEach(function (item, i) {
+            item.classList.toggle('active', i === active);
+        });
+    }
+
+    function search() {
+        const term = text.value.trim();
+        if (!term) {
+            close();
+            return;
+        }
+        fetch(picker.dataset.autocomplete + '?q=' + encodeURIComponent(term), {credentials: 'same-origin'})
+            .then(function (response) { return response.json(); })
+            .then(function (data) {
+                if (text.value.trim() !== term) return;  // a newer search is on its way
+                menu.innerHTML = '';
+                active = -1;
+                data.results.forEach(function (result) {
+                    const item = document.createElement('button');
+                    item.type = 'button';
+                    item.className = 'list-group-item list-group-item-action';
+                    item.dataset.id = result.id;
+                    item.textContent = result.text;
+                    item.addEventListener('mousedown', function (event) {
+                        event.preventDefault();
+                        choose(item);
+                    });
+                    menu.appendChild(item);
+                });
+                if (!data.results.length) {
+                    menu.innerHTML = '<div class="list-group-item text-muted small">No matches</div>';
+                }
+                menu.classList.remove('d-none');
+            });
+    }
+
+    text.addEventListener('input', function () {
+        hidden.value = '';
+        clearTimeout(timer);
+        timer = setTimeout(search, 200);
+    });
+    text.addEventListener('keydown', function (event) {
+        if (menu.classList.contains('d-none')) return;
+        if (event.key === 'ArrowDown' || event.key === 'ArrowUp') {
+            event.preventDefault();
+            highlight(active + (event.key === 'ArrowDown' ? 1 : -1));
+        } else if (event.key === 'Enter' && active >= 0) {
+            event.preventDefault();
+            choose(menu.querySelectorAll('.list-group-item')[active]);
+        } else if (event.key === 'Escape') {
+            close();
+        }
+    });
+    text.addEventListener('blur', close);
+});
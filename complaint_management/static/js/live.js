@@ -0,0 +1,56 @@
+// Live complaint lists: the element marked data-live-list listens to the
+// complaint feed (Server-Sent Events, complaints/feed.py) and replaces,
+// adds or removes single rows as complaints change, instead of the page
+// being reloaded. Each event names the list its complaint now belongs to
+// and carries the row markup for it.
+(function () {
+    const container = document.querySelector('[data-live-list]');
+    if (!container || !window.EventSource) return;
+    const list = container.dataset.liveList;
+    const feed = new EventSource(container.dataset.liveFeed);
+
+    function highlight(row) {
+        row.classList.add('table-info');
+        setTimeout(function () { row.classList.remove('table-info'); }, 3000);
+    }
+
+    function insert(body, row, id) {
+        // Newest first, and ids grow with creation time
+        const older = Array.from(body.rows).find(function (other) {
+            return Number(other.dataset.complaint) < id;
+        });
+        if (!older && 'liveMore' in container.dataset) return false;  // it belongs on a later page
+        body.insertBefore(row, older || null);
+        return true;
+    }
+
+    feed.addEventListener('complaint', function (message) {
+        const event = JSON.parse(message.data);
+        const body = container.querySelector('tbody');
+        const current = body && body.querySelector('tr[data-complaint="' + event.complaint + '"]');
+        if (event.list !== list) {
+            if (current) current.remove();
+            return;
+        }
+        if (!event.row || (!current && !('liveInsert' in container.dataset))) return;
+        if (!body) {
+            window.location.reload();  // the list was empty; render it with its table
+            return;
+        }
+        const template = document.createElement('template');
+        template.innerHTML = event.row.trim();
+        const row = template.content.firstElementChild;
+        if (current) {
+            current.replaceWith(row);
+        } else if (!insert(body, row, event.complaint)) {
+            return;
+        }
+        highlight(row);
+    });
+
+    // Too much was missed to patch the page row by row
+    feed.addEventListener('reset', function () {
+        feed.close();
+        window.location.reload();
+    });
+})();
@@ -0,0 +1,24 @@
+// Appends the next page of remarks (an HTML fragment); the response's
+// X-Next-Cursor header holds the cursor for the page after it.
+document.addEventListener('click', function (event) {
+    const button = event.target.closest('[data-remarks-older]');
+    if (!button) return;
+    button.disabled = true;
+    fetch(button.dataset.remarksOlder + '?cursor=' + encodeURIComponent(button.dataset.cursor), {credentials: 'same-origin'})
+        .then(function (response) {
+            if (!response.ok) throw new Error(response.statusText);
+            const next = response.headers.get('X-Next-Cursor');
+            return response.text().then(function (html) {
+                document.querySelector(button.dataset.target).insertAdjacentHTML('beforeend', html);
+                if (next) {
+                    button.dataset.cursor = next;
+                    button.disabled = false;
+                } else {
+                    button.parentNode.remove();
+                }
+            });
+        })
+        .catch(function () {
+            button.disabled = false;
+        });
+});